@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""用于基准测试的 yt-dlp 替身，不联网，按环境变量输出与真实 yt-dlp 相同格式的内容
+
+- 带 --flat-playlist：逐行输出 FAKE_YTDLP_ENTRIES 个播放列表条目（JSON）
+- 带 --dump-json：输出一个包含 FAKE_YTDLP_FORMATS 个格式、约 FAKE_YTDLP_JSON_KB KB 的视频信息
+- 其他情况视为下载：每个格式流（-f 中逗号分隔的数量）输出 FAKE_YTDLP_LINES 行进度，
+  最后输出合并信息；带 --progress-template 时输出模板格式的进度行
+
+FAKE_YTDLP_RATE 为每秒输出的行数（0 表示不限速），FAKE_YTDLP_EXIT 为退出码，
+FAKE_YTDLP_PROGRESS=classic 时忽略 --progress-template，模拟旧版 yt-dlp 的进度行。
+"""
+import json
+import os
+import sys
+import time
+
+
+def env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+def arg_value(args, option, default=None):
+    if option in args:
+        index = args.index(option)
+        if index + 1 < len(args):
+            return args[index + 1]
+    return default
+
+
+class Emitter:
+    """按设定速率输出行
+    """
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.next_time = time.monotonic()
+
+    def emit(self, line):
+        sys.stdout.write(line + '\n')
+        if self.interval:
+            sys.stdout.flush()
+            self.next_time += self.interval
+            delay = self.next_time - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+
+def make_format(index):
+    audio = index % 4 == 0
+    return {
+        'format_id': str(100 + index),
+        'ext': 'm4a' if audio else 'mp4',
+        'vcodec': 'none' if audio else 'avc1.64001F',
+        'acodec': 'mp4a.40.2' if audio else 'none',
+        'height': None if audio else 144 * (1 + index % 8),
+        'abr': 128 if audio else None,
+        'tbr': 100.0 + index,
+        'filesize': 1000000 * (index + 1),
+        'url': f'https://media.example.invalid/{index}',
+        'http_headers': {'User-Agent': 'fake'},
+    }
+
+
+def dump_json(url):
+    format_count = env_int('FAKE_YTDLP_FORMATS', 40)
+    info = {
+        'id': 'fakevideo',
+        'title': '基准测试视频',
+        'webpage_url': url,
+        'extractor_key': 'Fake',
+        'duration': 600,
+        'upload_date': '20240101',
+        'formats': [make_format(i) for i in range(format_count)],
+        'description': 'x' * (env_int('FAKE_YTDLP_JSON_KB', 64) * 1024),
+    }
+    print(json.dumps(info, ensure_ascii=False), flush=True)
+
+
+def flat_playlist(emitter):
+    emitter.emit('[youtube:tab] Extracting URL: https://www.youtube.com/playlist?list=PLfake')
+    for index in range(1, env_int('FAKE_YTDLP_ENTRIES', 1000) + 1):
+        emitter.emit(json.dumps({
+            '_type': 'url', 'ie_key': 'Youtube', 'id': f'vid{index:06d}',
+            'url': f'https://www.youtube.com/watch?v=vid{index:06d}', 'title': f'Video {index}',
+            'duration': 300 + index % 600, 'playlist_title': 'Fake playlist', 'playlist_id': 'PLfake',
+            'playlist_index': index,
+        }))
+
+
+def download(args, emitter):
+    lines = env_int('FAKE_YTDLP_LINES', 1000)
+    formats = (arg_value(args, '-f') or '137,140').split(',')
+    use_template = '--progress-template' in args and os.environ.get('FAKE_YTDLP_PROGRESS') != 'classic'
+    output = arg_value(args, '-o', '%(title)s.%(ext)s').replace('%(title)s', 'fake').replace('%(ext)s', 'mp4')
+    total = 50 * 1024 * 1024
+    emitter.emit('[youtube] Extracting URL: https://www.youtube.com/watch?v=fakevideo')
+    emitter.emit('[youtube] fakevideo: Downloading webpage')
+    emitter.emit(f"[info] fakevideo: Downloading 1 format(s): {'+'.join(formats)}")
+    for format_id in formats:
+        emitter.emit(f'[download] Destination: {output}.f{format_id}')
+        for step in range(1, lines + 1):
+            downloaded = total * step // lines
+            if use_template:
+                emitter.emit(f'[progress] fakevideo|{format_id}|downloading|{downloaded}|{total}|NA|'
+                             f'5242880.0|{(lines - step) // 100}|{step}|{lines}')
+            else:
+                emitter.emit(f'[download]  {downloaded * 100.0 / total:5.1f}% of   50.00MiB at    5.00MiB/s '
+                             f'ETA 00:{(lines - step) // 100 % 60:02d}')
+        if use_template:
+            emitter.emit(f'[progress] fakevideo|{format_id}|finished|{total}|{total}|NA|NA|NA|{lines}|{lines}')
+        emitter.emit('[download] 100% of   50.00MiB in 00:00:10 at 5.00MiB/s')
+    if len(formats) > 1:
+        emitter.emit(f'[Merger] Merging formats into "{output}"')
+        for format_id in formats:
+            emitter.emit(f'Deleting original file {output}.f{format_id} (pass -k to keep)')
+
+    # 模拟 --print-to-file after_move:... 写入的完成清单
+    if '--print-to-file' in args:
+        path = args[args.index('--print-to-file') + 2]
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(f"fake\tfakevideo\t{'+'.join(formats)}\t{total}\thttps://example.invalid/fakevideo\t{output}\n")
+
+
+def main():
+    args = sys.argv[1:]
+    emitter = Emitter(float(os.environ.get('FAKE_YTDLP_RATE', 0)))
+    url = next((arg for arg in args if arg.startswith('http')), 'https://example.invalid/')
+    if '--flat-playlist' in args:
+        flat_playlist(emitter)
+    elif '--dump-json' in args:
+        dump_json(url)
+    else:
+        download(args, emitter)
+    sys.stdout.flush()
+    return env_int('FAKE_YTDLP_EXIT', 0)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
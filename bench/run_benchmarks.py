@@ -0,0 +1,258 @@
+"""基准测试：用 fake_ytdlp.py 代替 yt-dlp，在 offscreen 平台下测量图形界面路径的性能
+
+    python bench/run_benchmarks.py
+    python bench/run_benchmarks.py --lines 20000 --json result.json
+    python bench/run_benchmarks.py --baseline result.json   # 与保存的结果比较，退化超过阈值时返回1
+
+测量项目：
+- 下载日志：DownloadWorker → 信号 → LogView / 进度条，每秒处理的行数、事件循环延迟、内存增长
+- 视频分析：AnalyzeWorker 解析 --dump-json 的耗时
+- 播放列表分析：PlaylistAnalyzeWorker 流式解析条目的耗时
+"""
+import os
+import sys
+sys.dont_write_bytecode = True
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+import argparse
+import gc
+import json
+import statistics
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from PyQt5.QtWidgets import QApplication, QProgressBar
+from PyQt5.QtCore import QElapsedTimer, QTimer
+
+from core.engines import SubprocessEngine, SubprocessRun
+from utils import AnalyzeWorker, DownloadWorker, LogView, PlaylistAnalyzeWorker, UIManager
+
+FAKE_YTDLP = os.path.join(BENCH_DIR, 'fake_ytdlp.py')
+# 事件循环延迟的采样间隔（毫秒）
+PROBE_INTERVAL = 5
+# 单项测试的最长运行时间（秒）
+TIMEOUT = 300
+# 与基准结果比较时，内存（MB）与延迟（毫秒）的变化低于该值时视为波动
+NOISE_FLOOR = {'memory_growth_mb': 2.0, 'latency': 10.0}
+
+
+class FakeEngine(SubprocessEngine):
+    """用当前解释器运行 fake_ytdlp.py，不依赖可执行权限，Windows 上同样可用
+    """
+
+    def __init__(self):
+        super().__init__(FAKE_YTDLP)
+
+    def describe(self, args):
+        return ' '.join(['fake-yt-dlp'] + list(args))
+
+    def start(self, args, on_line, on_progress=None):
+        return SubprocessRun([sys.executable, FAKE_YTDLP] + list(args), on_line, on_progress)
+
+
+def rss_bytes():
+    """当前进程的常驻内存，无法读取时返回0
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+class LatencyProbe:
+    """定时器按固定间隔触发，记录每次实际触发比预期晚了多少毫秒
+    """
+
+    def __init__(self, interval=PROBE_INTERVAL):
+        self.interval = interval
+        self.samples = []
+        self._clock = QElapsedTimer()
+        self._timer = QTimer()
+        self._timer.setInterval(interval)
+        self._timer.timeout.connect(self._tick)
+
+    def start(self):
+        self.samples = []
+        self._clock.start()
+        self._timer.start()
+
+    def stop(self):
+        self._timer.stop()
+
+    def _tick(self):
+        elapsed = self._clock.restart()
+        self.samples.append(max(0, elapsed - self.interval))
+
+    def summary(self):
+        if not self.samples:
+            return {'latency_p50_ms': 0.0, 'latency_p99_ms': 0.0, 'latency_max_ms': 0.0}
+        ordered = sorted(self.samples)
+        return {
+            'latency_p50_ms': float(ordered[len(ordered) // 2]),
+            'latency_p99_ms': float(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]),
+            'latency_max_ms': float(ordered[-1]),
+        }
+
+
+def run_until(app, worker, finished_signal):
+    """启动工作线程并运行事件循环，直到完成信号触发，返回耗时（秒）
+    """
+    result = {}
+
+    def done(*args):
+        result['elapsed'] = time.perf_counter() - start
+        QTimer.singleShot(0, app.quit)
+
+    finished_signal.connect(done)
+    worker.error_occurred.connect(lambda message: print(f"  错误: {message}", file=sys.stderr))
+    QTimer.singleShot(TIMEOUT * 1000, app.quit)
+    start = time.perf_counter()
+    worker.start()
+    app.exec_()
+    worker.wait()
+    if 'elapsed' not in result:
+        raise RuntimeError("基准测试超时")
+    return result['elapsed']
+
+
+def bench_download(app, lines, progress_mode):
+    """下载日志路径：与单视频下载页面相同的信号连接方式
+    """
+    os.environ['FAKE_YTDLP_LINES'] = str(lines)
+    os.environ['FAKE_YTDLP_PROGRESS'] = progress_mode
+    log_view = LogView()
+    progress_bar = QProgressBar()
+    received = [0]
+
+    def on_line(message):
+        received[0] += 1
+        UIManager.log_message(log_view, message)
+
+    output_dir = tempfile.mkdtemp(prefix='ytdlp_bench_')
+    worker = DownloadWorker(FAKE_YTDLP, 'https://www.youtube.com/watch?v=fakevideo', "全部下载", output_dir,
+                            video_quality="最高质量", audio_quality="最高质量", engine=FakeEngine())
+    worker.progress_updated.connect(on_line)
+    worker.progress_changed.connect(lambda value: UIManager.update_progress_bar(progress_bar, value))
+    worker.progress_detail.connect(lambda progress: UIManager.update_progress_detail(progress_bar, progress))
+
+    gc.collect()
+    rss_before = rss_bytes()
+    probe = LatencyProbe()
+    probe.start()
+    elapsed = run_until(app, worker, worker.download_finished)
+    probe.stop()
+    log_view.flush()
+    gc.collect()
+
+    # 两个格式流各输出 lines 行进度
+    total_lines = lines * 2
+    result = {
+        'lines': total_lines,
+        'seconds': elapsed,
+        'lines_per_sec': total_lines / elapsed,
+        'log_lines_received': received[0],
+        'memory_growth_mb': (rss_bytes() - rss_before) / (1024 * 1024),
+    }
+    result.update(probe.summary())
+    os.rmdir(output_dir)
+    return result
+
+
+def bench_analyze(app, json_kb, format_count, repeat):
+    os.environ['FAKE_YTDLP_JSON_KB'] = str(json_kb)
+    os.environ['FAKE_YTDLP_FORMATS'] = str(format_count)
+    timings = []
+    for _ in range(repeat):
+        worker = AnalyzeWorker(FAKE_YTDLP, 'https://www.youtube.com/watch?v=fakevideo', engine=FakeEngine())
+        timings.append(run_until(app, worker, worker.analysis_finished))
+    return {'seconds': statistics.median(timings), 'json_kb': json_kb, 'formats': format_count}
+
+
+def bench_playlist(app, entries):
+    os.environ['FAKE_YTDLP_ENTRIES'] = str(entries)
+    received = [0]
+    worker = PlaylistAnalyzeWorker(FAKE_YTDLP, 'https://www.youtube.com/playlist?list=PLfake', engine=FakeEngine())
+    worker.entries_found.connect(lambda batch: received.__setitem__(0, received[0] + len(batch)))
+    elapsed = run_until(app, worker, worker.analysis_finished)
+    return {'entries': received[0], 'seconds': elapsed, 'entries_per_sec': received[0] / elapsed}
+
+
+def compare(results, baseline, tolerance):
+    """与基准结果比较，返回退化项列表；*_per_sec 越大越好，其余数值越小越好
+    """
+    regressions = []
+    for name, metrics in results.items():
+        for metric, value in metrics.items():
+            old = baseline.get(name, {}).get(metric)
+            if not isinstance(old, (int, float)) or not old or metric in ('lines', 'entries', 'json_kb', 'formats',
+                                                                          'log_lines_received'):
+                continue
+            if metric == 'memory_growth_mb' or metric.startswith('latency'):
+                # 数值很小时波动大，超过固定下限的变化才有意义
+                floor = NOISE_FLOOR['memory_growth_mb' if metric == 'memory_growth_mb' else 'latency']
+                worse = value - old > max(floor, abs(old) * tolerance)
+            elif metric.endswith('_per_sec'):
+                worse = value < old * (1 - tolerance)
+            else:
+                worse = value > old * (1 + tolerance)
+            if worse:
+                regressions.append(f"{name}.{metric}: {old:.3f} -> {value:.3f}")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="YT-DLP 下载工具基准测试")
+    parser.add_argument('--lines', type=int, default=10000, help="每个格式流输出的进度行数")
+    parser.add_argument('--json-kb', type=int, default=256, help="--dump-json 输出的大小（KB）")
+    parser.add_argument('--formats', type=int, default=200, help="--dump-json 中的格式数量")
+    parser.add_argument('--entries', type=int, default=5000, help="播放列表条目数")
+    parser.add_argument('--repeat', type=int, default=5, help="视频分析的重复次数（取中位数）")
+    parser.add_argument('--rate', type=float, default=0, help="替身每秒输出的行数，0 表示不限速")
+    parser.add_argument('--json', help="把结果保存为JSON文件")
+    parser.add_argument('--baseline', help="与之前保存的JSON结果比较")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="允许的退化比例，默认0.2")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    os.environ['FAKE_YTDLP_RATE'] = str(args.rate)
+
+    results = {}
+    benchmarks = (
+        ('download_template', lambda: bench_download(app, args.lines, 'template')),
+        ('download_classic', lambda: bench_download(app, args.lines, 'classic')),
+        ('analyze_video', lambda: bench_analyze(app, args.json_kb, args.formats, args.repeat)),
+        ('analyze_playlist', lambda: bench_playlist(app, args.entries)),
+    )
+    for name, bench in benchmarks:
+        print(f"{name}:", flush=True)
+        results[name] = bench()
+        for metric, value in results[name].items():
+            print(f"  {metric:<20} {value:12.3f}" if isinstance(value, float) else f"  {metric:<20} {value:12}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("性能退化:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("与基准结果相比没有明显退化")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,371 @@
+"""命令行批量下载入口，不依赖 PyQt5，可在没有图形界面的服务器或计划任务中运行
+
+    python cli.py URL [URL ...]
+    python cli.py -i urls.txt --type audio -j 3
+
+未在命令行指定的选项从 config.ini 的 [Settings] 与 [CLI] 段读取。
+"""
+import sys
+sys.dont_write_bytecode = True
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from core.analysis import AnalysisError, pool as analysis_pool
+from core.archive import DownloadArchive
+from core.bandwidth import scheduler as bandwidth_scheduler
+from core.metrics import MetricsExporter, registry as metrics_registry
+from core.postprocess import pool as postprocess_pool
+from core.cookies import registry as cookie_registry
+from core.command import DOWNLOAD_ALL, DOWNLOAD_AUDIO, DOWNLOAD_VIDEO, DOWNLOAD_TYPES
+from core.config import load_section, load_settings
+from core.download import DownloadTask
+from core.engines import create_engine
+from core.fragment_tuner import AUTO_FRAGMENTS, host_key
+from core.errors import throttle as host_throttle
+from core.progress import describe_progress
+from core.staging import guard as space_guard
+from core.proxies import pool as proxy_pool
+from core.external import DOWNLOADER_NAMES, aria2c
+from core.subscriptions import SubscriptionError, SubscriptionStore, sync_subscription
+
+TYPE_ALIASES = {'all': DOWNLOAD_ALL, 'audio': DOWNLOAD_AUDIO, 'video': DOWNLOAD_VIDEO}
+QUALITY_ALIASES = {'best': "最高质量", 'medium': "中等质量", 'low': "低质量"}
+# 每个任务输出进度的最小间隔（秒）
+PROGRESS_INTERVAL = 5.0
+# 执行任务的最大线程数；等待名额或站点退避的任务只占线程，不占下载名额
+MAX_TASK_THREADS = 256
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="YT-DLP 下载工具命令行版")
+    parser.add_argument('urls', nargs='*', metavar='URL', help="要下载的链接")
+    parser.add_argument('-i', '--input', help="链接列表文件，每行一个链接，# 开头为注释，- 表示标准输入")
+    parser.add_argument('-c', '--config', help="配置文件路径，默认为程序目录下的 config.ini")
+    parser.add_argument('-t', '--type', help="下载类型: all / audio / video（或 全部下载 / 仅音频 / 仅视频）")
+    parser.add_argument('--audio-quality', help="音频质量: best / medium / low 或 yt-dlp 格式字符串")
+    parser.add_argument('--video-quality', help="视频质量: best / medium / low 或 yt-dlp 格式字符串")
+    parser.add_argument('--cookies', help="Cookie文件路径，auto 表示按链接的域名从设置的Cookie文件中选择")
+    parser.add_argument('-o', '--output', help="输出目录")
+    parser.add_argument('--ytdlp', help="yt-dlp 可执行文件路径")
+    parser.add_argument('--engine', help="下载引擎: subprocess / library")
+    parser.add_argument('--no-check-certificate', action='store_true', help="不验证 HTTPS 证书（不安全）")
+    parser.add_argument('-j', '--jobs', type=int, help="同时下载的任务数")
+    parser.add_argument('--threads', help="每个任务的分片并发数，auto 表示自动调节")
+    parser.add_argument('--limit-total', type=int, help="所有任务合计的带宽上限（KB/s），0 表示不限速")
+    parser.add_argument('--proxy', action='append', help="代理地址（http:// 或 socks5://），可重复指定多个组成代理池")
+    parser.add_argument('--downloader', help="下载器: native / aria2c（多连接下载普通文件，找不到 aria2c 时改用内置下载器）")
+    parser.add_argument('--staging-dir', help="暂存目录，下载完成后再把文件移动到输出目录")
+    parser.add_argument('--metrics-dir', help="定期写入 Prometheus 文本文件与JSON指标的目录")
+    parser.add_argument('--sync', action='store_true', help="同步到期的订阅，下载新上传的视频（可与链接一起使用）")
+    parser.add_argument('--check', action='store_true', help="只并发分析链接并输出结果，不下载")
+    parser.add_argument('--no-archive', action='store_true', help="不使用下载存档跳过已下载的视频")
+    parser.add_argument('-q', '--quiet', action='store_true', help="只输出任务结果与错误")
+    return parser.parse_args(argv)
+
+
+def read_urls(args):
+    urls = list(args.urls)
+    if args.input:
+        stream = sys.stdin if args.input == '-' else open(args.input, encoding='utf-8')
+        with stream:
+            urls.extend(line.strip() for line in stream if line.strip() and not line.lstrip().startswith('#'))
+    return urls
+
+
+def resolve_options(args):
+    """合并命令行参数与配置文件，命令行优先
+    """
+    settings = load_settings(args.config)
+    cli_settings = load_section('CLI', args.config)
+
+    def pick(value, key, default=None):
+        if value is not None:
+            return value
+        return cli_settings.get(key) or default
+
+    download_type = pick(args.type, 'download_type', DOWNLOAD_ALL)
+    download_type = TYPE_ALIASES.get(download_type, download_type)
+    if download_type not in DOWNLOAD_TYPES:
+        raise ValueError(f"未知的下载类型: {download_type}")
+
+    downloader = pick(args.downloader, 'downloader', settings['downloader'])
+    if downloader not in DOWNLOADER_NAMES:
+        raise ValueError(f"未知的下载器: {downloader}")
+
+    threads = str(pick(args.threads, 'thread_count', 4))
+    audio_quality = pick(args.audio_quality, 'audio_quality', "最高质量")
+    video_quality = pick(args.video_quality, 'video_quality', "最高质量")
+    return {
+        'ytdlp_path': pick(args.ytdlp, 'ytdlp_path', settings['ytdlp_path']),
+        'engine': pick(args.engine, 'engine', settings['engine']),
+        'check_certificate': not args.no_check_certificate and settings['check_certificate'],
+        'jobs': max(1, int(pick(args.jobs, 'jobs', 3))),
+        'bandwidth_limit': int(pick(args.limit_total, 'bandwidth_limit', settings['bandwidth_limit'])),
+        'bandwidth_profiles': settings['bandwidth_profiles'],
+        'bandwidth_mode': settings['bandwidth_mode'],
+        'metrics_dir': pick(args.metrics_dir, 'metrics_dir', settings['metrics_dir']),
+        'postprocess_pool': settings['postprocess_pool'],
+        'postprocess_workers': settings['postprocess_workers'],
+        'ffmpeg_location': settings['ffmpeg_location'],
+        'staging_dir': pick(args.staging_dir, 'staging_dir', settings['staging_dir']),
+        'cookie_files': settings['cookie_files'],
+        'proxies': args.proxy or settings['proxies'],
+        'proxy_strategy': settings['proxy_strategy'],
+        'proxy_check_url': settings['proxy_check_url'],
+        'aria2c_location': settings['aria2c_location'],
+        'aria2c_connections': settings['aria2c_connections'],
+        'aria2c_split_mb': settings['aria2c_split_mb'],
+        'analysis_workers': settings['analysis_workers'],
+        'task': {
+            'download_type': download_type,
+            'output_path': pick(args.output, 'output_path', settings['output_path']),
+            'cookie_path': pick(args.cookies, 'cookie_file'),
+            'audio_quality': QUALITY_ALIASES.get(audio_quality, audio_quality),
+            'video_quality': QUALITY_ALIASES.get(video_quality, video_quality),
+            'thread_count': AUTO_FRAGMENTS if threads == 'auto' else int(threads),
+            'use_archive': not args.no_archive and cli_settings.get('use_archive', 'true').lower() == 'true',
+            'downloader': downloader,
+        },
+    }
+
+
+class Console:
+    """多个任务同时输出时按行加锁，并为每行加上任务序号
+    """
+
+    def __init__(self, total, quiet=False):
+        self.total = total
+        self.quiet = quiet
+        self._lock = threading.Lock()
+
+    def write(self, index, message, force=False):
+        if self.quiet and not force and not message.startswith('ERROR'):
+            return
+        with self._lock:
+            print(f"[{index}/{self.total}] {message}", flush=True)
+
+
+def resolve_cookie(cookie_path, url, console, index):
+    """自动选择时按链接的域名查找cookie文件，并输出过期或与链接不匹配的提示
+    """
+    if not cookie_path:
+        return None
+    resolved = cookie_registry.resolve(cookie_path, url)
+    if resolved is None:
+        console.write(index, "没有与链接匹配的Cookie文件，不使用Cookie", force=True)
+        return None
+    for warning in cookie_registry.check(resolved, url):
+        console.write(index, warning.message, force=True)
+    return resolved
+
+
+def check_urls(urls, engine, cookie_path, console):
+    """在分析池中并发分析全部链接，按完成顺序输出结果，返回失败的数量
+    """
+    tickets = [analysis_pool.submit(engine, url, resolve_cookie(cookie_path, url, console, index))
+               for index, url in enumerate(urls, 1)]
+    # 重复的链接共用同一次分析
+    indexes = {}
+    for index, ticket in enumerate(tickets, 1):
+        indexes.setdefault(ticket.future, []).append(index)
+    failed = 0
+    try:
+        for future in as_completed(indexes):
+            for index in indexes[future]:
+                ticket = tickets[index - 1]
+                try:
+                    video_info, _ = ticket.wait()
+                    console.write(index, f"可下载: {ticket.url} {video_info.get('title', '')}", force=True)
+                except AnalysisError as e:
+                    failed += 1
+                    console.write(index, f"失败: {ticket.url} {e}", force=True)
+    finally:
+        for ticket in tickets:
+            ticket.cancel()
+    return failed
+
+
+def sync_subscriptions(store, engine, max_workers, use_archive):
+    """并发同步到期的订阅，返回 [(订阅, SyncResult)]；同步失败的订阅直接记录结果
+    """
+    due = store.due()
+    if not due:
+        print("没有到期的订阅", flush=True)
+        return []
+    known_ids = DownloadArchive().known_ids() if use_archive else None
+    synced = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(sync_subscription, engine, sub, cookie_registry.select(sub.url), known_ids): sub
+                   for sub in due}
+        for future in as_completed(futures):
+            sub = futures[future]
+            try:
+                result = future.result()
+            except SubscriptionError as e:
+                store.record_sync(sub.sub_id, None, str(e))
+                print(f"订阅同步失败: {sub.title or sub.url} {e}", flush=True)
+                continue
+            print(f"订阅 {result.title or sub.title or sub.url}: 新视频 {len(result.entries)} 个", flush=True)
+            synced.append((sub, result))
+    return synced
+
+
+class DownloadSlot:
+    """一个任务占用的名额：active_slots 限制下载与等待后处理的任务总数，download_slots 限制同时下载的任务数；
+    等待后处理时只归还下载名额，等待站点退避或重试间隔时全部归还
+    """
+
+    def __init__(self, download_slots, active_slots):
+        self._semaphores = (active_slots, download_slots)
+        self._held = []
+
+    def acquire(self, should_stop=lambda: False):
+        """等待取得名额，取消时返回False
+        """
+        for semaphore in self._semaphores:
+            while not semaphore.acquire(timeout=0.5):
+                if should_stop():
+                    self.release()
+                    return False
+            self._held.append(semaphore)
+        return True
+
+    def release_download(self):
+        if self._semaphores[1] in self._held:
+            self._held.remove(self._semaphores[1])
+            self._semaphores[1].release()
+
+    def release(self):
+        while self._held:
+            self._held.pop().release()
+
+
+def run_task(task, index, console, download_slots, active_slots):
+    """执行一个任务；下载阶段占用 download_slots 中的一个名额，等待后处理时提前归还；
+    等待站点退避或重试间隔时 active_slots 的名额也一并归还
+    """
+    last_report = [0.0]
+    slot = DownloadSlot(download_slots, active_slots)
+
+    def on_progress(progress):
+        now = time.monotonic()
+        if now - last_report[0] >= PROGRESS_INTERVAL or progress.percent >= 100:
+            last_report[0] = now
+            console.write(index, describe_progress(progress))
+
+    # 站点正在退避时先不占用名额，让其他站点的任务先下载
+    while not host_throttle.ready(host_key(task.url)) and not task.stopped:
+        time.sleep(1.0)
+    if not slot.acquire(lambda: task.stopped):
+        return False
+    console.write(index, f"开始下载 {task.url}", force=True)
+    try:
+        success, message = task.run(lambda line: console.write(index, line), on_progress, slot.release_download, slot)
+    except Exception as e:
+        success, message = False, f"下载出错: {str(e)}"
+    finally:
+        slot.release()
+    console.write(index, f"{'完成' if success else '失败'}: {task.url} {message}", force=True)
+    return success
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        urls = read_urls(args)
+        options = resolve_options(args)
+    except (OSError, ValueError) as e:
+        print(f"错误: {e}", file=sys.stderr)
+        return 2
+    if not urls and not args.sync:
+        print("错误: 请指定要下载的链接", file=sys.stderr)
+        return 2
+
+    engine = create_engine(options['engine'], options['ytdlp_path'], options['check_certificate'])
+    if not engine.available():
+        print("错误: 找不到 yt-dlp，请在 config.ini 中设置 ytdlp_path 或使用 --ytdlp 指定", file=sys.stderr)
+        return 2
+    cookie_registry.set_files(options['cookie_files'])
+    # 分析与下载都经过代理池
+    proxy_pool.configure(options['proxies'], options['proxy_strategy'], options['proxy_check_url'])
+    if args.check:
+        console = Console(len(urls), args.quiet)
+        analysis_pool.configure(options['analysis_workers'])
+        try:
+            failed = check_urls(urls, engine, options['task']['cookie_path'], console)
+        except KeyboardInterrupt:
+            print("已取消", file=sys.stderr)
+            return 130
+        print(f"分析结束: 可下载 {len(urls) - failed} 个，失败 {failed} 个")
+        return 1 if failed else 0
+    if not options['task']['output_path']:
+        print("错误: 请在 config.ini 中设置 output_path 或使用 -o 指定输出目录", file=sys.stderr)
+        return 2
+
+    postprocess_pool.configure(options['postprocess_workers'], options['ffmpeg_location'],
+                               options['postprocess_pool'])
+    space_guard.configure(options['staging_dir'])
+    aria2c.configure(options['aria2c_location'], options['aria2c_connections'], options['aria2c_split_mb'])
+    # 与图形界面相同，同时运行的任务共享带宽上限
+    bandwidth_scheduler.configure(options['bandwidth_limit'] * 1024, options['bandwidth_profiles'],
+                                  options['bandwidth_mode'])
+    # 指定目录时定期导出指标，结束时再导出一次
+    exporter = None
+    if options['metrics_dir']:
+        exporter = MetricsExporter(metrics_registry, options['metrics_dir'])
+        exporter.start()
+    # 订阅的新视频与命令行指定的链接一起下载，每项为 (链接, 订阅ID, 覆盖的下载参数)
+    downloads = [(url, None, {}) for url in urls]
+    synced = []
+    if args.sync:
+        store = SubscriptionStore()
+        synced = sync_subscriptions(store, engine, options['analysis_workers'], options['task']['use_archive'])
+        for sub, result in synced:
+            overrides = {'download_type': sub.download_type, 'cookie_path': cookie_registry.select(sub.url)}
+            downloads.extend((entry['url'], sub.sub_id, overrides) for entry in result.entries)
+    console = Console(len(downloads), args.quiet)
+    tasks = []
+    for index, (url, _, overrides) in enumerate(downloads, 1):
+        task_options = dict(options['task'], **overrides)
+        if 'cookie_path' not in overrides:
+            task_options['cookie_path'] = resolve_cookie(options['task']['cookie_path'], url, console, index)
+        tasks.append(DownloadTask(options['ytdlp_path'], url, engine=engine, **task_options))
+    # 同时下载 jobs 个任务；等待后处理的任务另占名额，最多与后处理池的并发数相同，
+    # 后处理跟不上时下载自然放慢，不会堆积大量未处理的文件
+    download_slots = threading.Semaphore(options['jobs'])
+    active_slots = threading.Semaphore(options['jobs'] + postprocess_pool.workers())
+    executor = ThreadPoolExecutor(max_workers=max(1, min(len(tasks), MAX_TASK_THREADS)))
+    futures = [executor.submit(run_task, task, index, console, download_slots, active_slots)
+               for index, task in enumerate(tasks, 1)]
+    try:
+        results = [future.result() for future in futures]
+    except KeyboardInterrupt:
+        # 停止全部任务，尚未开始的任务会直接返回
+        for task in tasks:
+            task.stop()
+        executor.shutdown(wait=True)
+        print("已取消", file=sys.stderr)
+        return 130
+    finally:
+        if exporter:
+            exporter.stop()
+    executor.shutdown()
+
+    # 订阅的新视频全部下载成功后才更新水位，否则下次同步时重新枚举（已下载的由存档跳过）
+    for sub, result in synced:
+        sub_failed = sum(1 for (_, sub_id, _), success in zip(downloads, results)
+                         if sub_id == sub.sub_id and not success)
+        if sub_failed:
+            store.record_sync(sub.sub_id, None, f"{sub_failed} 个新视频下载失败")
+        else:
+            store.record_sync(sub.sub_id, result, f"新视频 {len(result.entries)} 个")
+
+    failed = results.count(False)
+    print(f"全部结束: 成功 {len(results) - failed} 个，失败 {failed} 个")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
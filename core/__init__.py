@@ -0,0 +1,2 @@
+import sys
+sys.dont_write_bytecode = True
\ No newline at end of file
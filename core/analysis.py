@@ -0,0 +1,222 @@
+"""视频分析：执行 yt-dlp --dump-json，并在有界线程池中并发分析多个链接，不依赖 Qt
+
+同一链接（使用同一 cookie 文件）正在分析时，再次请求直接共用进行中的那一次，不会重复启动 yt-dlp；
+所有共用者都取消后才结束 yt-dlp。
+"""
+import os
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, CancelledError
+
+from core.analysis_cache import normalize_url
+from core.errors import ErrorClassifier
+from core.metrics import KIND_ANALYZE, RESULT_CANCELLED, RESULT_FAILED, RESULT_SUCCESS, registry
+from core.proxies import pool as proxy_pool
+
+# 同时运行的分析数
+DEFAULT_WORKERS = 4
+
+
+class AnalysisError(Exception):
+    """分析失败，消息可直接显示给用户
+    """
+
+
+def analyze_video(engine, url, cookie_path=None, cache=None, force_refresh=False, on_run=None, stop_event=None):
+    """分析单个视频，返回 (视频信息, 是否来自缓存)，失败时抛出 AnalysisError
+
+    on_run 在 yt-dlp 启动后以运行对象调用，用于中途结束；结束后 stop_event 已设置时视为取消。
+    配置了代理池时通过其中的一个代理分析。
+    """
+    metrics = registry.start(KIND_ANALYZE, url)
+    result = RESULT_FAILED
+    lease = None
+    errors = ErrorClassifier()
+    try:
+        # 优先使用缓存的分析结果
+        if cache and not force_refresh:
+            video_info = cache.get(url, cookie_path)
+            if video_info is not None:
+                metrics.cached = True
+                result = RESULT_SUCCESS
+                return video_info, True
+
+        # 构建yt-dlp参数获取视频信息（单视频分析不展开播放列表）
+        args = [url, '--dump-json', '--no-playlist']
+        if cookie_path and os.path.exists(cookie_path):
+            args.extend(['--cookies', cookie_path])
+        lease = proxy_pool.acquire()
+        if lease:
+            args.extend(['--proxy', lease.url])
+
+        # 执行并收集输出
+        output = []
+
+        def on_line(line):
+            metrics.on_line(line)
+            errors.feed(line)
+            output.append(line)
+
+        metrics.process_started()
+        run = engine.start(args, on_line)
+        if on_run:
+            on_run(run)
+        returncode = run.wait()
+        if stop_event is not None and stop_event.is_set():
+            result = RESULT_CANCELLED
+            raise AnalysisError("分析已取消")
+        if returncode != 0:
+            raise AnalysisError(errors.describe(f"分析失败，返回码: {returncode}"))
+
+        # 解析JSON输出，跳过混在输出中的警告信息
+        json_line = next((line for line in output if line.startswith('{')), '\n'.join(output))
+        try:
+            video_info = json.loads(json_line)
+        except ValueError as e:
+            raise AnalysisError(f"分析出错: {str(e)}")
+        if cache:
+            cache.put(url, video_info, cookie_path)
+        result = RESULT_SUCCESS
+        return video_info, False
+    finally:
+        if lease:
+            success = result == RESULT_SUCCESS
+            lease.release(success, None, None if success or result == RESULT_CANCELLED else errors.category())
+        metrics.finish(result)
+
+
+class _SharedAnalysis:
+    """一次进行中的分析，可被多个 AnalysisTicket 共用
+    """
+
+    def __init__(self, key, force_refresh=False):
+        self.key = key
+        # 强制刷新的分析不读缓存，普通请求可以共用，反之不行
+        self.force_refresh = force_refresh
+        self.future = None
+        self.tickets = 0
+        self.stop_event = threading.Event()
+        self._run = None
+        self._lock = threading.Lock()
+
+    def set_run(self, run):
+        with self._lock:
+            self._run = run
+        if self.stop_event.is_set():
+            run.stop()
+
+    def cancel(self):
+        with self._lock:
+            self.stop_event.set()
+            run = self._run
+        self.future.cancel()
+        if run is not None:
+            run.stop()
+
+
+class AnalysisTicket:
+    """调用方持有的分析请求，cancel 只撤销自己的一份
+    """
+
+    def __init__(self, pool, shared, url):
+        self.url = url
+        self.shared = shared
+        self.future = shared.future
+        self._pool = pool
+        self._released = False
+
+    def wait(self):
+        """等待结束，返回 (视频信息, 是否来自缓存)，失败时抛出 AnalysisError
+        """
+        try:
+            return self.future.result()
+        except CancelledError:
+            raise AnalysisError("分析已取消")
+        except AnalysisError:
+            raise
+        except Exception as e:
+            raise AnalysisError(f"分析出错: {str(e)}")
+
+    def cancel(self):
+        self._pool.release(self, cancel=True)
+
+    def release(self):
+        """不再需要结果时调用；已结束的请求不受影响
+        """
+        self._pool.release(self)
+
+
+class AnalysisPool:
+    """线程安全的分析池，最多同时运行 max_workers 个 yt-dlp
+    """
+
+    def __init__(self, max_workers=DEFAULT_WORKERS):
+        self.max_workers = max_workers
+        self._executor = None
+        self._executor_size = None
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def configure(self, max_workers=DEFAULT_WORKERS):
+        with self._lock:
+            self.max_workers = max(1, max_workers)
+
+    @staticmethod
+    def _key(url, cookie_path):
+        return normalize_url(url), os.path.abspath(cookie_path) if cookie_path else ''
+
+    def submit(self, engine, url, cookie_path=None, cache=None, force_refresh=False):
+        """提交分析，相同链接正在分析时共用那一次（强制刷新不共用可能来自缓存的那一次），返回 AnalysisTicket
+        """
+        key = self._key(url, cookie_path)
+        with self._lock:
+            shared = self._inflight.get(key)
+            created = shared is None or (force_refresh and not shared.force_refresh)
+            if created:
+                shared = _SharedAnalysis(key, force_refresh)
+                self._inflight[key] = shared
+                shared.future = self._get_executor().submit(
+                    analyze_video, engine, url, cookie_path, cache, force_refresh, shared.set_run, shared.stop_event)
+            shared.tickets += 1
+        if created:
+            # 已结束的 future 会立即在当前线程调用回调，因此在锁外添加
+            shared.future.add_done_callback(lambda _: self._finished(shared))
+        return AnalysisTicket(self, shared, url)
+
+    def _get_executor(self):
+        if self._executor is None or self._executor_size != self.max_workers:
+            # 调整并发数后新请求使用新的线程池，旧线程池处理完已提交的请求后退出
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='analysis')
+            self._executor_size = self.max_workers
+        return self._executor
+
+    def _finished(self, shared):
+        with self._lock:
+            if self._inflight.get(shared.key) is shared:
+                del self._inflight[shared.key]
+
+    def release(self, ticket, cancel=False):
+        """撤销一份请求；cancel 为True且没有其他共用者时结束正在运行的分析
+        """
+        with self._lock:
+            if ticket._released:
+                return
+            ticket._released = True
+            shared = ticket.shared
+            shared.tickets -= 1
+            stop = cancel and shared.tickets == 0 and not shared.future.done()
+            if stop and self._inflight.get(shared.key) is shared:
+                # 之后的同一链接请求重新分析，不再共用已取消的那一次
+                del self._inflight[shared.key]
+        if stop:
+            shared.cancel()
+
+    def inflight_count(self):
+        with self._lock:
+            return len(self._inflight)
+
+
+# 进程内共用的分析池
+pool = AnalysisPool()
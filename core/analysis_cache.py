@@ -0,0 +1,114 @@
+"""分析结果缓存，按规范化URL与Cookie身份存储 yt-dlp --dump-json 的结果
+"""
+import os
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import threading
+from contextlib import closing
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from core.paths import data_path
+
+# 规范化URL时丢弃的跟踪参数
+_TRACKING_PARAMS = ('utm_source', 'utm_medium', 'utm_campaign', 'utm_term', 'utm_content',
+                    'si', 'feature', 'spm_id_from', 'vd_source', 'share_source')
+# 界面用不到且体积很大的字段，缓存前剔除
+_DROP_KEYS = ('automatic_captions', 'subtitles', 'thumbnails', 'heatmap', 'requested_subtitles')
+
+
+def normalize_url(url):
+    """规范化URL：小写协议与域名，去掉片段、跟踪参数和末尾斜杠，并对查询参数排序
+    """
+    parts = urlsplit(url.strip())
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+             if k.lower() not in _TRACKING_PARAMS]
+    query.sort()
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(query), ''))
+
+
+def cookie_identity(cookie_path):
+    """Cookie文件的身份标识，文件内容更新后标识随之变化
+    """
+    if not cookie_path or not os.path.exists(cookie_path):
+        return ''
+    stat = os.stat(cookie_path)
+    return f"{os.path.abspath(cookie_path)}:{stat.st_size}:{int(stat.st_mtime)}"
+
+
+class AnalysisCache:
+    """基于SQLite的磁盘缓存，支持TTL过期和按总大小的LRU淘汰
+    """
+
+    def __init__(self, db_path=None, ttl=24 * 3600, max_bytes=64 * 1024 * 1024):
+        self.db_path = db_path or data_path('analysis_cache.db')
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS analysis ("
+                "key TEXT PRIMARY KEY, url TEXT, created REAL, accessed REAL, size INTEGER, payload BLOB)")
+            conn.execute("CREATE INDEX IF NOT EXISTS analysis_accessed ON analysis (accessed)")
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    @staticmethod
+    def make_key(url, cookie_path=None, kind='video'):
+        """缓存键；kind 区分单视频信息与播放列表条目两类结果
+        """
+        raw = f"{kind}\n{normalize_url(url)}\n{cookie_identity(cookie_path)}"
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def get(self, url, cookie_path=None, kind='video'):
+        """读取缓存，未命中或已过期时返回None
+        """
+        key = self.make_key(url, cookie_path, kind)
+        now = time.time()
+        with self._lock, closing(self._connect()) as conn, conn:
+            row = conn.execute("SELECT created, payload FROM analysis WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            created, payload = row
+            if self.ttl and now - created > self.ttl:
+                conn.execute("DELETE FROM analysis WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE analysis SET accessed = ? WHERE key = ?", (now, key))
+        return json.loads(zlib.decompress(payload).decode('utf-8'))
+
+    def put(self, url, info, cookie_path=None, kind='video'):
+        """写入缓存并按容量淘汰最久未使用的条目
+        """
+        info = {k: v for k, v in info.items() if k not in _DROP_KEYS}
+        payload = zlib.compress(json.dumps(info, ensure_ascii=False).encode('utf-8'))
+        key = self.make_key(url, cookie_path, kind)
+        now = time.time()
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO analysis (key, url, created, accessed, size, payload) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, normalize_url(url), now, now, len(payload), payload))
+            if self.ttl:
+                conn.execute("DELETE FROM analysis WHERE created < ?", (now - self.ttl,))
+            self._evict(conn)
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM analysis").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in conn.execute("SELECT key, size FROM analysis ORDER BY accessed").fetchall():
+            conn.execute("DELETE FROM analysis WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def invalidate(self, url, cookie_path=None, kind='video'):
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM analysis WHERE key = ?", (self.make_key(url, cookie_path, kind),))
+
+    def clear(self):
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM analysis")
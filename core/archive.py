@@ -0,0 +1,94 @@
+"""本地下载存档：记录已下载的视频，重复同步播放列表时跳过
+
+以 (提取器, 视频ID) 为键保存输出路径、格式与大小，并可与 yt-dlp
+--download-archive 使用的文本格式（每行 "提取器 视频ID"）互相导入导出。
+"""
+import time
+import sqlite3
+import threading
+from contextlib import closing
+
+from core.paths import data_path
+
+
+class DownloadArchive:
+    """基于SQLite的下载存档
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or data_path('download_archive.db')
+        self._lock = threading.Lock()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS archive ("
+                "extractor TEXT, video_id TEXT, url TEXT, path TEXT, format_id TEXT, filesize INTEGER, "
+                "completed REAL, PRIMARY KEY (extractor, video_id))")
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    def contains(self, extractor, video_id):
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT 1 FROM archive WHERE extractor = ? AND video_id = ?",
+                               (extractor.lower(), video_id)).fetchone()
+        return row is not None
+
+    def known_ids(self, extractor=None):
+        """返回已下载的 (提取器, 视频ID) 集合，便于批量判断
+        """
+        with closing(self._connect()) as conn:
+            if extractor:
+                rows = conn.execute("SELECT extractor, video_id FROM archive WHERE extractor = ?",
+                                    (extractor.lower(),))
+            else:
+                rows = conn.execute("SELECT extractor, video_id FROM archive")
+            return set(rows.fetchall())
+
+    def add(self, extractor, video_id, url=None, path=None, format_id=None, filesize=None):
+        self.add_many([(extractor, video_id, url, path, format_id, filesize)])
+
+    def add_many(self, records):
+        """批量写入 (提取器, 视频ID, URL, 路径, 格式, 大小) 记录
+        """
+        now = time.time()
+        rows = [(extractor.lower(), video_id, url, path, format_id, filesize, now)
+                for extractor, video_id, url, path, format_id, filesize in records]
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO archive (extractor, video_id, url, path, format_id, filesize, completed) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def add_manifest(self, entries):
+        """记录下载完成清单中的文件
+        """
+        self.add_many([(entry.extractor, entry.video_id, entry.url, entry.filepath, entry.format_id, entry.filesize)
+                       for entry in entries if entry.extractor and entry.video_id])
+
+    def count(self):
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT COUNT(*) FROM archive").fetchone()[0]
+
+    def import_file(self, path):
+        """导入 yt-dlp 存档文件，返回导入的条目数
+        """
+        records = []
+        with open(path, encoding='utf-8', errors='ignore') as f:
+            for line in f:
+                parts = line.strip().split(None, 1)
+                if len(parts) == 2:
+                    records.append((parts[0], parts[1], None, None, None, None))
+        with self._lock, closing(self._connect()) as conn, conn:
+            # 已有记录保留其路径等信息
+            conn.executemany(
+                "INSERT OR IGNORE INTO archive (extractor, video_id, completed) VALUES (?, ?, ?)",
+                [(extractor.lower(), video_id, time.time()) for extractor, video_id, *_ in records])
+        return len(records)
+
+    def export_file(self, path):
+        """导出为 yt-dlp 存档文件，返回导出的条目数
+        """
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT extractor, video_id FROM archive ORDER BY completed").fetchall()
+        with open(path, 'w', encoding='utf-8') as f:
+            f.writelines(f"{extractor} {video_id}\n" for extractor, video_id in rows)
+        return len(rows)
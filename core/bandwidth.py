@@ -0,0 +1,185 @@
+"""全局带宽调度：所有正在运行的下载共享一个总带宽上限，任务开始、结束时重新分配
+
+总上限可以按时间段设置（例如工作时间限速、夜间不限速）。分配采用最大最小公平：
+实际速度用不满份额的任务只分到它需要的带宽，剩余部分按权重分给其他任务。
+
+调度器只决定份额，由各任务注册的 setter 负责生效（见 DownloadTask._set_rate_limit）：
+进程内引擎直接修改 YoutubeDL 的 ratelimit 参数；可执行文件引擎在份额变化较大时
+以新的 --limit-rate 重新启动 yt-dlp 并续传 .part 文件。
+"""
+import re
+import time
+import threading
+
+MODE_FAIR = 'fair'
+MODE_PRIORITY = 'priority'
+MODE_NAMES = {
+    MODE_FAIR: "平均分配",
+    MODE_PRIORITY: "按优先级分配",
+}
+# 按优先级分配时的权重：当前页面中的下载（用户正在等待）高于队列任务
+PRIORITY_NORMAL = 1
+PRIORITY_HIGH = 2
+# 每个任务至少分到的带宽（字节/秒）；任务很多时降为总上限的平均值，各任务的份额之和不超过总上限
+MIN_RATE = 32 * 1024
+# 按实际速度重新分配的最短间隔（秒）
+REBALANCE_INTERVAL = 3.0
+# 实际速度达到份额的该比例时视为用满，否则只分配实际速度乘以 HEADROOM
+SATURATION = 0.8
+HEADROOM = 1.25
+# 份额变化小于该比例时不调整
+MIN_CHANGE = 0.05
+
+_PROFILE_RE = re.compile(r'^\s*(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})\s+(\d+)\s*$')
+
+
+def parse_profiles(text):
+    """解析时间段限速，每行"开始-结束 限速(KB/s)"，如"09:00-18:00 512"，0 表示该时段不限速
+
+    返回 [(开始分钟, 结束分钟, 字节/秒)]，格式错误的行被忽略。
+    """
+    profiles = []
+    for line in (text or '').splitlines():
+        match = _PROFILE_RE.match(line)
+        if match:
+            start_h, start_m, end_h, end_m, limit = (int(value) for value in match.groups())
+            profiles.append((start_h * 60 + start_m, end_h * 60 + end_m, limit * 1024))
+    return profiles
+
+
+def limit_at(default_limit, profiles, when=None):
+    """当前时间的总带宽上限（字节/秒），0 表示不限速；第一个匹配的时间段生效，支持跨零点
+    """
+    now = time.localtime(when)
+    minute = now.tm_hour * 60 + now.tm_min
+    for start, end, limit in profiles:
+        inside = start <= minute < end if start <= end else (minute >= start or minute < end)
+        if inside:
+            return limit
+    return default_limit
+
+
+class _Slot:
+    """一个正在运行的下载在调度器中的记录
+    """
+
+    def __init__(self, priority, setter):
+        self.priority = priority
+        # setter(rate) 调整限速，返回是否已生效；暂时无法调整时返回False，下次重新分配时再试
+        self.setter = setter
+        self.limit = None
+        self.speed = None
+
+    def demand(self):
+        """需要的带宽，None 表示能用满分到的任何带宽
+        """
+        if self.speed is None or (self.limit and self.speed >= self.limit * SATURATION):
+            return None
+        return self.speed * HEADROOM
+
+
+class BandwidthScheduler:
+    """线程安全的全局带宽调度器
+    """
+
+    def __init__(self):
+        self.default_limit = 0
+        self.profiles = []
+        self.mode = MODE_FAIR
+        self._slots = {}
+        self._lock = threading.Lock()
+        self._last_rebalance = 0.0
+
+    def configure(self, limit=0, profiles_text='', mode=MODE_FAIR):
+        """limit 为默认总上限（字节/秒），profiles_text 为时间段限速（见 parse_profiles）
+        """
+        with self._lock:
+            self.default_limit = limit
+            self.profiles = parse_profiles(profiles_text)
+            self.mode = mode
+            self._rebalance_locked()
+
+    def budget(self):
+        return limit_at(self.default_limit, self.profiles)
+
+    def register(self, key, priority, setter):
+        """任务开始时调用，返回分到的限速（字节/秒，0 表示不限速），之后的调整通过 setter 生效
+        """
+        with self._lock:
+            self._slots[key] = _Slot(priority, setter)
+            self._rebalance_locked()
+            return self._slots[key].limit or 0
+
+    def unregister(self, key):
+        with self._lock:
+            if self._slots.pop(key, None) is not None:
+                self._rebalance_locked()
+
+    def report(self, key, speed):
+        """报告任务的实际速度（字节/秒），暂停时为0，刚继续时为None；到达间隔后重新分配
+        """
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is None:
+                return
+            # 暂停与继续时立即重新分配
+            paused_changed = (speed == 0) != (slot.speed == 0)
+            slot.speed = speed
+            if paused_changed or time.monotonic() - self._last_rebalance >= REBALANCE_INTERVAL:
+                self._rebalance_locked()
+
+    def rates(self):
+        """返回 (所有任务的实际总速度, 当前总上限)，速度单位为字节/秒
+        """
+        with self._lock:
+            return sum(slot.speed or 0 for slot in self._slots.values()), self.budget()
+
+    def _weight(self, slot):
+        return slot.priority if self.mode == MODE_PRIORITY else 1
+
+    def _rebalance_locked(self):
+        self._last_rebalance = time.monotonic()
+        budget = self.budget()
+        slots = list(self._slots.values())
+        if not budget:
+            for slot in slots:
+                if slot.limit != 0:
+                    self._assign(slot, 0)
+            return
+
+        floor = min(MIN_RATE, budget / len(slots)) if slots else 0
+        remaining = budget
+        flexible = slots
+        shares = {}
+        while flexible:
+            unit = remaining / sum(self._weight(slot) for slot in flexible)
+            satisfied = [slot for slot in flexible
+                         if slot.demand() is not None and max(floor, slot.demand()) < unit * self._weight(slot)]
+            if not satisfied:
+                for slot in flexible:
+                    shares[slot] = max(floor, unit * self._weight(slot))
+                break
+            for slot in satisfied:
+                shares[slot] = max(floor, slot.demand())
+                remaining -= shares[slot]
+                flexible.remove(slot)
+        # 低权重的任务抬高到下限后可能超出总上限，按比例压缩超出下限的部分
+        total = sum(shares.values())
+        if total > budget:
+            above = total - floor * len(shares)
+            scale = (budget - floor * len(shares)) / above if above else 0
+            shares = {slot: floor + (share - floor) * scale for slot, share in shares.items()}
+        for slot, share in shares.items():
+            self._assign(slot, max(1, int(share)))
+
+    @staticmethod
+    def _assign(slot, rate):
+        # 只忽略小幅上调；下调总是执行，份额之和不超过总上限
+        if slot.limit and rate and slot.limit <= rate <= slot.limit * (1 + MIN_CHANGE):
+            return
+        if slot.setter(rate):
+            slot.limit = rate
+
+
+# 进程内所有下载共用的调度器
+scheduler = BandwidthScheduler()
@@ -0,0 +1,128 @@
+"""构建 yt-dlp 下载参数，不依赖 Qt，图形界面与命令行共用
+"""
+import os
+
+from core.manifest import manifest_args
+from core.progress import PROGRESS_TEMPLATE
+
+DOWNLOAD_ALL = "全部下载"
+DOWNLOAD_AUDIO = "仅音频"
+DOWNLOAD_VIDEO = "仅视频"
+DOWNLOAD_TYPES = (DOWNLOAD_ALL, DOWNLOAD_AUDIO, DOWNLOAD_VIDEO)
+
+DEFAULT_OUTPUT_TEMPLATE = '%(title)s.%(ext)s'
+# yt-dlp 内部重试（HTTP 请求与分片）前的等待：1 秒起指数增长，最多 60 秒
+RETRY_SLEEP = ['--retry-sleep', 'http:exp=1:60', '--retry-sleep', 'fragment:exp=1:60']
+
+
+def get_format_id(quality, download_type, format_type='video'):
+    """获取格式ID，quality 可以是分析得到的格式字典，也可以是旧的质量名称或格式字符串
+    """
+    if isinstance(quality, dict) and 'format_id' in quality:
+        return quality['format_id']
+    merged = format_type == 'video' and download_type == DOWNLOAD_VIDEO
+    if isinstance(quality, str):
+        # 向后兼容，处理旧的字符串格式
+        if quality == "最高质量":
+            return 'bv*+ba/b' if merged else 'bv*' if format_type == 'video' else 'ba'
+        elif quality == "中等质量":
+            return 'bv*[height<=720]+ba/b' if merged else 'bv*[height<=720]' if format_type == 'video' else 'ba[abr<=128]'
+        elif quality == "低质量":
+            return 'bv*[height<=480]+ba/b' if merged else 'bv*[height<=480]' if format_type == 'video' else 'ba[abr<=64]'
+        else:
+            return quality
+    # 默认值
+    return 'bv*+ba/b' if merged else 'bv*' if format_type == 'video' else 'ba'
+
+
+def format_options(download_type, audio_quality=None, video_quality=None, extract_audio=True, merge=False):
+    """根据下载类型生成格式参数，extract_audio 为False时仅音频只下载、不转换（由后处理池转换），
+    merge 为True时全部下载由 yt-dlp 把视频与音频合并为一个文件（需要 ffmpeg）
+    """
+    if download_type == DOWNLOAD_AUDIO:
+        convert = ['-x', '--audio-format', 'mp3'] if extract_audio else []
+        # 选择了分析得到的具体音频格式时只下载该格式流再转换
+        if isinstance(audio_quality, dict) and 'format_id' in audio_quality:
+            return ['-f', audio_quality['format_id']] + convert
+        return convert if extract_audio else ['-f', 'ba/b']
+    elif download_type == DOWNLOAD_VIDEO:
+        # 使用用户选择的具体视频格式
+        return ['-f', get_format_id(video_quality, download_type)]
+    # 全部下载：视频与音频分别下载，需要合并时用 + 交给 yt-dlp 合并
+    video_format = get_format_id(video_quality, download_type, 'video')
+    audio_format = get_format_id(audio_quality, download_type, 'audio')
+    return ['-f', ('+' if merge else ',').join([video_format, audio_format])]
+
+
+def expected_sizes(audio_quality=None, video_quality=None):
+    """从分析得到的格式信息中获取各格式流的预计大小
+    """
+    sizes = {}
+    for quality in (video_quality, audio_quality):
+        if isinstance(quality, dict) and 'format_id' in quality:
+            size = quality.get('filesize') or quality.get('filesize_approx')
+            if size:
+                sizes[quality['format_id']] = size
+    return sizes
+
+
+def stream_count(download_type, video_quality=None):
+    """预计需要下载的格式流数量
+    """
+    if download_type == DOWNLOAD_AUDIO:
+        return 1
+    if download_type == DOWNLOAD_VIDEO:
+        return 1 if isinstance(video_quality, dict) else 2
+    return 2
+
+
+def build_download_args(url, download_type, output_path, cookie_path=None, audio_quality=None,
+                        video_quality=None, concurrent_fragments=4, extra_params=None,
+                        archive_file=None, manifest_path=None, output_template=DEFAULT_OUTPUT_TEMPLATE,
+                        rate_limit=None, extract_audio=True, proxy=None, downloader_args=None,
+                        merge_ffmpeg=None):
+    """构建yt-dlp下载参数（不含可执行文件路径），rate_limit 为限速（字节/秒），proxy 为代理池分配的代理，
+    downloader_args 为使用外部下载器的参数（见 core.external），
+    merge_ffmpeg 为 yt-dlp 合并全部下载的视频与音频时使用的 ffmpeg，为 None 时分别保存
+    """
+    args = [url]
+
+    # 添加线程数参数
+    args.extend(['--concurrent-fragments', str(concurrent_fragments)])
+    args.extend(downloader_args or [])
+
+    # 设置输出路径
+    if output_path:
+        args.extend(['-o', os.path.join(output_path, output_template)])
+
+    # 根据下载类型设置参数
+    args.extend(format_options(download_type, audio_quality, video_quality, extract_audio, merge_ffmpeg is not None))
+    if merge_ffmpeg:
+        args.extend(['--ffmpeg-location', merge_ffmpeg])
+
+    # 全局带宽调度分到的限速
+    if rate_limit:
+        args.extend(['--limit-rate', str(int(rate_limit))])
+
+    # 添加cookie文件参数
+    if cookie_path and os.path.exists(cookie_path):
+        args.extend(['--cookies', cookie_path])
+
+    if proxy:
+        args.extend(['--proxy', proxy])
+
+    # 添加额外参数（如播放列表的数量、日期筛选）
+    args.extend(extra_params or [])
+
+    # 跳过下载存档中已有的视频，并记录完成的文件
+    if archive_file:
+        args.extend(['--download-archive', archive_file])
+    if manifest_path:
+        args.extend(manifest_args(manifest_path))
+
+    # yt-dlp 内部重试时按指数退避等待，被限流时不立即重复请求
+    args.extend(RETRY_SLEEP)
+
+    # 添加进度钩子，使用结构化进度模板
+    args.extend(['--newline', '--progress-template', PROGRESS_TEMPLATE])
+    return args
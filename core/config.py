@@ -0,0 +1,57 @@
+"""读取 config.ini 中的设置，不依赖 Qt
+"""
+import configparser
+
+from core.analysis import DEFAULT_WORKERS as DEFAULT_ANALYSIS_WORKERS
+from core.bandwidth import MODE_FAIR
+from core.engines import ENGINE_SUBPROCESS
+from core.external import DEFAULT_CONNECTIONS, DEFAULT_SPLIT_MB, DOWNLOADER_NATIVE
+from core.paths import CONFIG_PATH
+from core.proxies import STRATEGY_LEAST_LOADED
+
+
+def read_config(config_path=None):
+    config = configparser.ConfigParser()
+    config.read(config_path or CONFIG_PATH, encoding='utf-8')
+    return config
+
+
+def load_settings(config_path=None):
+    """读取 [Settings] 段，返回与主窗口 config 相同结构的字典
+    """
+    config = read_config(config_path)
+    settings = config['Settings'] if 'Settings' in config else {}
+    cookie_files = settings.get('cookie_files', '')
+    proxies = settings.get('proxies', '')
+    return {
+        'ytdlp_path': settings.get('ytdlp_path', ''),
+        'output_path': settings.get('output_path', ''),
+        'engine': settings.get('engine', ENGINE_SUBPROCESS),
+        'check_certificate': settings.get('check_certificate', 'true').lower() == 'true',
+        'cookie_files': [path for path in cookie_files.split('\n') if path],
+        'cache_ttl_hours': int(settings.get('cache_ttl_hours', 24)),
+        'cache_max_mb': int(settings.get('cache_max_mb', 64)),
+        'analysis_workers': int(settings.get('analysis_workers', DEFAULT_ANALYSIS_WORKERS)),
+        'bandwidth_limit': int(settings.get('bandwidth_limit', 0)),
+        'bandwidth_profiles': settings.get('bandwidth_profiles', '').strip(),
+        'bandwidth_mode': settings.get('bandwidth_mode', MODE_FAIR),
+        'metrics_dir': settings.get('metrics_dir', '').strip(),
+        'postprocess_pool': settings.get('postprocess_pool', 'true').lower() == 'true',
+        'postprocess_workers': int(settings.get('postprocess_workers', 0)),
+        'ffmpeg_location': settings.get('ffmpeg_location', '').strip(),
+        'staging_dir': settings.get('staging_dir', '').strip(),
+        'proxies': [proxy.strip() for proxy in proxies.split('\n') if proxy.strip()],
+        'proxy_strategy': settings.get('proxy_strategy', STRATEGY_LEAST_LOADED),
+        'proxy_check_url': settings.get('proxy_check_url', '').strip(),
+        'downloader': settings.get('downloader', DOWNLOADER_NATIVE),
+        'aria2c_location': settings.get('aria2c_location', '').strip(),
+        'aria2c_connections': int(settings.get('aria2c_connections', DEFAULT_CONNECTIONS)),
+        'aria2c_split_mb': int(settings.get('aria2c_split_mb', DEFAULT_SPLIT_MB)),
+    }
+
+
+def load_section(name, config_path=None):
+    """读取任意一段设置，段不存在时返回空字典
+    """
+    config = read_config(config_path)
+    return dict(config[name]) if name in config else {}
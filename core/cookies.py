@@ -0,0 +1,178 @@
+"""Cookie 文件登记：解析 Netscape 格式的 cookie 文件并按域名与过期时间建立索引，不依赖 Qt
+
+每个文件只在修改时间或大小变化时重新解析。下载前按链接的域名自动选择 cookie 文件，
+并提前发现过期、即将过期或与域名不匹配的 cookie，而不是等到下载失败。
+"""
+import os
+import time
+import threading
+from collections import namedtuple
+from urllib.parse import urlsplit
+
+# 按链接自动选择 cookie 文件（下拉框数据与命令行 --cookies 的取值）
+AUTO_COOKIE = 'auto'
+# cookie 在该时间（秒）内过期时提示
+EXPIRY_WARNING = 24 * 3600
+# Netscape 格式中 HttpOnly cookie 的行前缀
+_HTTPONLY_PREFIX = '#HttpOnly_'
+
+# 一个文件中某个域名的 cookie 汇总；expires 为有效 cookie 的最晚过期时间，0 表示只有会话 cookie 或没有有效 cookie
+DomainCookies = namedtuple('DomainCookies', 'count valid expires')
+CookieMatch = namedtuple('CookieMatch', 'path domain count valid expires')
+# 下载前检查的提示，fatal 表示使用该文件多半会失败
+CookieWarning = namedtuple('CookieWarning', 'fatal message')
+
+
+def parse_cookie_file(path):
+    """解析 Netscape 格式的 cookie 文件，返回 {域名: [过期时间]}，域名去掉开头的点并转为小写，
+    过期时间为0的是会话 cookie
+    """
+    domains = {}
+    with open(path, encoding='utf-8', errors='ignore') as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith(_HTTPONLY_PREFIX):
+                line = line[len(_HTTPONLY_PREFIX):]
+            elif not line or line.startswith('#'):
+                continue
+            fields = line.split('\t')
+            if len(fields) != 7:
+                continue
+            domain = fields[0].lstrip('.').lower()
+            try:
+                expires = int(fields[4] or 0)
+            except ValueError:
+                continue
+            domains.setdefault(domain, []).append(expires)
+    return domains
+
+
+def summarize(expiries, now=None):
+    """按当前时间汇总一个域名的 cookie，会话 cookie 视为有效
+    """
+    now = now or time.time()
+    valid = [expires for expires in expiries if expires == 0 or expires > now]
+    return DomainCookies(len(expiries), len(valid), max(valid, default=0))
+
+
+def domain_matches(host, domain):
+    return host == domain or host.endswith('.' + domain)
+
+
+def _host(url):
+    return (urlsplit(url if '//' in url else '//' + url).hostname or '').lower()
+
+
+class CookieRegistry:
+    """线程安全的 cookie 文件登记，按文件的修改时间与大小缓存解析结果
+    """
+
+    def __init__(self):
+        self.paths = []
+        self._parsed = {}
+        self._lock = threading.Lock()
+
+    def set_files(self, paths):
+        with self._lock:
+            self.paths = [path for path in paths if path]
+            self._parsed = {path: value for path, value in self._parsed.items() if path in self.paths}
+
+    def domains(self, path, now=None):
+        """文件中各域名的 cookie 汇总（{域名: DomainCookies}），文件不存在或无法读取时返回None
+        """
+        with self._lock:
+            domains = self._domains_locked(path)
+        if domains is None:
+            return None
+        return {domain: summarize(expiries, now) for domain, expiries in domains.items()}
+
+    def _domains_locked(self, path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self._parsed.pop(path, None)
+            return None
+        signature = (stat.st_mtime_ns, stat.st_size)
+        cached = self._parsed.get(path)
+        if cached is None or cached[0] != signature:
+            try:
+                cached = (signature, parse_cookie_file(path))
+            except OSError:
+                return None
+            self._parsed[path] = cached
+        return cached[1]
+
+    @staticmethod
+    def _matched(domains, host, now):
+        return [(domain, summarize(expiries, now)) for domain, expiries in domains.items()
+                if domain_matches(host, domain)]
+
+    def matches(self, url, now=None):
+        """返回包含该链接域名 cookie 的文件，有有效 cookie、域名更具体、有效 cookie 多的在前
+        """
+        host = _host(url)
+        if not host:
+            return []
+        result = []
+        with self._lock:
+            for path in self.paths:
+                matched = self._matched(self._domains_locked(path) or {}, host, now)
+                if not matched:
+                    continue
+                domain = max((domain for domain, _ in matched), key=len)
+                result.append(CookieMatch(
+                    path, domain, sum(info.count for _, info in matched), sum(info.valid for _, info in matched),
+                    max(info.expires for _, info in matched)))
+        return sorted(result, key=lambda match: (-bool(match.valid), -len(match.domain), -match.valid))
+
+    def select(self, url):
+        """为链接自动选择 cookie 文件，没有匹配的文件时返回None
+        """
+        matches = self.matches(url)
+        return matches[0].path if matches else None
+
+    def resolve(self, cookie_path, url):
+        """cookie_path 为 AUTO_COOKIE 时按链接选择，其余原样返回
+        """
+        return self.select(url) if cookie_path == AUTO_COOKIE else cookie_path
+
+    def check(self, path, url, now=None):
+        """下载前检查 cookie 文件，返回 CookieWarning 列表（为空表示没有问题）
+        """
+        now = now or time.time()
+        with self._lock:
+            domains = self._domains_locked(path)
+        name = os.path.basename(path)
+        if domains is None:
+            return [CookieWarning(True, f"Cookie文件 {name} 不存在或无法读取")]
+        host = _host(url)
+        matched = [info for _, info in self._matched(domains, host, now)]
+        if not matched:
+            return [CookieWarning(True, f"Cookie文件 {name} 中没有 {host} 的cookie")]
+        if not any(info.valid for info in matched):
+            return [CookieWarning(True, f"Cookie文件 {name} 中 {host} 的cookie已全部过期，请重新导出")]
+        expires = max(info.expires for info in matched)
+        if expires and expires - now < EXPIRY_WARNING:
+            return [CookieWarning(False, f"Cookie文件 {name} 中 {host} 的cookie将于 "
+                                         f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(expires))} 过期")]
+        return []
+
+    def describe(self, path):
+        """用于设置页面显示的文件摘要
+        """
+        domains = self.domains(path)
+        if domains is None:
+            return "文件不存在或无法读取"
+        if not domains:
+            return "没有可用的cookie"
+        valid = [domain for domain, info in domains.items() if info.valid]
+        names = sorted(domains, key=lambda domain: -domains[domain].count)
+        text = f"{len(domains)} 个域名（{', '.join(names[:5])}{' 等' if len(names) > 5 else ''}）"
+        expired = len(domains) - len(valid)
+        if expired:
+            text += f"，其中 {expired} 个已过期"
+        return text
+
+
+# 进程内共用的 cookie 登记
+registry = CookieRegistry()
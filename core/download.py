@@ -0,0 +1,612 @@
+"""单个下载任务的执行流程，不依赖 Qt，图形界面的 DownloadWorker 与命令行共用
+"""
+import os
+import re
+import time
+import hashlib
+import tempfile
+import threading
+
+from core.archive import DownloadArchive
+from core.bandwidth import PRIORITY_NORMAL, scheduler
+from core.command import (DEFAULT_OUTPUT_TEMPLATE, DOWNLOAD_ALL, DOWNLOAD_AUDIO, build_download_args,
+                          expected_sizes, stream_count)
+from core.engines import RETCODE_STOPPED_EARLY, SubprocessEngine
+from core.external import DOWNLOADER_ARIA2C, DOWNLOADER_NATIVE, aria2c
+from core.errors import ERROR_RATE_LIMITED, POLICIES, ErrorClassifier, backoff_delay, throttle as host_throttle
+from core.fragment_tuner import AUTO_FRAGMENTS, DEFAULT_LEVEL, FragmentTuner, ThroughputMeter, host_key
+from core.journal import STATE_CANCELLED, STATE_FAILED, STATE_FINISHED, STATE_RUNNING
+from core.manifest import read_manifest
+from core.metrics import KIND_DOWNLOAD, RESULT_CANCELLED, RESULT_FAILED, RESULT_SUCCESS, registry
+from core.postprocess import merge_output_template, merge_target, pool as postprocess_pool
+from core.proxies import display_proxy, pool as proxy_pool
+from core.progress import AggregateProgress, Aria2cProgressParser, ProgressAggregator, format_bytes
+from core.staging import guard as space_guard, move_tree, volume_of
+
+CANCELLED_MESSAGE = "下载已取消"
+# 进度每增加该百分比写入一次任务日志
+JOURNAL_PROGRESS_STEP = 5
+# 子进程无法在运行中调整限速：带宽份额变化超过该比例、且距上次启动超过 RESTART_INTERVAL 秒时，
+# 以新的 --limit-rate 重新启动 yt-dlp，已下载的部分由 .part 文件续传
+RESTART_CHANGE = 0.5
+RESTART_INTERVAL = 20.0
+# 交给后处理池的步骤
+POSTPROCESS_EXTRACT = 'extract_audio'
+POSTPROCESS_MERGE = 'merge'
+
+
+class DownloadTask:
+    """执行一次下载：准备存档与清单文件、启动引擎、汇总进度并记录完成的文件
+
+    on_line 接收日志行，on_progress 接收 AggregateProgress（每条进度记录都会回调，由调用方自行节流）。
+    传入 journal 时把任务写入任务日志，job_key 为继续已有任务时的日志标识。
+    运行期间的耗时、速度与重试次数记录在 metrics（见 core.metrics）。
+    仅音频的格式转换与全部下载后的合并交给后处理池（见 core.postprocess），下载结束后即可让出名额。
+    设置了暂存目录时在暂存目录中下载与后处理，全部结束后把完成的文件移动到输出目录（见 core.staging）。
+    失败时按输出判断原因，由 core.errors 中的策略决定退避重试、降低站点并发或直接失败。
+    配置了代理池时每次运行 yt-dlp 从中取一个代理（见 core.proxies），重试时优先换一个代理。
+    downloader 为 DOWNLOADER_ARIA2C 时普通文件交给 aria2c 多连接下载，找不到 aria2c 时改用内置下载器。
+    """
+
+    def __init__(self, ytdlp_path, url, download_type, output_path, cookie_path=None,
+                 audio_quality=None, video_quality=None, merge_output=None, thread_count=4,
+                 extra_params=None, engine=None, use_archive=False, output_template=DEFAULT_OUTPUT_TEMPLATE,
+                 journal=None, job_key=None, downloader=DOWNLOADER_NATIVE):
+        self.ytdlp_path = ytdlp_path
+        self.url = url
+        self.download_type = download_type
+        self.output_path = output_path
+        self.cookie_path = cookie_path
+        self.audio_quality = audio_quality
+        self.video_quality = video_quality
+        self.merge_output = merge_output
+        self.thread_count = thread_count
+        # 线程数为 AUTO_FRAGMENTS 时由 FragmentTuner 按站点决定
+        self.concurrent_fragments = DEFAULT_LEVEL if thread_count == AUTO_FRAGMENTS else thread_count
+        self.extra_params = extra_params or []
+        self.engine = engine or SubprocessEngine(ytdlp_path)
+        self.use_archive = use_archive
+        self.output_template = output_template
+        self.downloader = downloader or DOWNLOADER_NATIVE
+        self.stopped = False
+        self.paused = False
+        self._stop_event = threading.Event()
+        self._run = None
+        self._tuner = None
+        self._meter = None
+        self.journal = journal
+        self.job_key = job_key
+        self._journal_progress = 0
+        self._video_ids = set()
+        self._formats = []
+        # 全局带宽调度中的优先级与分到的限速（字节/秒）
+        self.priority = PRIORITY_NORMAL
+        self.rate_limit = None
+        self._restart_requested = False
+        self._started_at = None
+        self._status = None
+        self.metrics = None
+        self._postprocess = None
+        # 不使用后处理池、由 yt-dlp 合并时使用的 ffmpeg
+        self._merge_ffmpeg = None
+        self._postprocess_jobs = []
+        # 后处理任务成功后记录到下载存档的条目
+        self._postprocess_entries = {}
+        self._archive = None
+        self._slot = None
+        self._slot_released = False
+        self._staging_dir = None
+        self._errors = None
+        self._penalized = False
+        self.proxy = None
+        self._speed_total = 0.0
+        self._speed_samples = 0
+        self._downloader_args = None
+        self._aria2c_progress = None
+
+    def options(self):
+        """可以原样传回构造函数的下载参数，写入任务日志用
+        """
+        return {
+            'download_type': self.download_type, 'output_path': self.output_path, 'cookie_path': self.cookie_path,
+            'audio_quality': self.audio_quality, 'video_quality': self.video_quality,
+            'merge_output': self.merge_output, 'thread_count': self.thread_count,
+            'extra_params': self.extra_params, 'use_archive': self.use_archive,
+            'output_template': self.output_template, 'downloader': self.downloader,
+        }
+
+    def stop(self):
+        """停止下载，结束正在运行的yt-dlp
+        """
+        self.stopped = True
+        self.paused = False
+        self._stop_event.set()
+        if self._run:
+            self._run.stop()
+        for job in self._postprocess_jobs:
+            job.cancel()
+
+    def pause(self):
+        """暂停下载（挂起整个 yt-dlp 进程树），不支持或尚未开始时返回False
+        """
+        if self._run is None or self.stopped or self.paused:
+            return False
+        self.paused = self._run.pause()
+        if self.paused:
+            if self._meter:
+                # 暂停期间不计入吞吐量，丢弃当前格式流的测量
+                self._meter.close()
+            # 暂停期间的带宽分给其他任务
+            scheduler.report(self, 0)
+        return self.paused
+
+    def resume(self):
+        if self._run is None or not self.paused:
+            return False
+        self.paused = False
+        scheduler.report(self, None)
+        return self._run.resume()
+
+    def build_args(self, archive_file=None, manifest_path=None):
+        # 进程内引擎在运行中直接设置限速，不放进参数，以免参数不同的任务无法复用 YoutubeDL 实例
+        rate_limit = None if getattr(self.engine, 'live_rate_limit', False) else self.rate_limit
+        output_template = self.output_template
+        if self._postprocess == POSTPROCESS_MERGE:
+            output_template = merge_output_template(output_template)
+        return build_download_args(
+            self.url, self.download_type, self._staging_dir or self.output_path, self.cookie_path, self.audio_quality,
+            self.video_quality, self.concurrent_fragments, self.extra_params, archive_file, manifest_path,
+            output_template, rate_limit, self._postprocess != POSTPROCESS_EXTRACT, self.proxy,
+            self._downloader_args, self._merge_ffmpeg)
+
+    def _postprocess_mode(self):
+        """交给后处理池的步骤；找不到 ffmpeg 或未启用后处理池时返回 None，由 yt-dlp 自己转换或合并
+        """
+        if self.download_type == DOWNLOAD_AUDIO:
+            mode = POSTPROCESS_EXTRACT
+        elif self.download_type == DOWNLOAD_ALL and self.merge_output:
+            mode = POSTPROCESS_MERGE
+        else:
+            return None
+        return mode if postprocess_pool.available() else None
+
+    def _staging_name(self):
+        """暂存子目录名：同一链接、输出目录与下载类型使用同一目录，再次下载时可以续传 .part 文件
+        """
+        key = '\n'.join((self.url, os.path.abspath(self.output_path), self.download_type))
+        return 'job-' + hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+
+    def _space_needs(self):
+        """开始前需要的磁盘空间 {目录: 字节数}，按分析得到的格式大小估算，合并或转换时需要再留一份；
+        第一个目录为下载写入的目录
+        """
+        size = sum(expected_sizes(self.audio_quality, self.video_quality).values())
+        merging = self.download_type == DOWNLOAD_AUDIO or (self.download_type == DOWNLOAD_ALL and self.merge_output)
+        work_size = size * 2 if merging else size
+        if self._staging_dir is None or volume_of(self._staging_dir) == volume_of(self.output_path):
+            # 同一文件系统上移动只是重命名，不需要两份空间
+            return {self._staging_dir or self.output_path: work_size}
+        return {self._staging_dir: work_size, self.output_path: size}
+
+    def run(self, on_line, on_progress, on_postprocess=None, slot=None):
+        """执行下载，返回 (是否成功, 说明)
+
+        下载结束、等待后处理池时调用 on_postprocess()，调用方可以据此开始下一个下载。
+        slot 为调用方的并行名额（有 release() 与 acquire(should_stop) 方法），等待站点退避或重试间隔时归还，
+        等待结束后重新取得，被限流的站点不会占满所有名额。
+        """
+        self._on_line = on_line
+        self._on_progress = on_progress
+        self._slot = slot
+        self._slot_released = False
+        self._postprocess = self._postprocess_mode()
+        self._postprocess_jobs = []
+        self._postprocess_entries = {}
+        self._staging_dir = space_guard.job_dir(self._staging_name())
+        if self.journal:
+            if self.job_key is None:
+                self.job_key = self.journal.add(self.url, self.ytdlp_path, self.options(), STATE_RUNNING)
+            else:
+                self.journal.update(self.job_key, state=STATE_RUNNING)
+        self.metrics = registry.start(KIND_DOWNLOAD, self.url)
+        success = False
+        try:
+            admitted, message = space_guard.admit(self, self._space_needs(), lambda: self.stopped, on_line)
+            if admitted:
+                success, message = self._download_with_retries()
+                if self._postprocess_jobs:
+                    postprocessed, postprocess_message = self._wait_postprocess(on_postprocess)
+                    if success:
+                        success, message = postprocessed, postprocess_message
+                if self._staging_dir and not self.stopped:
+                    moved, move_message = self._move_staged()
+                    if success and not moved:
+                        success, message = moved, move_message
+            elif self.stopped:
+                message = CANCELLED_MESSAGE
+        finally:
+            space_guard.release(self)
+            self.metrics.finish(RESULT_SUCCESS if success else RESULT_CANCELLED if self.stopped else RESULT_FAILED)
+        if self.journal:
+            state = STATE_FINISHED if success else STATE_CANCELLED if self.stopped else STATE_FAILED
+            self.journal.finish(self.job_key, state)
+        return success, message
+
+    def _download_with_retries(self):
+        """按站点限制并发地执行下载，失败时按错误类别的策略退避后重试
+        """
+        host = host_key(self.url)
+        attempt = 0
+        while True:
+            if not host_throttle.acquire(host, lambda: self.stopped, self._on_host_wait):
+                return False, CANCELLED_MESSAGE
+            if not self._reacquire_slot():
+                host_throttle.release(host, False)
+                return False, CANCELLED_MESSAGE
+            lease = proxy_pool.acquire(exclude=self.proxy)
+            self.proxy = lease.url if lease else None
+            if lease:
+                self._on_line(f"使用代理: {display_proxy(lease.url)}")
+            self._errors = ErrorClassifier()
+            self._penalized = False
+            self._speed_total, self._speed_samples = 0.0, 0
+            success = False
+            category = None
+            try:
+                success, message = self._run_download()
+                if not success and not self.stopped:
+                    category = self._errors.category()
+            finally:
+                host_throttle.release(host, success)
+                if lease:
+                    speed = self._speed_total / self._speed_samples if self._speed_samples else None
+                    lease.release(success, speed, category)
+            if success or self.stopped:
+                return success, message
+
+            policy = POLICIES[category]
+            message = self._errors.describe(message)
+            attempt += 1
+            delay = backoff_delay(policy, attempt) if attempt <= policy.retries else policy.base_delay
+            if policy.throttle and not self._penalized:
+                host_throttle.penalize(host, delay, self.concurrent_fragments)
+            if attempt > policy.retries:
+                self.metrics.error = category
+                return False, message
+            self.metrics.retries += 1
+            self._on_line(f"{message}，{delay:.0f} 秒后重试（{attempt}/{policy.retries}）")
+            self._release_slot()
+            if self._stop_event.wait(delay):
+                return False, CANCELLED_MESSAGE
+
+    def _on_host_wait(self, message):
+        self._on_line(message)
+        self._release_slot()
+
+    def _release_slot(self):
+        """开始等待时归还调用方的并行名额
+        """
+        if self._slot is not None and not self._slot_released:
+            self._slot_released = True
+            self._slot.release()
+
+    def _reacquire_slot(self):
+        """等待结束后重新取得并行名额，取消时返回False
+        """
+        if not self._slot_released:
+            return True
+        self._slot_released = False
+        return self._slot.acquire(lambda: self.stopped)
+
+    def _run_download(self):
+        on_line = self._on_line
+        temp_files = []
+        try:
+            archive = self._archive = DownloadArchive() if self.use_archive else None
+            archive_file = manifest_path = None
+            if archive:
+                archive_file = self._temp_file('.txt', temp_files)
+                archive.export_file(archive_file)
+            if archive or self._postprocess:
+                # 完成清单同时用于记录存档与查找需要后处理的文件
+                manifest_path = self._temp_file('.tsv', temp_files)
+
+            if self.thread_count == AUTO_FRAGMENTS:
+                self._tuner = FragmentTuner()
+                self._meter = ThroughputMeter()
+                self.concurrent_fragments = self._tuner.suggest(self.url)
+                on_line(f"自动分片并发: {host_key(self.url)} 使用 {self.concurrent_fragments} 个并发")
+            self._downloader_args = self._aria2c_progress = None
+            if self.downloader == DOWNLOADER_ARIA2C:
+                self._downloader_args = aria2c.args()
+                if self._downloader_args is None:
+                    on_line("找不到 aria2c，改用内置下载器")
+                else:
+                    self._aria2c_progress = Aria2cProgressParser()
+                    on_line(f"使用 aria2c 下载普通文件（{aria2c.describe()}）")
+            # 不使用后处理池时由 yt-dlp 合并，找不到 ffmpeg 时视频与音频分别保存
+            self._merge_ffmpeg = None
+            if self.download_type == DOWNLOAD_ALL and self.merge_output and not self._postprocess:
+                self._merge_ffmpeg = postprocess_pool.ffmpeg()
+                if self._merge_ffmpeg is None:
+                    on_line("找不到 ffmpeg，视频与音频将分别保存，不会合并")
+            fragment_limit = host_throttle.fragment_limit(host_key(self.url))
+            if fragment_limit and self.concurrent_fragments > fragment_limit:
+                self.concurrent_fragments = fragment_limit
+                on_line(f"{host_key(self.url)} 曾被限流，分片并发降为 {fragment_limit}")
+
+            # 加入全局带宽调度，取得初始份额
+            scheduler.register(self, self.priority, self._set_rate_limit)
+            self._aggregator = ProgressAggregator(expected_sizes(self.audio_quality, self.video_quality),
+                                                  stream_count(self.download_type, self.video_quality))
+
+            while True:
+                args = self.build_args(archive_file, manifest_path)
+                command = self.engine.describe(args)
+                if self.proxy:
+                    command = command.replace(self.proxy, display_proxy(self.proxy))
+                on_line(f"执行命令: {command}")
+                if self.stopped:
+                    return False, CANCELLED_MESSAGE
+
+                # 执行并实时解析输出与进度
+                self._restart_requested = False
+                self._status = None
+                self._started_at = time.monotonic()
+                self.metrics.process_started()
+                self._run = self.engine.start(args, self._handle_line, self._handle_record)
+                if self.rate_limit is not None:
+                    self._run.set_rate_limit(self.rate_limit)
+                returncode = self._run.wait()
+                self._started_at = None
+                if not self._restart_requested or self.stopped:
+                    break
+                if self._meter:
+                    # 重启前后的速度不能算作同一次测量
+                    self._meter.close()
+                self.metrics.restarts += 1
+                share = f"{format_bytes(self.rate_limit)}/s" if self.rate_limit else "不限速"
+                on_line(f"带宽份额调整为 {share}，重新启动 yt-dlp 并续传已下载的部分")
+            if self._meter:
+                self._record_throughput(self._meter.close())
+
+            # 即使整体失败，已完成的文件也进行后处理并记录到存档；
+            # 交给后处理池的格式流处理后会被删除，处理成功后再记录处理结果
+            entries = read_manifest(manifest_path) if manifest_path else []
+            if self._postprocess:
+                entries = self._submit_postprocess(entries) if not self.stopped else []
+            self._record_archive(entries)
+
+            if self.stopped:
+                return False, CANCELLED_MESSAGE
+            elif returncode in (0, RETCODE_STOPPED_EARLY):
+                return True, "下载完成!"
+            return False, f"下载失败，返回码: {returncode}"
+        finally:
+            scheduler.unregister(self)
+            for path in temp_files:
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def _final_path(self, path):
+        """暂存目录中的文件移动到输出目录后的路径
+        """
+        if self._staging_dir is None:
+            return path
+        return os.path.join(self.output_path, os.path.relpath(path, self._staging_dir))
+
+    def _move_staged(self):
+        """把暂存目录中完成的文件移动到输出目录，返回 (是否成功, 说明)；
+        未完成的 .part 文件留在暂存目录，再次下载时续传
+        """
+        if not os.path.isdir(self._staging_dir):
+            return True, "下载完成!"
+        try:
+            moved = move_tree(self._staging_dir, self.output_path)
+        except OSError as e:
+            self._on_line(f"移动到输出目录失败: {str(e)}")
+            return False, f"移动到输出目录失败: {str(e)}"
+        if moved:
+            self._on_line(f"已将 {len(moved)} 个文件从暂存目录移动到输出目录")
+        return True, "下载完成!"
+
+    def _record_archive(self, entries):
+        """把完成的文件按移动到输出目录后的路径记录到下载存档
+        """
+        if not self._archive or not entries:
+            return
+        self._archive.add_manifest([entry._replace(filepath=self._final_path(entry.filepath))
+                                    for entry in entries])
+        self._on_line(f"已将 {len(entries)} 个文件记录到下载存档")
+
+    def _add_postprocess_job(self, job, entry):
+        self._postprocess_jobs.append(job)
+        self._postprocess_entries[job] = entry
+
+    def _submit_postprocess(self, entries):
+        """把下载完成的文件交给后处理池，返回不需要后处理、可以直接记录到存档的条目
+        """
+        entries = [entry for entry in entries if os.path.exists(entry.filepath)]
+        finished = []
+        if self._postprocess == POSTPROCESS_EXTRACT:
+            for entry in entries:
+                self._add_postprocess_job(postprocess_pool.extract_audio(entry.filepath), entry)
+        else:
+            streams = {}
+            for entry in entries:
+                streams.setdefault((entry.extractor, entry.video_id), []).append(entry)
+            for parts in streams.values():
+                video, audio = self._merge_pair(parts)
+                if video is not None:
+                    audio_ext = os.path.splitext(audio.filepath)[1].lstrip('.')
+                    self._add_postprocess_job(postprocess_pool.merge(
+                        video.filepath, audio.filepath, merge_target(video.filepath, video.format_id, audio_ext)),
+                        video._replace(format_id=f'{video.format_id}+{audio.format_id}'))
+                else:
+                    # 只有一个格式流（已包含音频）时不需要合并，去掉文件名中的格式ID；
+                    # 无法配对的多个格式流保留原名，避免互相覆盖
+                    for part in parts:
+                        base, ext = os.path.splitext(part.filepath)
+                        suffix = f'.f{part.format_id}'
+                        target = base[:-len(suffix)] + ext
+                        if base.endswith(suffix) and not os.path.exists(target):
+                            os.replace(part.filepath, target)
+                            part = part._replace(filepath=target)
+                        finished.append(part)
+        if self._postprocess_jobs:
+            self._on_line(f"已将 {len(self._postprocess_jobs)} 个后处理任务交给后处理池"
+                          f"（同时运行 {postprocess_pool.workers()} 个 ffmpeg）")
+        return finished
+
+    def _merge_pair(self, parts):
+        """从同一视频的格式流中找出要合并的 (视频, 音频)，找不到时返回 (None, None)
+        """
+        wanted = [quality['format_id'] for quality in (self.video_quality, self.audio_quality)
+                  if isinstance(quality, dict) and 'format_id' in quality]
+        by_format = {part.format_id: part for part in parts}
+        if len(wanted) == 2 and all(format_id in by_format for format_id in wanted):
+            return by_format[wanted[0]], by_format[wanted[1]]
+        # 按编码区分：纯音频流的 vcodec 为 none
+        videos = [part for part in parts if part.vcodec != 'none']
+        audios = [part for part in parts if part.vcodec == 'none']
+        if len(videos) == 1 and len(audios) == 1:
+            return videos[0], audios[0]
+        if len(parts) == 2 and not audios:
+            # 编码未知时按 -f 视频,音频 的顺序，先完成的是视频
+            return parts[0], parts[1]
+        return None, None
+
+    def _wait_postprocess(self, on_postprocess):
+        """下载已结束，通知调用方后等待后处理池处理完交出的文件
+        """
+        if on_postprocess:
+            on_postprocess()
+        self.metrics.postprocess_started()
+        failures = []
+        processed = []
+        for job in self._postprocess_jobs:
+            success, message = job.wait()
+            if success:
+                self._on_line(f"后处理完成: {message}")
+                entry = self._postprocess_entries.get(job)
+                if entry is not None and os.path.exists(job.target):
+                    processed.append(entry._replace(filepath=job.target, filesize=os.path.getsize(job.target)))
+            elif not self.stopped:
+                failures.append(message)
+                self._on_line(f"后处理失败: {', '.join(job.sources)} {message}")
+        self._record_archive(processed)
+        if self.stopped:
+            return False, CANCELLED_MESSAGE
+        if failures:
+            return False, f"后处理失败: {failures[0]}"
+        return True, "下载完成!"
+
+    def _set_rate_limit(self, rate):
+        """带宽调度器调整限速（字节/秒，0 为不限速），返回是否已生效
+        """
+        run = self._run
+        if self._started_at is None or run is None:
+            # 尚未启动或正在重启，下次启动时使用
+            self.rate_limit = rate
+            return True
+        if run.set_rate_limit(rate):
+            self.rate_limit = rate
+            return True
+        if not self._can_restart(rate):
+            return False
+        self.rate_limit = rate
+        self._restart_requested = True
+        run.stop()
+        return True
+
+    def _can_restart(self, rate):
+        """只在正在下载（不在合并等后处理阶段）、未暂停且份额变化较大时重启
+        """
+        if self.stopped or self.paused or self._restart_requested or self._status != 'downloading':
+            return False
+        if time.monotonic() - self._started_at < RESTART_INTERVAL:
+            return False
+        old = self.rate_limit or 0
+        if not old or not rate:
+            return True
+        return abs(rate - old) >= old * RESTART_CHANGE
+
+    @staticmethod
+    def _temp_file(suffix, temp_files):
+        fd, path = tempfile.mkstemp(prefix='ytdlp_tool_', suffix=suffix)
+        os.close(fd)
+        temp_files.append(path)
+        return path
+
+    def _handle_line(self, line):
+        line = line.strip()
+        if not line:
+            return
+        if self._aria2c_progress:
+            # aria2c 的进度与进度模板一样转为进度记录，不写入日志
+            record = self._aria2c_progress.feed(line)
+            if record is not None:
+                self._handle_record(record)
+                return
+        self._on_line(line)
+        self.metrics.on_line(line)
+        if self._errors.feed(line) == ERROR_RATE_LIMITED and not self._penalized:
+            # 下载过程中 yt-dlp 报告限流时立即让同一站点的其他任务退避
+            self._penalized = True
+            policy = POLICIES[ERROR_RATE_LIMITED]
+            host_throttle.penalize(host_key(self.url), policy.base_delay, self.concurrent_fragments)
+        if '[download]' in line and '%' in line:
+            # 兼容不支持进度模板的旧版yt-dlp
+            percent_match = re.search(r'\b(\d+(?:\.\d+)?)\s*%', line)
+            if percent_match:
+                self._on_progress(AggregateProgress(float(percent_match.group(1)), None, None, None,
+                                                    None, None, None, None))
+
+    def _handle_record(self, record):
+        self._status = record.status
+        progress = self._aggregator.update(record)
+        self._on_progress(progress)
+        space_guard.report(self, progress.downloaded)
+        self.metrics.on_record(record)
+        if record.speed and record.status == 'downloading' and not self.rate_limit:
+            # 限速时测得的是份额，不计入代理的吞吐量
+            self._speed_total += record.speed
+            self._speed_samples += 1
+        if not self.paused:
+            scheduler.report(self, progress.speed)
+        if self._meter:
+            self._record_throughput(self._meter.update(record))
+        if self.journal:
+            self._journal_record(record, progress)
+
+    def _journal_record(self, record, progress):
+        """记录已确定的格式与进度；只有单个视频时记录格式，继续时据此固定格式以续传 .part 文件
+        """
+        if record.video_id not in self._video_ids:
+            self._video_ids.add(record.video_id)
+            if len(self._video_ids) == 2:
+                self.journal.update(self.job_key, formats=None)
+        if len(self._video_ids) == 1 and record.format_id and record.format_id not in self._formats:
+            self._formats.append(record.format_id)
+            self.journal.update(self.job_key, formats=list(self._formats))
+        percent = int(progress.percent or 0)
+        if percent >= self._journal_progress + JOURNAL_PROGRESS_STEP:
+            self._journal_progress = percent
+            self.journal.update(self.job_key, progress=percent)
+
+    def _record_throughput(self, sample):
+        """把一个分片格式流的吞吐量交给 FragmentTuner，可以时立即调整后续格式流的并发数
+        """
+        if sample is None or self.rate_limit:
+            # 限速时测得的是份额而不是网络能力
+            return
+        downloaded, seconds = sample
+        rate = downloaded / seconds
+        next_level = self._tuner.record(self.url, self.concurrent_fragments, rate)
+        message = f"分片并发 {self.concurrent_fragments}: 平均吞吐量 {format_bytes(rate)}/s"
+        if next_level != self.concurrent_fragments and self._run.set_concurrent_fragments(next_level):
+            message += f"，后续格式流改用 {next_level} 个并发"
+            self.concurrent_fragments = next_level
+        else:
+            message += f"，下次使用 {next_level} 个并发"
+        self._on_line(message)
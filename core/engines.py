@@ -0,0 +1,397 @@
+"""下载引擎：统一执行 yt-dlp 命令行参数
+
+- SubprocessEngine：启动 yt-dlp 可执行文件，逐行读取输出
+- LibraryEngine：在当前进程内调用 yt_dlp 模块，使用进度钩子代替解析输出，
+  并复用已初始化的 YoutubeDL 实例（会话、Cookie与提取器状态）
+
+两种引擎都接收相同的参数列表，按行回调日志输出，按 ProgressRecord 回调进度。
+设置中选择跳过证书验证时，由引擎给每次执行（分析、枚举与下载）加上 --no-check-certificate。
+"""
+import copy
+import importlib.util
+import json
+import shlex
+import shutil
+import os
+import subprocess
+import threading
+from collections import OrderedDict
+
+from core.process_control import ProcessTree, popen_kwargs
+from core.progress import ProgressRecord, parse_progress_line
+
+# --max-downloads / --break-on-existing 提前结束时 yt-dlp 的退出码
+RETCODE_STOPPED_EARLY = 101
+
+# 每个任务不同的参数（输出模板、下载存档、完成清单），不计入实例池的键，每次执行前重新设置
+PER_RUN_OPTIONS = ('outtmpl', 'paths', 'download_archive', 'print_to_file')
+# 复用实例时重置的 YoutubeDL 内部状态，yt_dlp 未固定版本，缺少其中任何一个时改为新建实例
+RESET_ATTRIBUTES = ('_parse_outtmpl', '_download_retcode', '_num_downloads', 'archive')
+# 每组相同参数最多保留的空闲实例数，以及最多保留的参数组数，超出时关闭最久未用的实例
+MAX_IDLE_PER_KEY = 2
+MAX_IDLE_KEYS = 8
+
+NO_CHECK_CERTIFICATE = '--no-check-certificate'
+
+ENGINE_SUBPROCESS = 'subprocess'
+ENGINE_LIBRARY = 'library'
+ENGINE_NAMES = {
+    ENGINE_SUBPROCESS: "yt-dlp 可执行文件",
+    ENGINE_LIBRARY: "内置 yt_dlp 模块",
+}
+
+
+def certificate_args(args, check_certificate=True):
+    """不验证证书时在参数末尾加上 --no-check-certificate
+    """
+    args = list(args)
+    if not check_certificate and NO_CHECK_CERTIFICATE not in args:
+        args.append(NO_CHECK_CERTIFICATE)
+    return args
+
+
+class SubprocessRun:
+    """一次子进程执行
+    """
+
+    def __init__(self, cmd, on_line, on_progress=None):
+        self.on_line = on_line
+        self.on_progress = on_progress
+        self.process = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            universal_newlines=True,
+            encoding='utf-8',
+            errors='ignore',
+            **popen_kwargs()
+        )
+        # yt-dlp 与它启动的 ffmpeg 等子进程在同一进程组中，一起取消或暂停
+        self.tree = ProcessTree(self.process)
+
+    def wait(self):
+        """读取全部输出直到进程结束，返回退出码
+        """
+        try:
+            for line in self.process.stdout:
+                line = line.rstrip('\r\n')
+                if not line:
+                    continue
+                record = parse_progress_line(line) if self.on_progress else None
+                if record is not None:
+                    self.on_progress(record)
+                else:
+                    self.on_line(line)
+            return self.process.wait()
+        finally:
+            self.tree.release()
+
+    def stop(self):
+        """先请求进程树退出，超时后强制结束，不阻塞调用方
+        """
+        self.tree.terminate()
+
+    def pause(self):
+        return self.tree.suspend()
+
+    def resume(self):
+        return self.tree.resume()
+
+    def set_concurrent_fragments(self, count):
+        """子进程启动后无法修改分片并发数
+        """
+        return False
+
+    def set_rate_limit(self, rate):
+        """限速只能在启动时通过 --limit-rate 传入
+        """
+        return False
+
+
+class SubprocessEngine:
+    """调用 yt-dlp 可执行文件的引擎
+    """
+    name = ENGINE_SUBPROCESS
+    # 运行中不能调整限速
+    live_rate_limit = False
+
+    def __init__(self, ytdlp_path, check_certificate=True):
+        self.ytdlp_path = ytdlp_path
+        self.check_certificate = check_certificate
+
+    def available(self):
+        return bool(self.ytdlp_path) and (os.path.exists(self.ytdlp_path) or shutil.which(self.ytdlp_path) is not None)
+
+    def describe(self, args):
+        return ' '.join([self.ytdlp_path] + certificate_args(args, self.check_certificate))
+
+    def start(self, args, on_line, on_progress=None):
+        return SubprocessRun([self.ytdlp_path] + certificate_args(args, self.check_certificate), on_line, on_progress)
+
+
+class _RunLogger:
+    """把 yt_dlp 的日志转发给当前执行
+    """
+
+    def __init__(self):
+        self.ydl = None
+
+    def _emit(self, message):
+        run = getattr(self.ydl, 'current_run', None)
+        if run is not None:
+            run.emit_line(message)
+
+    def debug(self, message):
+        self._emit(message)
+
+    def info(self, message):
+        self._emit(message)
+
+    def warning(self, message):
+        self._emit(f"WARNING: {message}")
+
+    def error(self, message):
+        self._emit(message)
+
+
+class LibraryRun:
+    """一次进程内执行
+    """
+
+    def __init__(self, engine, args, on_line, on_progress=None):
+        self.engine = engine
+        self.args = list(args)
+        self.on_line = on_line
+        self.on_progress = on_progress
+        self._stop_event = threading.Event()
+        # 未暂停时保持置位，暂停时清除，下载线程在进度回调中等待
+        self._resume_event = threading.Event()
+        self._resume_event.set()
+        self._ydl = None
+        # 启动前设置的限速在取得 YoutubeDL 实例后生效
+        self._rate_limit = None
+
+    def emit_line(self, message):
+        self._check_stopped()
+        for line in str(message).splitlines():
+            if line:
+                self.on_line(line)
+
+    def on_hook(self, status):
+        self._resume_event.wait()
+        self._check_stopped()
+        if not self.on_progress:
+            return
+        info = status.get('info_dict') or {}
+        self.on_progress(ProgressRecord(
+            str(info.get('id')), str(info.get('format_id')), status.get('status'),
+            status.get('downloaded_bytes'), status.get('total_bytes') or status.get('total_bytes_estimate'),
+            status.get('speed'), status.get('eta'), status.get('fragment_index'), status.get('fragment_count')))
+
+    def _check_stopped(self):
+        if self._stop_event.is_set():
+            raise self.engine.yt_dlp.utils.DownloadCancelled("下载已取消")
+
+    def wait(self):
+        yt_dlp = self.engine.yt_dlp
+        try:
+            parsed = yt_dlp.parse_options(self.args)
+        except SystemExit as e:
+            self.on_line(f"参数错误: {e}")
+            return 2
+        key, ydl = self.engine.acquire(parsed.ydl_opts)
+        ydl.current_run = self
+        self._ydl = ydl
+        if self._rate_limit is not None:
+            ydl.params['ratelimit'] = self._rate_limit or None
+        try:
+            return ydl.download(parsed.urls)
+        except (yt_dlp.utils.MaxDownloadsReached, yt_dlp.utils.ExistingVideoReached,
+                yt_dlp.utils.RejectedVideoReached) as e:
+            self.on_line(f"[info] {e}")
+            return RETCODE_STOPPED_EARLY
+        except yt_dlp.utils.DownloadCancelled:
+            return 1
+        except Exception as e:
+            self.on_line(f"ERROR: {e}")
+            return 1
+        finally:
+            self._ydl = None
+            ydl.current_run = None
+            # 恢复被调整过的参数后再放回实例池
+            ydl.params['concurrent_fragment_downloads'] = parsed.ydl_opts.get('concurrent_fragment_downloads')
+            ydl.params['ratelimit'] = parsed.ydl_opts.get('ratelimit')
+            self.engine.release(key, ydl)
+
+    def stop(self):
+        self._stop_event.set()
+        self._resume_event.set()
+
+    def pause(self):
+        """在下一次进度回调时挂起下载线程，连接不再读取数据
+        """
+        self._resume_event.clear()
+        return True
+
+    def resume(self):
+        if self._resume_event.is_set():
+            return False
+        self._resume_event.set()
+        return True
+
+    def set_concurrent_fragments(self, count):
+        """调整分片并发数，从下一个格式流开始生效
+        """
+        ydl = self._ydl
+        if ydl is None:
+            return False
+        ydl.params['concurrent_fragment_downloads'] = count
+        return True
+
+    def set_rate_limit(self, rate):
+        """调整限速（字节/秒，0 为不限速），普通 HTTP 下载立即生效，分片下载从下一个格式流开始生效
+        """
+        self._rate_limit = rate
+        ydl = self._ydl
+        if ydl is not None:
+            ydl.params['ratelimit'] = rate or None
+        return True
+
+
+class LibraryEngine:
+    """在进程内调用 yt_dlp 模块的引擎，yt_dlp 为可选依赖
+    """
+    name = ENGINE_LIBRARY
+    live_rate_limit = True
+
+    def __init__(self, check_certificate=True):
+        self.check_certificate = check_certificate
+        self._yt_dlp = None
+        # 键为参数，按最近使用排序
+        self._idle = OrderedDict()
+        self._lock = threading.Lock()
+        self._ydl_class = None
+
+    @property
+    def yt_dlp(self):
+        """yt_dlp 模块导入较慢，第一次使用时才导入
+        """
+        if self._yt_dlp is None:
+            import yt_dlp
+            self._yt_dlp = yt_dlp
+        return self._yt_dlp
+
+    def available(self):
+        return importlib.util.find_spec('yt_dlp') is not None
+
+    def describe(self, args):
+        return 'yt_dlp ' + ' '.join(shlex.quote(arg) for arg in certificate_args(args, self.check_certificate))
+
+    def start(self, args, on_line, on_progress=None):
+        return LibraryRun(self, certificate_args(args, self.check_certificate), on_line, on_progress)
+
+    @staticmethod
+    def _options_key(ydl_opts):
+        shared = {name: value for name, value in ydl_opts.items() if name not in PER_RUN_OPTIONS}
+        # 复用的实例不会重新读取 cookie 文件，文件更新后使用新的实例
+        cookie_file = ydl_opts.get('cookiefile')
+        if cookie_file and os.path.exists(cookie_file):
+            shared['cookiefile_mtime'] = os.path.getmtime(cookie_file)
+        return json.dumps(shared, sort_keys=True, default=repr)
+
+    @staticmethod
+    def _load_archive(path):
+        """读取下载存档中的记录，与 YoutubeDL 初始化时相同
+        """
+        archive = set()
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                archive.update(line.strip() for line in f)
+        return archive
+
+    def _prepare(self, ydl, opts):
+        """复用实例前设置本次执行的参数，并清除上一个任务留下的状态；
+        当前 yt_dlp 版本没有需要重置的内部状态时返回 False，不复用该实例
+        """
+        if not all(hasattr(ydl, name) for name in RESET_ATTRIBUTES):
+            return False
+        for name in PER_RUN_OPTIONS:
+            if name in opts:
+                ydl.params[name] = opts[name]
+            else:
+                ydl.params.pop(name, None)
+        ydl.params.setdefault('print_to_file', {})
+        ydl._parse_outtmpl()
+        ydl.archive = self._load_archive(opts.get('download_archive'))
+        # 忽略的错误会让之后的任务都返回 1，--max-downloads 与自动编号按下载数计算
+        ydl._download_retcode = 0
+        ydl._num_downloads = 0
+        return True
+
+    def _make_ydl_class(self):
+        if self._ydl_class is None:
+            class CapturingYoutubeDL(self.yt_dlp.YoutubeDL):
+                """把 --dump-json / --print 写往标准输出的内容也转发给当前执行
+                """
+                current_run = None
+
+                def to_stdout(self, message, *args, **kwargs):
+                    self.current_run.emit_line(message)
+
+            self._ydl_class = CapturingYoutubeDL
+        return self._ydl_class
+
+    def acquire(self, ydl_opts):
+        """取得一个空闲的 YoutubeDL 实例，返回 (键, 实例)，结束后用同一个键调用 release；
+        除每个任务不同的参数外相同的任务之间复用
+        """
+        # YoutubeDL 会改写传入的参数（如 outtmpl），在构造前复制并计算键
+        opts = copy.deepcopy(ydl_opts)
+        key = self._options_key(opts)
+        with self._lock:
+            idle = self._idle.get(key)
+            ydl = idle.pop() if idle else None
+        if ydl is not None:
+            if self._prepare(ydl, opts):
+                return key, ydl
+            try:
+                ydl.close()
+            except Exception:
+                pass
+        # 进度由钩子回调，不再输出进度行
+        opts.pop('progress_template', None)
+        opts['noprogress'] = True
+        opts['logger'] = logger = _RunLogger()
+        ydl = self._make_ydl_class()(opts)
+        logger.ydl = ydl
+        ydl.add_progress_hook(lambda status: ydl.current_run.on_hook(status))
+        return key, ydl
+
+    def release(self, key, ydl):
+        """放回实例池，超出上限时关闭最久未用的实例
+        """
+        evicted = []
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            self._idle.move_to_end(key)
+            idle.append(ydl)
+            if len(idle) > MAX_IDLE_PER_KEY:
+                evicted.append(idle.pop(0))
+            while len(self._idle) > MAX_IDLE_KEYS:
+                _, instances = self._idle.popitem(last=False)
+                evicted.extend(instances)
+        for instance in evicted:
+            try:
+                instance.close()
+            except Exception:
+                pass
+
+
+def create_engine(name, ytdlp_path='', check_certificate=True):
+    """根据设置创建引擎，内置模块不可用时回退到可执行文件
+    """
+    if name == ENGINE_LIBRARY:
+        engine = LibraryEngine(check_certificate)
+        if engine.available():
+            return engine
+    return SubprocessEngine(ytdlp_path, check_certificate)
@@ -0,0 +1,250 @@
+"""下载失败的原因分类与应对策略，不依赖 Qt
+
+从 yt-dlp 的输出中识别限流（HTTP 429）、拒绝访问（HTTP 403）、地区限制、需要登录、证书验证失败、视频不可用、
+磁盘已满与网络中断等情况，按类别决定：以指数退避加随机抖动重试、降低该站点的并发后再试，
+或者在重试没有意义时立即失败。
+
+站点被限流时由进程内共用的 HostThrottle 让该站点的所有任务一起退避：冷却期内不启动新的下载，
+同时运行的任务数与分片并发数减半，之后每次成功下载逐步恢复。
+"""
+import re
+import math
+import time
+import random
+import threading
+from collections import namedtuple
+
+from core.fragment_tuner import MAX_FRAGMENTS
+
+ERROR_RATE_LIMITED = 'rate_limited'
+ERROR_FORBIDDEN = 'forbidden'
+ERROR_GEO_BLOCKED = 'geo_blocked'
+ERROR_AUTH = 'auth'
+ERROR_CERTIFICATE = 'certificate'
+ERROR_UNAVAILABLE = 'unavailable'
+ERROR_DISK = 'disk'
+ERROR_NETWORK = 'network'
+ERROR_UNKNOWN = 'unknown'
+
+# retries 为自动重试次数，第 n 次重试前等待约 base_delay * 2^(n-1) 秒（不超过 max_delay）；
+# throttle 表示同时降低该站点的并发
+ErrorPolicy = namedtuple('ErrorPolicy', 'label retries base_delay max_delay throttle hint')
+POLICIES = {
+    ERROR_RATE_LIMITED: ErrorPolicy("请求过于频繁（HTTP 429）", 4, 30, 600, True, "已降低该站点的并发"),
+    ERROR_FORBIDDEN: ErrorPolicy("访问被拒绝（HTTP 403）", 2, 10, 120, True,
+                                 "多次出现时请检查Cookie或更新 yt-dlp"),
+    ERROR_GEO_BLOCKED: ErrorPolicy("地区限制", 0, 0, 0, False, "该视频在当前地区不可用，可尝试使用代理"),
+    ERROR_AUTH: ErrorPolicy("需要登录或Cookie已失效", 0, 0, 0, False, "请重新导出Cookie文件"),
+    ERROR_CERTIFICATE: ErrorPolicy("证书验证失败", 0, 0, 0, False,
+                                   "请检查系统时间、代理设置或站点证书，必要时在设置中选择不验证证书"),
+    ERROR_UNAVAILABLE: ErrorPolicy("视频不存在或不可用", 0, 0, 0, False, None),
+    ERROR_DISK: ErrorPolicy("磁盘空间不足", 0, 0, 0, False, None),
+    ERROR_NETWORK: ErrorPolicy("网络错误", 3, 5, 120, False, None),
+    ERROR_UNKNOWN: ErrorPolicy("下载失败", 0, 0, 0, False, None),
+}
+
+# 按顺序匹配，越靠前越具体
+_PATTERNS = (
+    (ERROR_DISK, re.compile(r'No space left on device|Errno 28|Disk quota exceeded', re.I)),
+    (ERROR_GEO_BLOCKED, re.compile(r'not available (?:in your country|from your location)|geo[- ]?restrict'
+                                   r'|not made this video available in your country', re.I)),
+    (ERROR_RATE_LIMITED, re.compile(r'HTTP Error 429|Too Many Requests|rate[- ]?limit'
+                                    r"|content isn.t available, try again later", re.I)),
+    (ERROR_AUTH, re.compile(r'Sign in to|login required|log in to|--cookies|Private video|members[- ]only'
+                            r'|requires authentication|registered users|HTTP Error 401', re.I)),
+    (ERROR_FORBIDDEN, re.compile(r'HTTP Error 403|Forbidden', re.I)),
+    # 证书错误重试也不会成功；只有连接被重置、意外断开等传输错误才重试
+    (ERROR_CERTIFICATE, re.compile(r'CERTIFICATE_VERIFY_FAILED|certificate verify failed|SSLCertVerificationError'
+                                   r'|certificate has expired|self[- ]signed certificate|unable to get local issuer'
+                                   r'|hostname mismatch|certificate is not valid for', re.I)),
+    (ERROR_UNAVAILABLE, re.compile(r'Video unavailable|has been removed|HTTP Error 404|Unsupported URL'
+                                   r'|does not exist|is not a valid URL|Requested format is not available', re.I)),
+    (ERROR_NETWORK, re.compile(r'timed out|Connection (?:reset|refused|aborted)|Remote end closed'
+                               r'|name resolution|Name or service not known|getaddrinfo failed'
+                               r'|Network is unreachable|IncompleteRead|HTTP Error 5\d\d'
+                               r'|SSL: UNEXPECTED_EOF|UNEXPECTED_EOF_WHILE_READING|EOF occurred in violation of protocol'
+                               r'|SSLEOFError|SSLZeroReturnError'
+                               r'|Unable to download (?:webpage|video data)', re.I)),
+)
+# 错误消息最多保留的字符数
+MAX_MESSAGE = 300
+
+
+def classify_line(line):
+    """返回一行输出对应的错误类别，不是已知错误时返回None
+    """
+    for category, pattern in _PATTERNS:
+        if pattern.search(line):
+            return category
+    return None
+
+
+def backoff_delay(policy, attempt):
+    """第 attempt 次重试前的等待秒数：指数增长，再在后一半范围内随机抖动，避免多个任务同时重试
+    """
+    delay = min(policy.max_delay, policy.base_delay * 2 ** (attempt - 1))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class ErrorClassifier:
+    """逐行读取一次运行的输出，结束后给出失败原因
+
+    以最后一个可识别的 ERROR 行为准；没有时参考重试警告中的限流与网络错误。
+    """
+
+    def __init__(self):
+        self.error_line = None
+        self.error_category = None
+        self.warnings = {}
+
+    def feed(self, line):
+        """处理一行输出，返回该行的错误类别（不是已知错误时返回None）
+        """
+        is_error = line.startswith('ERROR')
+        if not is_error and not line.startswith('WARNING'):
+            return None
+        category = classify_line(line)
+        if is_error:
+            self.error_line = line
+            if category:
+                self.error_category = category
+        elif category:
+            self.warnings[category] = self.warnings.get(category, 0) + 1
+        return category
+
+    def category(self):
+        if self.error_category:
+            return self.error_category
+        for category in (ERROR_RATE_LIMITED, ERROR_FORBIDDEN, ERROR_NETWORK):
+            if category in self.warnings:
+                return category
+        return ERROR_UNKNOWN
+
+    def describe(self, fallback):
+        """失败说明：错误类别与 yt-dlp 的错误消息，没有可识别的原因时返回 fallback
+        """
+        category = self.category()
+        policy = POLICIES[category]
+        if self.error_line:
+            message = self.error_line[len('ERROR:'):].strip()
+            if len(message) > MAX_MESSAGE:
+                message = message[:MAX_MESSAGE] + '...'
+            message = message if category == ERROR_UNKNOWN else f"{policy.label}: {message}"
+        elif category == ERROR_UNKNOWN:
+            return fallback
+        else:
+            message = f"{policy.label}，{fallback}"
+        if policy.hint:
+            message += f"（{policy.hint}）"
+        return message
+
+
+# 被限流后每隔该时间（秒）没有再被限流、且有下载成功时恢复一档
+RECOVERY_INTERVAL = 300.0
+# 同时运行的任务数恢复到该值、分片并发恢复到 MAX_FRAGMENTS 时取消限制
+MAX_HOST_JOBS = 8
+
+
+class _HostState:
+    def __init__(self):
+        self.running = 0
+        self.job_limit = None
+        self.fragment_limit = None
+        self.cooldown_until = 0.0
+        self.changed = 0.0
+
+    def limited(self):
+        return self.job_limit is not None or self.fragment_limit is not None
+
+
+class HostThrottle:
+    """按站点限制同时运行的下载，被限流的站点进入冷却并降低并发，线程安全
+    """
+
+    def __init__(self):
+        self._hosts = {}
+        self._cond = threading.Condition()
+
+    def _state(self, host):
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _HostState()
+        return state
+
+    def acquire(self, host, should_stop, on_wait=None):
+        """开始一次下载前调用，冷却期内或该站点的任务数已达上限时等待；取消时返回False
+        """
+        waiting = False
+        with self._cond:
+            while True:
+                if should_stop():
+                    return False
+                # 等待期间该站点的记录可能已被清除，每次重新获取
+                state = self._state(host)
+                remaining = state.cooldown_until - time.monotonic()
+                full = state.job_limit is not None and state.running >= state.job_limit
+                if remaining <= 0 and not full:
+                    state.running += 1
+                    return True
+                if not waiting and on_wait:
+                    on_wait(f"{host} 正在退避，{math.ceil(remaining)} 秒后继续" if remaining > 0
+                            else f"{host} 同时下载数已降为 {state.job_limit}，等待其他任务结束")
+                waiting = True
+                self._cond.wait(min(remaining, 1.0) if remaining > 0 else 1.0)
+
+    def ready(self, host):
+        """该站点现在能否开始下载（不在冷却期内且未达到同时下载数上限），不占用名额
+        """
+        with self._cond:
+            state = self._hosts.get(host)
+            if state is None:
+                return True
+            full = state.job_limit is not None and state.running >= state.job_limit
+            return state.cooldown_until <= time.monotonic() and not full
+
+    def release(self, host, success):
+        """一次下载结束时调用；成功且距上次调整超过 RECOVERY_INTERVAL 时恢复一档
+        """
+        with self._cond:
+            state = self._state(host)
+            state.running = max(0, state.running - 1)
+            now = time.monotonic()
+            if success and state.limited() and now - state.changed >= RECOVERY_INTERVAL:
+                state.changed = now
+                if state.job_limit is not None:
+                    state.job_limit += 1
+                    if state.job_limit >= MAX_HOST_JOBS:
+                        state.job_limit = None
+                if state.fragment_limit is not None:
+                    state.fragment_limit *= 2
+                    if state.fragment_limit >= MAX_FRAGMENTS:
+                        state.fragment_limit = None
+            if not state.running and not state.limited() and state.cooldown_until <= now:
+                del self._hosts[host]
+            self._cond.notify_all()
+
+    def penalize(self, host, cooldown, fragments=None):
+        """站点限流时调用：进入 cooldown 秒的冷却期，同时运行的任务数与分片并发数减半
+        """
+        with self._cond:
+            state = self._state(host)
+            now = time.monotonic()
+            state.cooldown_until = max(state.cooldown_until, now + cooldown)
+            # 同一轮限流中多个任务各自报告时只降一档
+            if now - state.changed >= cooldown / 2 or not state.limited():
+                state.changed = now
+                state.job_limit = max(1, (state.job_limit or max(state.running, 2)) // 2)
+                current = state.fragment_limit or fragments
+                if current:
+                    state.fragment_limit = max(1, current // 2)
+
+    def fragment_limit(self, host):
+        """该站点当前允许的分片并发数，没有限制时返回None
+        """
+        with self._cond:
+            state = self._hosts.get(host)
+            return state.fragment_limit if state else None
+
+
+# 进程内所有下载共用
+throttle = HostThrottle()
@@ -0,0 +1,69 @@
+"""外部多连接下载器（aria2c），不依赖 Qt
+
+--concurrent-fragments 只对分片（HLS/DASH）格式有效，单文件的普通下载仍只有一个连接，
+在按连接限速的 CDN 上很慢。选择 aria2c 时由 yt-dlp 把 http/https 下载交给 aria2c，
+按设置的连接数把文件分块同时下载；分片格式仍由 yt-dlp 自己下载。找不到 aria2c 时自动改用内置下载器。
+"""
+import os
+import shutil
+import threading
+
+DOWNLOADER_NATIVE = 'native'
+DOWNLOADER_ARIA2C = 'aria2c'
+DOWNLOADER_NAMES = {
+    DOWNLOADER_NATIVE: "内置",
+    DOWNLOADER_ARIA2C: "aria2c 多连接",
+}
+DEFAULT_CONNECTIONS = 8
+# aria2c 每个服务器最多 16 个连接
+MAX_CONNECTIONS = 16
+# 每块的最小大小（MB），小于两倍该值的文件不分块
+DEFAULT_SPLIT_MB = 4
+
+
+def find_aria2c(location=''):
+    """aria2c 路径：location 可以是 aria2c 可执行文件或其所在目录，未设置时在 PATH 中查找
+    """
+    if location:
+        if os.path.isdir(location):
+            location = os.path.join(location, 'aria2c.exe' if os.name == 'nt' else 'aria2c')
+        return location if os.path.exists(location) else None
+    return shutil.which('aria2c')
+
+
+class Aria2c:
+    """进程内共用的 aria2c 设置，线程安全
+    """
+
+    def __init__(self):
+        self.location = ''
+        self.connections = DEFAULT_CONNECTIONS
+        self.split_mb = DEFAULT_SPLIT_MB
+        self._lock = threading.Lock()
+
+    def configure(self, location='', connections=DEFAULT_CONNECTIONS, split_mb=DEFAULT_SPLIT_MB):
+        with self._lock:
+            self.location = location
+            self.connections = max(1, min(MAX_CONNECTIONS, connections))
+            self.split_mb = max(1, split_mb)
+
+    def executable(self):
+        return find_aria2c(self.location)
+
+    def args(self):
+        """让 yt-dlp 使用 aria2c 的参数，找不到 aria2c 时返回None
+        """
+        with self._lock:
+            location, connections, split_mb = self.location, self.connections, self.split_mb
+        path = find_aria2c(location)
+        if path is None:
+            return None
+        return ['--downloader', f'http:{path}',
+                '--downloader-args', f'aria2c:-x {connections} -s {connections} -k {split_mb}M']
+
+    def describe(self):
+        return f"{self.connections} 个连接，分块 {self.split_mb}MB"
+
+
+# 进程内所有下载共用
+aria2c = Aria2c()
@@ -0,0 +1,194 @@
+"""根据分析得到的格式列表选择下载格式，不依赖 Qt
+
+按预计传输大小、编码效率与封装兼容性排序：相同分辨率下优先体积更小的 AV1 / VP9 等高效编码，
+体积相同时优先可以直接合并、无需转换封装的组合。支持"最佳质量""不超过指定大小的最佳质量"
+"满足分辨率的最小体积"等策略。
+"""
+from core.progress import format_bytes, format_eta
+
+# 相同画质下相对 H.264 / AAC 的压缩效率，越大越省流量
+VIDEO_CODEC_EFFICIENCY = (('av01', 1.6), ('hvc1', 1.4), ('hev1', 1.4), ('vp09', 1.35), ('vp9', 1.35),
+                          ('avc', 1.0), ('vp8', 0.9))
+AUDIO_CODEC_EFFICIENCY = (('opus', 1.3), ('vorbis', 1.1), ('mp4a', 1.0), ('aac', 1.0), ('mp3', 0.8))
+CODEC_NAMES = {'av01': 'AV1', 'hvc1': 'HEVC', 'hev1': 'HEVC', 'vp09': 'VP9', 'vp9': 'VP9', 'avc': 'H.264',
+               'vp8': 'VP8', 'opus': 'Opus', 'vorbis': 'Vorbis', 'mp4a': 'AAC', 'aac': 'AAC', 'mp3': 'MP3'}
+# 可以直接合并、不需要转换封装的视频/音频容器组合
+MERGE_CONTAINERS = {('mp4', 'm4a'), ('mp4', 'mp4'), ('webm', 'webm')}
+
+POLICY_MANUAL = "手动选择"
+POLICY_BEST = "最佳质量"
+POLICY_MAX_SIZE = "不超过指定大小"
+POLICY_MIN_HEIGHT = "满足分辨率的最小体积"
+POLICIES = (POLICY_MANUAL, POLICY_BEST, POLICY_MAX_SIZE, POLICY_MIN_HEIGHT)
+
+_UNKNOWN_SIZE = float('inf')
+
+
+def _codec_key(codec, table):
+    codec = (codec or '').lower()
+    for prefix, _ in table:
+        if codec.startswith(prefix):
+            return prefix
+    return None
+
+
+def codec_efficiency(codec, table):
+    key = _codec_key(codec, table)
+    return dict(table)[key] if key else 1.0
+
+
+def codec_name(codec, table):
+    key = _codec_key(codec, table)
+    return CODEC_NAMES[key] if key else (codec or '未知').split('.')[0]
+
+
+def is_video(fmt):
+    """只含视频的格式流
+    """
+    return fmt.get('acodec') == 'none' and fmt.get('vcodec') not in (None, 'none')
+
+
+def is_audio(fmt):
+    return fmt.get('vcodec') == 'none' and fmt.get('acodec') not in (None, 'none')
+
+
+def estimate_size(fmt, duration=None):
+    """预计传输字节数：优先使用 filesize / filesize_approx，否则按码率（kbps）与时长估算，无法估算时返回None
+    """
+    size = fmt.get('filesize') or fmt.get('filesize_approx')
+    if size:
+        return size
+    bitrate = fmt.get('tbr') or fmt.get('vbr') or fmt.get('abr')
+    if bitrate and duration:
+        return int(bitrate * 125 * duration)
+    return None
+
+
+def can_merge(video, audio):
+    """两个格式流是否可以直接合并（不需要转换封装）
+    """
+    return (video.get('ext'), audio.get('ext')) in MERGE_CONTAINERS
+
+
+def _size(fmt, duration):
+    size = estimate_size(fmt, duration)
+    return size if size else _UNKNOWN_SIZE
+
+
+def _audio_quality(fmt):
+    return (fmt.get('abr') or 0) * codec_efficiency(fmt.get('acodec'), AUDIO_CODEC_EFFICIENCY)
+
+
+def rank_video_formats(formats, duration=None):
+    """返回排序后的视频格式：分辨率与帧率从高到低，相同分辨率、帧率与编码只保留体积最小的一个，
+    同一档位内体积小的在前，体积相同时 mp4 在前（与 m4a 音频合并不需要转换封装）
+    """
+    best = {}
+    for fmt in formats:
+        if not is_video(fmt):
+            continue
+        key = (fmt.get('height') or 0, round(fmt.get('fps') or 0),
+               _codec_key(fmt.get('vcodec'), VIDEO_CODEC_EFFICIENCY) or fmt.get('vcodec'))
+        if key not in best or _size(fmt, duration) < _size(best[key], duration):
+            best[key] = fmt
+    return sorted(best.values(), key=lambda fmt: (-(fmt.get('height') or 0), -round(fmt.get('fps') or 0),
+                                                  _size(fmt, duration), fmt.get('ext') != 'mp4'))
+
+
+def rank_audio_formats(formats, duration=None):
+    """返回排序后的音频格式：按编码效率折算后的码率从高到低，相同时体积小的在前
+    """
+    audio = [fmt for fmt in formats if is_audio(fmt)]
+    return sorted(audio, key=lambda fmt: (-_audio_quality(fmt), _size(fmt, duration)))
+
+
+def pick_audio(audio_formats, video=None, max_bytes=None, duration=None):
+    """为视频挑选音频：不超过 max_bytes 的最佳音频，音质接近时优先可以直接合并的容器
+    """
+    candidates = [fmt for fmt in audio_formats if max_bytes is None or _size(fmt, duration) <= max_bytes]
+    if not candidates:
+        return None
+    best = candidates[0]
+    if video is not None and not can_merge(video, best):
+        for fmt in candidates:
+            # 音质不低于最佳的80%时，为避免转换封装而选择兼容的格式
+            if can_merge(video, fmt) and _audio_quality(fmt) >= 0.8 * _audio_quality(best):
+                return fmt
+    return best
+
+
+def select_formats(formats, duration, with_video, with_audio, policy, max_bytes=None, min_height=None):
+    """按策略选择格式，返回 (视频格式, 音频格式)，不需要或没有可用格式时对应项为None
+    """
+    videos = rank_video_formats(formats, duration) if with_video else []
+    audios = rank_audio_formats(formats, duration) if with_audio else []
+    if policy == POLICY_MANUAL or (with_video and not videos) or (with_audio and not audios):
+        return None, None
+
+    if not with_video:
+        if policy == POLICY_MAX_SIZE and max_bytes:
+            return None, pick_audio(audios, None, max_bytes, duration) or min(audios, key=lambda f: _size(f, duration))
+        if policy == POLICY_MIN_HEIGHT:
+            return None, min(audios, key=lambda fmt: _size(fmt, duration))
+        return None, audios[0]
+
+    def pair(video, budget=None):
+        if not with_audio:
+            return video, None
+        if budget is not None:
+            budget -= _size(video, duration)
+            if budget < 0:
+                return video, None
+        return video, pick_audio(audios, video, budget, duration)
+
+    def total(chosen):
+        return sum(_size(fmt, duration) for fmt in chosen if fmt is not None)
+
+    if policy == POLICY_MAX_SIZE and max_bytes:
+        for video in videos:
+            chosen = pair(video, max_bytes)
+            if (not with_audio or chosen[1] is not None) and total(chosen) <= max_bytes:
+                return chosen
+        # 没有符合大小的组合时选择体积最小的
+        return min((pair(video) for video in videos), key=total)
+    if policy == POLICY_MIN_HEIGHT and min_height:
+        eligible = [video for video in videos if (video.get('height') or 0) >= min_height]
+        if eligible:
+            return min((pair(video) for video in eligible), key=total)
+        # 没有达到要求的分辨率时选择最接近的
+        return pair(videos[0])
+    return pair(videos[0])
+
+
+def describe_format(fmt, duration=None, rate=None):
+    """生成下拉框中显示的文字，包含编码、容器、预计大小与下载时间（rate 为字节/秒）
+    """
+    if is_audio(fmt):
+        label = f"音频: {fmt.get('abr') or '未知'}kbps {codec_name(fmt.get('acodec'), AUDIO_CODEC_EFFICIENCY)}"
+    else:
+        fps = round(fmt.get('fps') or 0)
+        label = (f"视频: {fmt.get('height') or '未知'}p{fps if fps > 30 else ''} "
+                 f"{codec_name(fmt.get('vcodec'), VIDEO_CODEC_EFFICIENCY)}")
+    label += f" ({fmt.get('ext') or '未知'})"
+    size = estimate_size(fmt, duration)
+    if size:
+        approx = '' if fmt.get('filesize') else '≈'
+        label += f" {approx}{format_bytes(size)}"
+        if rate:
+            label += f"，约 {format_eta(size / rate)}"
+    return label
+
+
+def describe_total(chosen, duration=None, rate=None):
+    """所选格式合计的预计大小与下载时间，大小未知时返回None
+    """
+    sizes = [estimate_size(fmt, duration) for fmt in chosen if fmt is not None]
+    if not sizes or None in sizes:
+        return None
+    total = sum(sizes)
+    text = f"预计 {format_bytes(total)}"
+    if rate:
+        text += f"，约 {format_eta(total / rate)}"
+    if len(chosen) == 2 and None not in chosen and not can_merge(*chosen):
+        text += "，合并时需要转换封装"
+    return text
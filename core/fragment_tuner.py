@@ -0,0 +1,168 @@
+"""分片并发数自动调节：根据实际下载吞吐量为每个站点学习合适的 --concurrent-fragments
+
+每次分片下载结束后记录该并发数达到的吞吐量，逐档尝试相邻的并发数，
+最终停在"吞吐量接近最大值的最小并发数"（曲线拐点），避免并发过高被限速。
+"""
+import json
+import time
+import sqlite3
+import threading
+from contextlib import closing
+from urllib.parse import urlsplit
+
+from core.paths import data_path
+
+# 线程数设置为该值时表示自动调节
+AUTO_FRAGMENTS = 0
+# 可选的并发档位
+LEVELS = (1, 2, 3, 4, 6, 8, 12, 16, 24, 32, 48, 64)
+# 分片并发上限，自动调节的最高档与下载页面手动设置的上限相同
+MAX_FRAGMENTS = LEVELS[-1]
+DEFAULT_LEVEL = 4
+# 吞吐量相差不超过该比例时视为没有明显差别
+GAIN_THRESHOLD = 0.1
+# 新测量值与历史值的平滑系数
+SMOOTHING = 0.5
+# 下载量少于该值的格式流不计入统计
+MIN_SAMPLE_BYTES = 2 * 1024 * 1024
+# 超过该时间的测量值视为过期，会重新测量
+RATE_MAX_AGE = 7 * 24 * 3600
+
+
+def host_key(url):
+    """站点标识：小写域名，去掉端口和 www. 前缀
+    """
+    host = (urlsplit(url).hostname or '').lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+class ThroughputMeter:
+    """从进度记录中测量每个分片格式流的吞吐量
+    """
+
+    def __init__(self):
+        self._stream = None
+        self._start = None
+        self._last = None
+
+    def update(self, record):
+        """处理一条进度记录，某个格式流结束时返回 (字节数, 秒数)，否则返回None
+        """
+        key = (record.video_id, record.format_id)
+        sample = None
+        if key != self._stream:
+            # 开始下载新的格式流，上一个格式流视为已结束
+            sample = self.close()
+            self._stream = key
+        if not record.fragment_count:
+            return sample
+        now = time.monotonic()
+        if self._start is None:
+            self._start = (now, record.downloaded or 0)
+        if record.downloaded:
+            self._last = (now, record.downloaded)
+        if record.status == 'finished':
+            sample = self.close()
+            # 同一格式流后续的记录不再重复统计
+            self._stream = key
+        return sample
+
+    def close(self):
+        start, last = self._start, self._last
+        self._stream = self._start = self._last = None
+        if start is None or last is None:
+            return None
+        downloaded = last[1] - start[1]
+        seconds = last[0] - start[0]
+        if downloaded < MIN_SAMPLE_BYTES or seconds <= 0:
+            return None
+        return downloaded, seconds
+
+
+class FragmentTuner:
+    """按站点记录各并发档位的吞吐量并给出下一次使用的并发数
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or data_path('fragment_tuning.db')
+        self._lock = threading.Lock()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS fragment_tuning ("
+                "host TEXT PRIMARY KEY, level INTEGER, rates TEXT, updated REAL)")
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    def _load(self, conn, host):
+        row = conn.execute("SELECT level, rates FROM fragment_tuning WHERE host = ?", (host,)).fetchone()
+        if row is None:
+            return DEFAULT_LEVEL, {}
+        level, rates = row
+        now = time.time()
+        rates = {int(lv): tuple(value) for lv, value in json.loads(rates).items()
+                 if now - value[1] <= RATE_MAX_AGE}
+        return level, rates
+
+    def suggest(self, url):
+        """返回该站点下一次下载使用的并发数
+        """
+        with self._lock, closing(self._connect()) as conn:
+            return self._load(conn, host_key(url))[0]
+
+    def record(self, url, level, rate):
+        """记录并发数 level 达到的吞吐量（字节/秒），返回下一次使用的并发数
+        """
+        host = host_key(url)
+        with self._lock, closing(self._connect()) as conn, conn:
+            _, rates = self._load(conn, host)
+            previous = rates.get(level)
+            if previous:
+                rate = previous[0] * (1 - SMOOTHING) + rate * SMOOTHING
+            rates[level] = (rate, time.time())
+            next_level = self._next_level(level, rates)
+            conn.execute(
+                "INSERT OR REPLACE INTO fragment_tuning (host, level, rates, updated) VALUES (?, ?, ?, ?)",
+                (host, next_level, json.dumps(rates), time.time()))
+        return next_level
+
+    @staticmethod
+    def _next_level(level, rates):
+        best_rate = max(rate for rate, _ in rates.values())
+        # 拐点：吞吐量接近最大值的最小并发数
+        knee = min(lv for lv, (rate, _) in rates.items() if rate >= best_rate * (1 - GAIN_THRESHOLD))
+        if knee != level:
+            return knee
+        # 依次探索尚未测量过的更高、更低档位
+        index = LEVELS.index(level) if level in LEVELS else LEVELS.index(DEFAULT_LEVEL)
+        for neighbour in (index + 1, index - 1):
+            if 0 <= neighbour < len(LEVELS) and LEVELS[neighbour] not in rates:
+                return LEVELS[neighbour]
+        return level
+
+    def throughput(self, url):
+        """该站点测得的最高吞吐量（字节/秒）；没有记录时使用所有站点的平均值，仍没有时返回None
+        """
+        with self._lock, closing(self._connect()) as conn:
+            _, rates = self._load(conn, host_key(url))
+            if rates:
+                return max(rate for rate, _ in rates.values())
+            hosts = [row[0] for row in conn.execute("SELECT host FROM fragment_tuning")]
+            best = [max(rate for rate, _ in site_rates.values())
+                    for site_rates in (self._load(conn, host)[1] for host in hosts) if site_rates]
+        return sum(best) / len(best) if best else None
+
+    def learned(self):
+        """返回各站点当前使用的并发数及其吞吐量，用于显示
+        """
+        with self._lock, closing(self._connect()) as conn:
+            rows = conn.execute("SELECT host, level, rates FROM fragment_tuning ORDER BY host").fetchall()
+        result = []
+        for host, level, rates in rows:
+            rate = json.loads(rates).get(str(level))
+            result.append((host, level, rate[0] if rate else None))
+        return result
+
+    def clear(self):
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM fragment_tuning")
@@ -0,0 +1,173 @@
+"""下载任务日志：以追加方式记录每个任务的链接、参数、已确定的格式与进度，
+程序崩溃或重启后可以据此继续未完成的任务（yt-dlp 默认会续传已有的 .part 文件）
+
+每条记录是一行JSON，写入后立即 fsync；记录数过多时重写为每个未完成任务一条记录。
+"""
+import os
+import json
+import time
+import uuid
+import threading
+
+from core.command import DOWNLOAD_ALL, DOWNLOAD_AUDIO, DOWNLOAD_VIDEO
+from core.paths import data_path
+
+STATE_WAITING = 'waiting'
+STATE_RUNNING = 'running'
+STATE_FINISHED = 'finished'
+STATE_FAILED = 'failed'
+STATE_CANCELLED = 'cancelled'
+# 可以继续的状态
+RESUMABLE_STATES = (STATE_WAITING, STATE_RUNNING)
+
+# 格式字典中保留的字段，分析结果里的分片列表等不写入日志
+_FORMAT_KEYS = ('format_id', 'ext', 'filesize', 'filesize_approx', 'height', 'abr', 'vcodec', 'acodec',
+                'format_note')
+
+
+def _compact_options(options):
+    compact = {}
+    for key, value in options.items():
+        if key == 'job_key':
+            continue
+        if isinstance(value, dict):
+            value = {k: value[k] for k in _FORMAT_KEYS if k in value}
+        compact[key] = value
+    return compact
+
+
+def resume_options(entry):
+    """继续任务时使用的下载参数：质量为"最高质量"等名称时固定为上次已确定的格式，
+    使文件名与上次相同，从而续传 .part 文件
+    """
+    options = dict(entry['options'])
+    formats = entry.get('formats')
+    download_type = options.get('download_type')
+    if not formats or download_type == DOWNLOAD_AUDIO:
+        return options
+    if download_type == DOWNLOAD_VIDEO and not isinstance(options.get('video_quality'), dict):
+        options['video_quality'] = '+'.join(formats)
+    elif download_type == DOWNLOAD_ALL and len(formats) == 2:
+        if not isinstance(options.get('video_quality'), dict):
+            options['video_quality'] = formats[0]
+        if not isinstance(options.get('audio_quality'), dict):
+            options['audio_quality'] = formats[1]
+    return options
+
+
+class JobJournal:
+    """追加写入、fsync、定期压缩的任务日志，线程安全
+    """
+
+    def __init__(self, path=None, compact_every=500):
+        self.path = path or data_path('jobs.journal')
+        self.compact_every = compact_every
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._records = 0
+        self._closed = False
+        self._replay()
+        self._file = open(self.path, 'a', encoding='utf-8')
+        if self._records > max(self.compact_every, 2 * len(self._jobs)):
+            self.compact()
+
+    def _replay(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding='utf-8', errors='ignore') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # 崩溃时最后一行可能只写了一半
+                    continue
+                self._apply(record)
+                self._records += 1
+
+    def _apply(self, record):
+        key = record.get('key')
+        op = record.get('op')
+        if op == 'add':
+            self._jobs[key] = {k: v for k, v in record.items() if k != 'op'}
+        elif op == 'update' and key in self._jobs:
+            self._jobs[key].update({k: v for k, v in record.items() if k not in ('op', 'key')})
+        elif op == 'end':
+            self._jobs.pop(key, None)
+
+    def _append(self, record):
+        with self._lock:
+            if self._closed:
+                return
+            self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._apply(record)
+            self._records += 1
+            if self._records >= self.compact_every and self._records > 2 * len(self._jobs):
+                self._compact_locked()
+
+    def add(self, url, ytdlp_path, options, state=STATE_WAITING):
+        """记录新任务，返回任务标识
+        """
+        key = uuid.uuid4().hex
+        self._append({'op': 'add', 'key': key, 'url': url, 'ytdlp_path': ytdlp_path,
+                      'options': _compact_options(options), 'state': state, 'progress': 0,
+                      'formats': None, 'created': time.time()})
+        return key
+
+    def update(self, key, **fields):
+        fields['updated'] = time.time()
+        self._append(dict(fields, op='update', key=key))
+
+    def finish(self, key, state=STATE_FINISHED):
+        """任务结束（完成、失败或被用户取消），不再需要继续
+        """
+        self._append({'op': 'end', 'key': key, 'state': state})
+
+    def unfinished(self):
+        """返回可以继续的任务，按创建时间排序
+        """
+        with self._lock:
+            jobs = [dict(job) for job in self._jobs.values() if job.get('state') in RESUMABLE_STATES]
+        return sorted(jobs, key=lambda job: job.get('created', 0))
+
+    def discard(self, keys):
+        for key in keys:
+            self.finish(key, STATE_CANCELLED)
+
+    def compact(self):
+        with self._lock:
+            self._compact_locked()
+
+    def _compact_locked(self):
+        """把日志重写为每个未完成任务一条记录，写入临时文件后原子替换
+        """
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            for job in self._jobs.values():
+                f.write(json.dumps(dict(job, op='add'), ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self._file.close()
+        os.replace(temp_path, self.path)
+        self._fsync_dir()
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self._records = len(self._jobs)
+
+    def _fsync_dir(self):
+        # 目录项也需要落盘，Windows 上无法打开目录，跳过
+        if os.name == 'nt':
+            return
+        fd = os.open(os.path.dirname(os.path.abspath(self.path)), os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def close(self):
+        """停止写入：程序退出时被中断的任务保持未完成状态，下次启动时可以继续
+        """
+        with self._lock:
+            if not self._closed:
+                self._closed = True
+                self._file.close()
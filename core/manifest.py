@@ -0,0 +1,35 @@
+"""下载完成清单：通过 --print-to-file after_move 记录每个最终文件的信息
+"""
+import os
+from collections import namedtuple
+
+MANIFEST_FIELDS = ('extractor_key', 'id', 'format_id', 'filesize,filesize_approx', 'vcodec', 'webpage_url', 'filepath')
+MANIFEST_TEMPLATE = '\t'.join(f'%({field})s' for field in MANIFEST_FIELDS)
+
+ManifestEntry = namedtuple('ManifestEntry', 'extractor video_id format_id filesize vcodec url filepath')
+
+
+def manifest_args(manifest_path):
+    """返回让 yt-dlp 写入完成清单的参数
+    """
+    return ['--print-to-file', 'after_move:' + MANIFEST_TEMPLATE, manifest_path]
+
+
+def read_manifest(manifest_path):
+    """读取完成清单，文件不存在时返回空列表；同一文件只保留一条
+    （调整带宽份额重启 yt-dlp 后，已完成的格式流会再记录一次）
+    """
+    entries = {}
+    if not os.path.exists(manifest_path):
+        return entries
+    with open(manifest_path, encoding='utf-8', errors='ignore') as f:
+        for line in f:
+            fields = line.rstrip('\r\n').split('\t', len(MANIFEST_FIELDS) - 1)
+            if len(fields) != len(MANIFEST_FIELDS):
+                continue
+            extractor, video_id, format_id, filesize, vcodec, url, filepath = fields
+            entries[filepath] = ManifestEntry(
+                extractor.lower(), video_id, format_id,
+                int(float(filesize)) if filesize not in ('NA', '') else None,
+                vcodec, url, filepath)
+    return list(entries.values())
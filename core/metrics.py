@@ -0,0 +1,308 @@
+"""下载与分析任务的指标，不依赖 Qt
+
+每个任务记录启动耗时、首字节时间、总耗时、下载字节数、平均/峰值速度、重试次数与合并耗时，
+汇总后由 MetricsExporter 定期写成 Prometheus 文本文件（供 node_exporter 的 textfile collector
+读取）与JSON文件，图形界面的统计页面直接读取 registry。
+"""
+import os
+import re
+import json
+import time
+import threading
+from collections import deque
+
+from core.fragment_tuner import host_key
+
+KIND_DOWNLOAD = 'download'
+KIND_ANALYZE = 'analyze'
+KIND_PLAYLIST = 'playlist'
+KIND_NAMES = {KIND_DOWNLOAD: "下载", KIND_ANALYZE: "视频分析", KIND_PLAYLIST: "播放列表分析"}
+
+RESULT_SUCCESS = 'success'
+RESULT_FAILED = 'failed'
+RESULT_CANCELLED = 'cancelled'
+RESULT_NAMES = {RESULT_SUCCESS: "成功", RESULT_FAILED: "失败", RESULT_CANCELLED: "取消"}
+
+# 保留明细的最近任务数
+RECENT_JOBS = 200
+# 导出间隔（秒）
+EXPORT_INTERVAL = 15.0
+PROM_FILE = 'ytdlp_tool.prom'
+JSON_FILE = 'ytdlp_tool_metrics.json'
+
+# yt-dlp 的重试提示，如 "Retrying (2/10)..."、"Retrying fragment 12 (1/10)..."
+_RETRY_RE = re.compile(r'Retrying (?:fragment \d+ )?\(\d+/')
+# 下载结束后的后处理（合并、提取音频、转换封装等）
+_POSTPROCESS_RE = re.compile(r'^\[(?:Merger|ExtractAudio|VideoConvertor|VideoRemuxer|Fixup\w*)\]')
+# 以 _sum / _count 导出的耗时
+_TIMINGS = ('duration', 'spawn', 'ttfb', 'merge')
+
+
+def _number(value):
+    """Prometheus 样本值：整数原样输出，小数保留6位
+    """
+    return str(round(value, 6)) if isinstance(value, float) else str(value)
+
+
+class JobMetrics:
+    """单个任务的指标，由执行任务的线程更新
+    """
+
+    def __init__(self, registry, kind, url):
+        self.registry = registry
+        self.kind = kind
+        self.url = url
+        self.host = host_key(url)
+        self.started = time.time()
+        self._start = time.monotonic()
+        self.spawn_seconds = None
+        self.ttfb_seconds = None
+        self.duration_seconds = None
+        self.merge_seconds = None
+        self.transfer_seconds = None
+        self.downloaded_bytes = 0
+        self.speed = None
+        self.peak_speed = 0.0
+        self.retries = 0
+        self.restarts = 0
+        self.cached = False
+        self.result = None
+        # 失败原因类别（见 core.errors）
+        self.error = None
+        self._streams = {}
+        self._merge_start = None
+        self._first_byte = None
+        self._process_start = None
+
+    def process_started(self):
+        """yt-dlp 开始启动时调用，到第一行输出的时间记为启动耗时；重新启动时不重复计算
+        """
+        if self._process_start is None:
+            self._process_start = time.monotonic()
+
+    def postprocess_started(self):
+        """下载结束、开始由后处理池合并或转换时调用
+        """
+        if self._merge_start is None:
+            self._merge_start = time.monotonic()
+
+    def on_line(self, line):
+        """处理 yt-dlp 输出的一行：记录启动耗时，并统计重试与后处理开始时间
+        """
+        if self.spawn_seconds is None:
+            self.spawn_seconds = time.monotonic() - (self._process_start or self._start)
+        if _RETRY_RE.search(line):
+            self.retries += 1
+        if self._merge_start is None and _POSTPROCESS_RE.match(line):
+            self._merge_start = time.monotonic()
+
+    def on_record(self, record):
+        """处理一条 ProgressRecord：按格式流记录已下载字节数、首字节时间（从任务开始计算）与速度
+        """
+        downloaded = int(record.downloaded or 0)
+        key = (record.video_id, record.format_id)
+        # 续传或重启后已下载字节数不会变小，取最大值
+        if downloaded > self._streams.get(key, 0):
+            self._streams[key] = downloaded
+        if downloaded and self._first_byte is None:
+            self._first_byte = time.monotonic()
+            self.ttfb_seconds = self._first_byte - self._start
+        if record.speed:
+            self.speed = record.speed
+            self.peak_speed = max(self.peak_speed, record.speed)
+
+    @property
+    def average_speed(self):
+        """传输阶段（首字节到后处理开始）的平均速度
+        """
+        if self.transfer_seconds:
+            return self.downloaded_bytes / self.transfer_seconds
+        return None
+
+    def finish(self, result):
+        end = time.monotonic()
+        self.result = result
+        self.speed = None
+        self.duration_seconds = end - self._start
+        self.downloaded_bytes = sum(self._streams.values())
+        if self._merge_start is not None:
+            self.merge_seconds = end - self._merge_start
+        if self._first_byte is not None:
+            self.transfer_seconds = (self._merge_start or end) - self._first_byte
+        self.registry.finish(self)
+
+    def as_dict(self):
+        # 运行中的任务按当前各格式流的进度计算
+        downloaded = self.downloaded_bytes if self.result else sum(self._streams.values())
+        return {
+            'kind': self.kind, 'url': self.url, 'host': self.host, 'started': self.started,
+            'result': self.result, 'cached': self.cached, 'duration_seconds': self.duration_seconds,
+            'spawn_seconds': self.spawn_seconds, 'ttfb_seconds': self.ttfb_seconds,
+            'merge_seconds': self.merge_seconds, 'downloaded_bytes': downloaded,
+            'average_speed': self.average_speed, 'peak_speed': self.peak_speed or None,
+            'retries': self.retries, 'restarts': self.restarts, 'error': self.error,
+        }
+
+
+class MetricsRegistry:
+    """进程内全部任务的指标汇总，线程安全
+    """
+
+    def __init__(self, recent=RECENT_JOBS):
+        self._lock = threading.Lock()
+        self.active = set()
+        self.recent = deque(maxlen=recent)
+        self.jobs_total = {}
+        self.timing_sums = {}
+        self.downloaded_bytes = 0
+        self.retries = 0
+        self.restarts = 0
+        self.cache_hits = 0
+        self.peak_speed = 0.0
+        self.version = 0
+
+    def start(self, kind, url):
+        job = JobMetrics(self, kind, url)
+        with self._lock:
+            self.active.add(job)
+            self.version += 1
+        return job
+
+    def finish(self, job):
+        with self._lock:
+            self.active.discard(job)
+            self.recent.append(job)
+            key = (job.kind, job.result)
+            self.jobs_total[key] = self.jobs_total.get(key, 0) + 1
+            for name in _TIMINGS:
+                value = getattr(job, f'{name}_seconds')
+                if value is not None:
+                    total, count = self.timing_sums.get((name, job.kind), (0.0, 0))
+                    self.timing_sums[(name, job.kind)] = (total + value, count + 1)
+            self.downloaded_bytes += job.downloaded_bytes
+            self.retries += job.retries
+            self.restarts += job.restarts
+            self.cache_hits += job.cached
+            self.peak_speed = max(self.peak_speed, job.peak_speed)
+            self.version += 1
+
+    def snapshot(self):
+        """当前指标的字典，用于JSON导出与统计页面
+        """
+        with self._lock:
+            active = list(self.active)
+            recent = list(self.recent)
+            totals = {
+                'jobs': [{'kind': kind, 'result': result, 'count': count}
+                         for (kind, result), count in sorted(self.jobs_total.items())],
+                'timings': [{'name': name, 'kind': kind, 'sum': total, 'count': count}
+                            for (name, kind), (total, count) in sorted(self.timing_sums.items())],
+                'downloaded_bytes': self.downloaded_bytes,
+                'retries': self.retries,
+                'restarts': self.restarts,
+                'analysis_cache_hits': self.cache_hits,
+                'peak_speed': self.peak_speed,
+            }
+        return {
+            'generated': time.time(),
+            'current_speed': sum(job.speed or 0 for job in active),
+            'active': [job.as_dict() for job in active],
+            'totals': totals,
+            'recent': [job.as_dict() for job in recent],
+        }
+
+    def prometheus_text(self, snapshot=None):
+        """Prometheus 文本格式（text exposition format）
+        """
+        snapshot = snapshot or self.snapshot()
+        totals = snapshot['totals']
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP ytdlp_tool_{name} {help_text}")
+            lines.append(f"# TYPE ytdlp_tool_{name} {kind}")
+            for labels, value in samples:
+                label_text = ','.join(f'{key}="{val}"' for key, val in labels.items())
+                suffix = f"{{{label_text}}}" if label_text else ''
+                lines.append(f"ytdlp_tool_{name}{suffix} {_number(value)}")
+
+        metric('jobs_total', 'counter', 'Finished jobs by kind and result.',
+               [({'kind': row['kind'], 'result': row['result']}, row['count']) for row in totals['jobs']])
+        active_counts = {kind: 0 for kind in KIND_NAMES}
+        for job in snapshot['active']:
+            active_counts[job['kind']] = active_counts.get(job['kind'], 0) + 1
+        metric('active_jobs', 'gauge', 'Jobs currently running.',
+               [({'kind': kind}, count) for kind, count in active_counts.items()])
+        metric('downloaded_bytes_total', 'counter', 'Bytes downloaded by finished jobs.',
+               [({}, totals['downloaded_bytes'])])
+        metric('retries_total', 'counter', 'Retries reported by yt-dlp.', [({}, totals['retries'])])
+        metric('restarts_total', 'counter', 'yt-dlp restarts to apply a new bandwidth share.',
+               [({}, totals['restarts'])])
+        metric('analysis_cache_hits_total', 'counter', 'Analyses answered from the local cache.',
+               [({}, totals['analysis_cache_hits'])])
+        metric('current_speed_bytes', 'gauge', 'Sum of the current speed of running downloads.',
+               [({}, float(snapshot['current_speed']))])
+        metric('peak_speed_bytes', 'gauge', 'Highest speed reported by any finished job.',
+               [({}, float(totals['peak_speed']))])
+        for name, help_text in (('duration', 'Job duration.'),
+                                ('spawn', 'Time from start until yt-dlp printed its first line.'),
+                                ('ttfb', 'Time from start until the first downloaded byte.'),
+                                ('merge', 'Post-processing (merge, audio extraction) time.')):
+            rows = [row for row in totals['timings'] if row['name'] == name]
+            lines.append(f"# HELP ytdlp_tool_{name}_seconds {help_text}")
+            lines.append(f"# TYPE ytdlp_tool_{name}_seconds summary")
+            for row in rows:
+                lines.append(f'ytdlp_tool_{name}_seconds_sum{{kind="{row["kind"]}"}} {_number(row["sum"])}')
+                lines.append(f'ytdlp_tool_{name}_seconds_count{{kind="{row["kind"]}"}} {row["count"]}')
+        return '\n'.join(lines) + '\n'
+
+    def export(self, directory):
+        """把指标写入 directory 下的 Prometheus 文本文件与JSON文件，先写临时文件再替换，读取方不会读到一半
+        """
+        os.makedirs(directory, exist_ok=True)
+        snapshot = self.snapshot()
+        for name, content in ((PROM_FILE, self.prometheus_text(snapshot)),
+                              (JSON_FILE, json.dumps(snapshot, ensure_ascii=False, indent=1))):
+            path = os.path.join(directory, name)
+            temp_path = path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(content)
+            os.replace(temp_path, path)
+
+
+class MetricsExporter(threading.Thread):
+    """后台线程，每隔 interval 秒导出一次；没有运行中的任务且指标未变化时跳过
+    """
+
+    def __init__(self, registry, directory, interval=EXPORT_INTERVAL):
+        super().__init__(daemon=True)
+        self.registry = registry
+        self.directory = directory
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._exported_version = None
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.export_now()
+
+    def export_now(self, force=False):
+        version = self.registry.version
+        if not force and version == self._exported_version and not self.registry.active:
+            return
+        try:
+            self.registry.export(self.directory)
+            self._exported_version = version
+        except OSError:
+            # 导出目录不可写时不影响下载，下次再试
+            pass
+
+    def stop(self):
+        """停止并最后导出一次
+        """
+        self._stop_event.set()
+        self.export_now(force=True)
+
+
+# 进程内共用的指标
+registry = MetricsRegistry()
@@ -0,0 +1,14 @@
+"""程序目录与数据目录路径
+"""
+import os
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONFIG_PATH = os.path.join(APP_DIR, 'config.ini')
+DATA_DIR = os.path.join(APP_DIR, 'data')
+
+
+def data_path(name):
+    """返回数据目录下的文件路径，必要时创建数据目录
+    """
+    os.makedirs(DATA_DIR, exist_ok=True)
+    return os.path.join(DATA_DIR, name)
@@ -0,0 +1,186 @@
+"""独立的后处理池：下载完成后由 ffmpeg 转换音频、合并音视频，不占用下载任务
+
+yt-dlp 自己做后处理时，ffmpeg 在同一个 yt-dlp 进程中运行，期间该任务不再下载任何内容。
+交给后处理池后下载任务可以立即让出名额，网络与 CPU 两类工作在多核机器上并行。
+池中同时运行的 ffmpeg 数量与每个 ffmpeg 的线程数都有上限，合计不超过 CPU 核数。
+未启用时由 yt-dlp 使用同一个 ffmpeg 合并；找不到 ffmpeg 时视频与音频分别保存。
+"""
+import os
+import shutil
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from core.process_control import ProcessTree, popen_kwargs
+
+# 同时运行的 ffmpeg 数量设置为该值时按 CPU 核数决定
+AUTO_WORKERS = 0
+# 转换为 mp3 时的 VBR 质量，与 yt-dlp 默认的 --audio-quality 5 相同
+MP3_QUALITY = '5'
+# 可以直接合并、不需要转换的视频/音频扩展名组合，其余使用 mkv
+MERGE_CONTAINERS = {('mp4', 'm4a'): 'mp4', ('mp4', 'mp4'): 'mp4', ('webm', 'webm'): 'webm'}
+
+
+def find_ffmpeg(location=''):
+    """ffmpeg 路径：location 可以是 ffmpeg 可执行文件或其所在目录，未设置时在 PATH 中查找
+    """
+    if location:
+        if os.path.isdir(location):
+            location = os.path.join(location, 'ffmpeg.exe' if os.name == 'nt' else 'ffmpeg')
+        return location if os.path.exists(location) else None
+    return shutil.which('ffmpeg')
+
+
+def merge_output_template(output_template):
+    """分别下载待合并的格式流时，在文件名中加入格式ID，避免视频与音频扩展名相同时互相覆盖
+    """
+    if output_template.endswith('.%(ext)s'):
+        return output_template[:-len('.%(ext)s')] + '.f%(format_id)s.%(ext)s'
+    return output_template
+
+
+def merge_target(video_path, format_id, audio_ext):
+    """合并后的文件路径：去掉 merge_output_template 加入的格式ID，按音视频扩展名选择容器
+    """
+    base, ext = os.path.splitext(video_path)
+    suffix = f'.f{format_id}'
+    if base.endswith(suffix):
+        base = base[:-len(suffix)]
+    container = MERGE_CONTAINERS.get((ext.lstrip('.').lower(), audio_ext.lower()), 'mkv')
+    return f'{base}.{container}'
+
+
+def _temp_path(path):
+    """与 yt-dlp 相同，临时文件保留原扩展名，ffmpeg 据此判断输出格式
+    """
+    base, ext = os.path.splitext(path)
+    return f'{base}.temp{ext}'
+
+
+class PostProcessJob:
+    """一个后处理任务：把 sources 处理为 target，成功后删除源文件
+    """
+
+    def __init__(self, kind, sources, target, arguments):
+        self.kind = kind
+        self.sources = sources
+        self.target = target
+        self.arguments = arguments
+        self.future = None
+        self.cancelled = False
+        self._tree = None
+
+    def cancel(self):
+        self.cancelled = True
+        if self.future is not None:
+            self.future.cancel()
+        if self._tree is not None:
+            self._tree.terminate()
+
+    def wait(self):
+        """等待结束，返回 (是否成功, 说明)
+        """
+        try:
+            return self.future.result()
+        except Exception as e:
+            return False, f"后处理出错: {str(e)}"
+
+
+class PostProcessPool:
+    """线程安全的 ffmpeg 后处理池
+    """
+
+    def __init__(self, max_workers=AUTO_WORKERS, ffmpeg_location='', enabled=True):
+        self.max_workers = max_workers
+        self.ffmpeg_location = ffmpeg_location
+        self.enabled = enabled
+        self._executor = None
+        self._executor_size = None
+        self._lock = threading.Lock()
+
+    def configure(self, max_workers=AUTO_WORKERS, ffmpeg_location='', enabled=True):
+        with self._lock:
+            self.max_workers = max_workers
+            self.ffmpeg_location = ffmpeg_location
+            self.enabled = enabled
+
+    def workers(self):
+        """同时运行的 ffmpeg 数量，自动时为CPU核数的一半
+        """
+        return self.max_workers or max(1, (os.cpu_count() or 2) // 2)
+
+    def threads_per_job(self):
+        """每个 ffmpeg 的线程数，使同时运行的 ffmpeg 合计不超过CPU核数
+        """
+        return max(1, (os.cpu_count() or 1) // self.workers())
+
+    def ffmpeg(self):
+        return find_ffmpeg(self.ffmpeg_location)
+
+    def available(self):
+        return self.enabled and self.ffmpeg() is not None
+
+    def extract_audio(self, source, codec='mp3'):
+        """提取音频并转换为 codec，源文件已是该格式时只去掉视频流
+        """
+        target = os.path.splitext(source)[0] + f'.{codec}'
+        if os.path.splitext(source)[1].lstrip('.').lower() == codec:
+            arguments = ['-i', source, '-vn', '-c:a', 'copy']
+        else:
+            arguments = ['-i', source, '-vn', '-c:a', 'libmp3lame' if codec == 'mp3' else codec,
+                         '-q:a', MP3_QUALITY]
+        return self._submit(PostProcessJob('extract_audio', [source], target, arguments))
+
+    def merge(self, video, audio, target):
+        """不转码，把视频流与音频流合并为 target
+        """
+        arguments = ['-i', video, '-i', audio, '-map', '0:v:0', '-map', '1:a:0', '-c', 'copy']
+        if target.endswith('.mp4'):
+            arguments.extend(['-movflags', '+faststart'])
+        return self._submit(PostProcessJob('merge', [video, audio], target, arguments))
+
+    def _submit(self, job):
+        with self._lock:
+            size = self.workers()
+            if self._executor is None or self._executor_size != size:
+                # 调整并发数后新任务使用新的线程池，旧线程池处理完已提交的任务后退出
+                if self._executor is not None:
+                    self._executor.shutdown(wait=False)
+                self._executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix='postprocess')
+                self._executor_size = size
+            job.future = self._executor.submit(self._run, job)
+        return job
+
+    def _run(self, job):
+        ffmpeg = self.ffmpeg()
+        if ffmpeg is None:
+            return False, "找不到 ffmpeg"
+        if job.cancelled:
+            return False, "后处理已取消"
+        temp_path = _temp_path(job.target)
+        cmd = ([ffmpeg, '-y', '-nostdin', '-hide_banner', '-loglevel', 'error']
+               + job.arguments + ['-threads', str(self.threads_per_job()), temp_path])
+        process = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                                   universal_newlines=True, encoding='utf-8', errors='ignore', **popen_kwargs())
+        # 与 yt-dlp 相同放在独立进程组中，取消或退出程序时一起结束
+        job._tree = ProcessTree(process)
+        try:
+            _, errors = process.communicate()
+        finally:
+            job._tree.release()
+        if process.returncode != 0 or job.cancelled:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            if job.cancelled:
+                return False, "后处理已取消"
+            lines = [line for line in errors.splitlines() if line.strip()]
+            return False, f"ffmpeg 返回码 {process.returncode}: {lines[-1] if lines else ''}".strip()
+        os.replace(temp_path, job.target)
+        for source in job.sources:
+            if source != job.target and os.path.exists(source):
+                os.remove(source)
+        return True, job.target
+
+
+# 进程内所有下载共用的后处理池
+pool = PostProcessPool()
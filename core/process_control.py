@@ -0,0 +1,182 @@
+"""子进程树控制：yt-dlp 及其启动的 ffmpeg 等子进程放在独立的进程组中，统一取消、暂停与继续
+
+- POSIX：以新会话启动，向整个进程组发送 SIGTERM / SIGKILL / SIGSTOP / SIGCONT
+- Windows：以新进程组启动；安装了 psutil 时逐个挂起/结束子进程，否则用 taskkill /T 结束进程树，不支持暂停
+"""
+import os
+import sys
+import atexit
+import time
+import signal
+import subprocess
+import threading
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+IS_WINDOWS = sys.platform == 'win32'
+# 取消时先请求退出，超过该时间（秒）仍未结束则强制结束
+GRACE_PERIOD = 3.0
+
+_live_trees = set()
+_live_lock = threading.Lock()
+
+
+def popen_kwargs():
+    """让子进程运行在独立进程组中的 Popen 参数
+    """
+    if IS_WINDOWS:
+        return {'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {'start_new_session': True}
+
+
+class ProcessTree:
+    """以进程组为单位控制一个子进程及其全部后代
+    """
+
+    def __init__(self, process):
+        self.process = process
+        self.paused = False
+        self._kill_timer = None
+        self._released = False
+        with _live_lock:
+            _live_trees.add(self)
+
+    def alive(self):
+        """进程树中是否还有进程：POSIX 上检查整个进程组，yt-dlp 退出后组内可能仍有 ffmpeg 等子进程
+        """
+        if self.process.poll() is None:
+            return True
+        if IS_WINDOWS:
+            return False
+        try:
+            os.killpg(self.process.pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    def _signal_group(self, sig):
+        try:
+            os.killpg(self.process.pid, sig)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    def _descendants(self):
+        try:
+            parent = psutil.Process(self.process.pid)
+            return [parent] + parent.children(recursive=True)
+        except psutil.Error:
+            return []
+
+    def terminate(self, grace=GRACE_PERIOD):
+        """请求整个进程树退出，grace 秒后仍未退出则强制结束；不阻塞调用方
+        """
+        if not self.alive():
+            return
+        if IS_WINDOWS:
+            if psutil is not None:
+                for proc in self._descendants():
+                    try:
+                        proc.terminate()
+                    except psutil.Error:
+                        pass
+            else:
+                self.process.terminate()
+        else:
+            self._signal_group(signal.SIGTERM)
+            # 已暂停的进程要先继续运行才能处理 SIGTERM
+            self._signal_group(signal.SIGCONT)
+        self.paused = False
+        if self._kill_timer is None:
+            self._kill_timer = threading.Timer(grace, self.kill)
+            self._kill_timer.daemon = True
+            self._kill_timer.start()
+
+    def kill(self):
+        """立即强制结束整个进程树
+        """
+        if IS_WINDOWS:
+            if psutil is not None:
+                for proc in self._descendants():
+                    try:
+                        proc.kill()
+                    except psutil.Error:
+                        pass
+            elif self.alive():
+                subprocess.run(['taskkill', '/T', '/F', '/PID', str(self.process.pid)],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        else:
+            self._signal_group(signal.SIGKILL)
+        with _live_lock:
+            if self._released:
+                _live_trees.discard(self)
+
+    def suspend(self):
+        """暂停整个进程树，不支持时返回False
+        """
+        if not self.alive():
+            return False
+        if IS_WINDOWS:
+            if psutil is None:
+                return False
+            for proc in self._descendants():
+                try:
+                    proc.suspend()
+                except psutil.Error:
+                    pass
+        else:
+            self._signal_group(signal.SIGSTOP)
+        self.paused = True
+        return True
+
+    def resume(self):
+        if not self.paused:
+            return False
+        if IS_WINDOWS:
+            for proc in self._descendants():
+                try:
+                    proc.resume()
+                except psutil.Error:
+                    pass
+        else:
+            self._signal_group(signal.SIGCONT)
+        self.paused = False
+        return True
+
+    def release(self):
+        """yt-dlp 进程结束后调用；进程组中已没有进程时取消强制结束并从存活列表中移除，
+        仍有忽略 SIGTERM 的子进程时保留计时器，由 kill 结束剩余的进程
+        """
+        alive = self.alive()
+        if not alive and self._kill_timer is not None:
+            self._kill_timer.cancel()
+        with _live_lock:
+            self._released = True
+            # 同时清理之前留在列表中、现已结束的进程组
+            for tree in [tree for tree in _live_trees if tree._released]:
+                if not (alive if tree is self else tree.alive()):
+                    _live_trees.discard(tree)
+
+
+def terminate_all(timeout=GRACE_PERIOD):
+    """结束所有仍在运行的进程树：先全部请求退出，共同等待最多 timeout 秒后强制结束剩余的进程
+    """
+    with _live_lock:
+        trees = list(_live_trees)
+    deadline = time.monotonic() + timeout
+    for tree in trees:
+        tree.terminate(timeout)
+    for tree in trees:
+        while tree.alive() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        if tree.alive():
+            tree.kill()
+        tree.release()
+
+
+# 即使窗口没有正常关闭，解释器退出时也不留下子进程
+atexit.register(terminate_all, 1.0)
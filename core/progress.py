@@ -0,0 +1,178 @@
+"""结构化下载进度：通过 yt-dlp 的 --progress-template 输出固定字段，逐行解析为进度记录
+
+使用 aria2c 下载时 yt-dlp 只在结束时报告一次进度，下载过程中的进度从 aria2c 的控制台输出中解析。
+"""
+import re
+from collections import namedtuple
+
+PROGRESS_PREFIX = '[progress] '
+PROGRESS_FIELDS = ('info.id', 'info.format_id', 'progress.status', 'progress.downloaded_bytes',
+                   'progress.total_bytes', 'progress.total_bytes_estimate', 'progress.speed',
+                   'progress.eta', 'progress.fragment_index', 'progress.fragment_count')
+PROGRESS_TEMPLATE = 'download:' + PROGRESS_PREFIX + '|'.join(f'%({field})s' for field in PROGRESS_FIELDS)
+
+# 单条进度记录（对应一个视频的一个格式流）
+ProgressRecord = namedtuple('ProgressRecord', 'video_id format_id status downloaded total speed eta '
+                                              'fragment_index fragment_count')
+# 合并后的整体进度
+AggregateProgress = namedtuple('AggregateProgress', 'percent downloaded total speed eta format_id '
+                                                    'fragment_index fragment_count')
+
+
+def _number(value):
+    if value in ('NA', 'None', ''):
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def parse_progress_line(line):
+    """解析 --progress-template 输出的进度行，非进度行返回None
+    """
+    if not line.startswith(PROGRESS_PREFIX):
+        return None
+    fields = line[len(PROGRESS_PREFIX):].rstrip().split('|')
+    if len(fields) != len(PROGRESS_FIELDS):
+        return None
+    video_id, format_id, status = fields[0], fields[1], fields[2]
+    downloaded, total, estimate, speed, eta, fragment_index, fragment_count = map(_number, fields[3:])
+    return ProgressRecord(video_id, format_id, status, downloaded, total or estimate, speed, eta,
+                          fragment_index, fragment_count)
+
+
+# aria2c 的控制台进度，如 "[#4b1620 10MiB/28MiB(34%) CN:8 DL:4.9MiB ETA:3s]"
+_ARIA2C_RE = re.compile(r'^\[#\w+ ([\d.]+)(\w*B)/([\d.]+)(\w*B)(?:\(\d+%\))? CN:\d+(?: SD:\d+)?'
+                        r' DL:([\d.]+)(\w*B)(?: ETA:(\w+))?\]')
+_ARIA2C_UNITS = {'B': 1, 'KiB': 1024, 'MiB': 1024 ** 2, 'GiB': 1024 ** 3, 'TiB': 1024 ** 4}
+_ETA_RE = re.compile(r'(\d+)([hms])')
+# yt-dlp 开始下载一个视频时输出的格式信息，如 "[info] abc: Downloading 2 format(s): 137+140"
+_FORMATS_RE = re.compile(r'^\[info\] (.+?): Downloading \d+ format\(s\): (.+)$')
+
+
+def _aria2c_bytes(value, unit):
+    return float(value) * _ARIA2C_UNITS.get(unit, 1)
+
+
+class Aria2cProgressParser:
+    """把 aria2c 的控制台进度转为 ProgressRecord
+
+    aria2c 的输出中没有视频ID与格式ID，从 yt-dlp 之前输出的格式信息与 "[download] Destination" 行推断。
+    """
+
+    def __init__(self):
+        self.video_id = None
+        self.formats = []
+        self._index = -1
+
+    def feed(self, line):
+        """处理一行输出，是 aria2c 的进度时返回 ProgressRecord，否则返回None
+        """
+        match = _FORMATS_RE.match(line)
+        if match:
+            self.video_id = match.group(1)
+            self.formats = [fmt for fmt in re.split(r'[+, ]+', match.group(2)) if fmt]
+            self._index = -1
+            return None
+        if line.startswith('[download] Destination:'):
+            # 每个格式流开始下载时输出一次
+            self._index += 1
+            return None
+        match = _ARIA2C_RE.match(line)
+        if not match:
+            return None
+        downloaded = _aria2c_bytes(match.group(1), match.group(2))
+        total = _aria2c_bytes(match.group(3), match.group(4))
+        speed = _aria2c_bytes(match.group(5), match.group(6))
+        eta = sum(int(value) * {'h': 3600, 'm': 60, 's': 1}[unit]
+                  for value, unit in _ETA_RE.findall(match.group(7))) if match.group(7) else None
+        format_id = self.formats[min(max(self._index, 0), len(self.formats) - 1)] if self.formats else None
+        return ProgressRecord(self.video_id, format_id, 'downloading', downloaded, total or None, speed, eta,
+                              None, None)
+
+
+class ProgressAggregator:
+    """把同一视频多个格式流（如 -f 视频,音频）的进度合并为一个按字节加权的整体进度
+
+    所有流的大小都已知时按字节加权；否则按流数量平均分配，避免进度条两次从0走到100。
+    """
+
+    def __init__(self, expected_sizes=None, stream_count=1):
+        self.expected_sizes = dict(expected_sizes or {})
+        self.stream_count = max(1, stream_count)
+        self._video_id = None
+        self._streams = {}
+
+    def update(self, record):
+        if record.video_id != self._video_id:
+            # 播放列表中开始下载新视频时重新计算
+            self._video_id = record.video_id
+            self._streams = {}
+        total = record.total or self.expected_sizes.get(record.format_id)
+        downloaded = record.downloaded or 0
+        if record.status == 'finished':
+            # 已存在的文件只会报告一次 finished，没有已下载字节数
+            downloaded = max(downloaded, total or 0)
+            total = total or downloaded
+        self._streams[record.format_id] = (downloaded, total, record.status == 'finished')
+        return self._aggregate(record)
+
+    def _aggregate(self, record):
+        expected = dict(self.expected_sizes)
+        for format_id, (downloaded, total, finished) in self._streams.items():
+            expected[format_id] = total
+        stream_count = max(self.stream_count, len(self._streams))
+        downloaded_sum = sum(downloaded for downloaded, _, _ in self._streams.values())
+
+        if len(expected) >= stream_count and all(expected.values()):
+            total_sum = sum(expected.values())
+            percent = downloaded_sum * 100.0 / total_sum if total_sum else 0.0
+        else:
+            total_sum = None
+            fractions = 0.0
+            for downloaded, total, finished in self._streams.values():
+                if finished:
+                    fractions += 1.0
+                elif total:
+                    fractions += min(1.0, downloaded / total)
+            percent = fractions * 100.0 / stream_count
+
+        return AggregateProgress(min(100.0, percent), downloaded_sum, total_sum, record.speed, record.eta,
+                                 record.format_id, record.fragment_index, record.fragment_count)
+
+
+def format_bytes(value):
+    """把字节数格式化为便于阅读的字符串
+    """
+    if value is None:
+        return '未知'
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if abs(value) < 1024:
+            return f"{value:.1f}{unit}"
+        value /= 1024.0
+    return f"{value:.1f}TiB"
+
+
+def format_eta(seconds):
+    if seconds is None:
+        return '--:--'
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes:02d}:{seconds:02d}"
+
+
+def describe_progress(progress):
+    """生成进度条上显示的文字
+    """
+    parts = [f"下载进度: {int(progress.percent)}%"]
+    if progress.total:
+        parts.append(f"{format_bytes(progress.downloaded)}/{format_bytes(progress.total)}")
+    if progress.speed:
+        parts.append(f"{format_bytes(progress.speed)}/s")
+    if progress.eta is not None:
+        parts.append(f"剩余 {format_eta(progress.eta)}")
+    if progress.fragment_count:
+        parts.append(f"分片 {int(progress.fragment_index or 0)}/{int(progress.fragment_count)}")
+    return ' | '.join(parts)
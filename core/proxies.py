@@ -0,0 +1,235 @@
+"""代理池：把下载与分析分散到多个 HTTP/SOCKS 代理上，不依赖 Qt
+
+每次运行 yt-dlp 前按策略（最少连接或轮询）取一个代理，结束后归还并报告结果。
+连续失败 MAX_FAILURES 次的代理被剔除，由后台线程定期检查所有代理的连通性与延迟，恢复后重新使用；
+吞吐量明显低于最快代理的出口被降级，只在其他代理都不可用或都很忙时使用。
+"""
+import time
+import socket
+import threading
+import urllib.request
+from urllib.parse import urlsplit
+
+from core.errors import ERROR_FORBIDDEN, ERROR_NETWORK, ERROR_RATE_LIMITED
+from core.progress import format_bytes
+
+STRATEGY_LEAST_LOADED = 'least_loaded'
+STRATEGY_ROUND_ROBIN = 'round_robin'
+STRATEGY_NAMES = {
+    STRATEGY_LEAST_LOADED: "最少连接",
+    STRATEGY_ROUND_ROBIN: "轮询",
+}
+# 健康检查请求的地址，返回 204 的轻量页面
+DEFAULT_CHECK_URL = 'http://www.gstatic.com/generate_204'
+CHECK_INTERVAL = 300.0
+CHECK_TIMEOUT = 10.0
+# 连续失败该次数后剔除
+MAX_FAILURES = 3
+# 吞吐量低于最快代理的该比例时降级
+DEMOTE_RATIO = 0.3
+# 新测量值与历史吞吐量的平滑系数
+SMOOTHING = 0.3
+# 这些失败类别多半与出口有关（网络中断、被限流或拒绝），计入代理的失败次数
+PROXY_ERRORS = (ERROR_NETWORK, ERROR_RATE_LIMITED, ERROR_FORBIDDEN)
+
+
+def display_proxy(url):
+    """用于日志与界面显示的代理地址，去掉用户名与密码
+    """
+    parts = urlsplit(url)
+    if parts.username is None:
+        return url
+    host = parts.hostname + (f':{parts.port}' if parts.port else '')
+    return f'{parts.scheme}://***@{host}'
+
+
+def probe(url, check_url=DEFAULT_CHECK_URL, timeout=CHECK_TIMEOUT):
+    """检查一个代理，返回延迟秒数，失败时抛出 OSError
+
+    HTTP 代理通过它请求 check_url；SOCKS 代理只建立连接并完成 SOCKS5 握手，不依赖第三方库。
+    """
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    start = time.monotonic()
+    if scheme.startswith('socks'):
+        with socket.create_connection((parts.hostname, parts.port or 1080), timeout) as sock:
+            if scheme.startswith('socks5'):
+                # 提供"无需认证"与（有用户名时）"用户名/密码"两种方式
+                sock.sendall(b'\x05\x02\x00\x02' if parts.username else b'\x05\x01\x00')
+                reply = sock.recv(2)
+                if len(reply) < 2 or reply[0] != 5 or reply[1] == 0xff:
+                    raise OSError("SOCKS5 握手失败")
+    else:
+        opener = urllib.request.build_opener(urllib.request.ProxyHandler({'http': url, 'https': url}))
+        with opener.open(check_url, timeout=timeout) as response:
+            response.read(1024)
+    return time.monotonic() - start
+
+
+class _Proxy:
+    def __init__(self, url):
+        self.url = url
+        self.active = 0
+        self.failures = 0
+        self.evicted = False
+        self.evicted_at = 0.0
+        self.latency = None
+        self.throughput = None
+        self.last_error = None
+
+
+class ProxyLease:
+    """一次运行借用的代理，结束后调用 release 报告结果
+    """
+
+    def __init__(self, pool, proxy):
+        self.url = proxy.url
+        self._pool = pool
+        self._proxy = proxy
+        self._released = False
+
+    def release(self, success, speed=None, category=None):
+        """speed 为这次运行的平均速度（字节/秒），category 为失败类别（见 core.errors）
+        """
+        self._pool.release(self, success, speed, category)
+
+
+class ProxyPool:
+    """线程安全的代理池；没有配置代理时 acquire 返回None，直接连接
+    """
+
+    def __init__(self):
+        self.strategy = STRATEGY_LEAST_LOADED
+        self.check_url = DEFAULT_CHECK_URL
+        self.check_interval = CHECK_INTERVAL
+        self._proxies = []
+        self._next = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._checker = None
+
+    def configure(self, urls, strategy=STRATEGY_LEAST_LOADED, check_url=''):
+        """设置代理列表，保留仍在列表中的代理的统计，并在后台开始定期检查
+        """
+        with self._lock:
+            existing = {proxy.url: proxy for proxy in self._proxies}
+            self._proxies = [existing.get(url) or _Proxy(url) for url in dict.fromkeys(urls) if url]
+            self.strategy = strategy
+            self.check_url = check_url or DEFAULT_CHECK_URL
+            start = self._proxies and self._checker is None
+            if start:
+                self._checker = threading.Thread(target=self._check_loop, daemon=True, name='proxy-check')
+        if start:
+            self._checker.start()
+        self.check_now()
+
+    def enabled(self):
+        with self._lock:
+            return bool(self._proxies)
+
+    def acquire(self, exclude=None):
+        """按策略取一个代理，优先避开 exclude（上一次失败的代理）；没有配置代理时返回None
+        """
+        with self._lock:
+            if not self._proxies:
+                return None
+            healthy = [proxy for proxy in self._proxies if not proxy.evicted]
+            # 全部被剔除时仍然使用，等健康检查恢复
+            candidates = [proxy for proxy in healthy if proxy.url != exclude] or healthy or self._proxies
+            best = max((proxy.throughput or 0 for proxy in candidates), default=0)
+            demoted = {proxy.url for proxy in candidates
+                       if best and proxy.throughput is not None and proxy.throughput < best * DEMOTE_RATIO}
+            if self.strategy == STRATEGY_ROUND_ROBIN:
+                preferred = [proxy for proxy in candidates if proxy.url not in demoted] or candidates
+                proxy = preferred[self._next % len(preferred)]
+                self._next += 1
+            else:
+                # 最少连接：按吞吐量加权，较快的出口可以同时承担更多任务，较慢的出口在其他代理都很忙时才使用
+                def load(proxy):
+                    weight = max(proxy.throughput / best, 0.1) if best and proxy.throughput else 1.0
+                    return (proxy.active + 1) / weight, proxy.latency or 0
+                proxy = min(candidates, key=load)
+            proxy.active += 1
+            return ProxyLease(self, proxy)
+
+    def release(self, lease, success, speed=None, category=None):
+        with self._lock:
+            if lease._released:
+                return
+            lease._released = True
+            proxy = lease._proxy
+            proxy.active = max(0, proxy.active - 1)
+            if speed:
+                proxy.throughput = speed if proxy.throughput is None else (
+                    proxy.throughput * (1 - SMOOTHING) + speed * SMOOTHING)
+            if success:
+                proxy.failures = 0
+            elif category in PROXY_ERRORS:
+                proxy.failures += 1
+                proxy.last_error = category
+                if proxy.failures >= MAX_FAILURES and not proxy.evicted:
+                    proxy.evicted = True
+                    proxy.evicted_at = time.monotonic()
+
+    def check_now(self):
+        """唤醒后台线程立即检查全部代理
+        """
+        self._wake.set()
+
+    def check_all(self):
+        """检查全部代理（阻塞），剔除不可用的代理并恢复已可用的代理
+
+        因下载失败被剔除的代理至少停用一个检查间隔，连接正常不代表出口没有被站点限流。
+        """
+        with self._lock:
+            proxies = list(self._proxies)
+            check_url = self.check_url
+        for proxy in proxies:
+            try:
+                latency = probe(proxy.url, check_url)
+            except Exception as e:
+                with self._lock:
+                    proxy.latency = None
+                    if not proxy.evicted:
+                        proxy.evicted = True
+                        proxy.evicted_at = time.monotonic()
+                    proxy.failures = max(proxy.failures, MAX_FAILURES)
+                    proxy.last_error = str(e) or type(e).__name__
+                continue
+            with self._lock:
+                proxy.latency = latency
+                if proxy.evicted and time.monotonic() - proxy.evicted_at < self.check_interval / 2:
+                    continue
+                proxy.evicted = False
+                proxy.failures = 0
+                proxy.last_error = None
+
+    def _check_loop(self):
+        while True:
+            self._wake.wait(self.check_interval)
+            self._wake.clear()
+            self.check_all()
+
+    def describe(self):
+        """每个代理一行的状态，用于设置页面显示
+        """
+        with self._lock:
+            proxies = list(self._proxies)
+        lines = []
+        for proxy in proxies:
+            state = "已剔除" if proxy.evicted else "可用"
+            parts = [f"{display_proxy(proxy.url)}: {state}"]
+            if proxy.latency is not None:
+                parts.append(f"延迟 {proxy.latency * 1000:.0f} ms")
+            if proxy.throughput:
+                parts.append(f"{format_bytes(proxy.throughput)}/s")
+            if proxy.active:
+                parts.append(f"{proxy.active} 个进行中")
+            if proxy.evicted and proxy.last_error:
+                parts.append(proxy.last_error)
+            lines.append("，".join(parts))
+        return lines
+
+
+# 进程内所有下载与分析共用
+pool = ProxyPool()
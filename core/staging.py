@@ -0,0 +1,181 @@
+"""暂存目录与磁盘空间准入，不依赖 Qt
+
+设置暂存目录后，每个任务在暂存目录下的独立子目录中下载，.part 文件、分片与合并用的临时文件都写在暂存目录
+（通常是本地的快速磁盘）中，任务结束后再把完成的文件移动到输出目录：同一文件系统上直接重命名；
+不同文件系统时先复制为输出目录中的临时文件，写完后再重命名，输出目录中不会出现只复制了一半的文件。
+
+开始下载前按分析得到的格式大小估算需要的空间，暂存目录与输出目录都放得下（扣除其他运行中任务预留、尚未写入的空间）
+时才开始；放不下时等待其他任务结束，没有其他任务在运行时直接失败。
+"""
+import os
+import re
+import shutil
+import threading
+
+from core.progress import format_bytes
+
+# 每个磁盘至少保留的空闲空间
+MIN_FREE = 256 * 1024 * 1024
+# 下载或处理中的临时文件，任务结束时不移动
+_TEMP_SUFFIXES = ('.part', '.ytdl', '.moving')
+_TEMP_MARKERS = ('.part-Frag',)
+# 后处理（yt-dlp 与后处理池）写出的 <文件名>.temp.<扩展名>
+_TEMP_OUTPUT_RE = re.compile(r'\.temp\.[^.]+$')
+
+
+def _existing(path):
+    """path 或其最近的已存在的上级目录
+    """
+    path = os.path.abspath(path)
+    while not os.path.exists(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    return path
+
+
+def volume_of(path):
+    return os.stat(_existing(path)).st_dev
+
+
+def free_space(path):
+    return shutil.disk_usage(_existing(path)).free
+
+
+def is_temporary(name):
+    return (name.endswith(_TEMP_SUFFIXES) or any(marker in name for marker in _TEMP_MARKERS)
+            or _TEMP_OUTPUT_RE.search(name) is not None)
+
+
+def move_file(source, target):
+    """把 source 移动为 target：同一文件系统上直接重命名，否则先复制为临时文件再重命名
+    """
+    os.makedirs(os.path.dirname(target) or '.', exist_ok=True)
+    try:
+        os.replace(source, target)
+        return
+    except OSError:
+        if volume_of(source) == volume_of(os.path.dirname(target) or '.'):
+            raise
+    temp_path = target + '.moving'
+    try:
+        with open(source, 'rb') as src, open(temp_path, 'wb') as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+            dst.flush()
+            os.fsync(dst.fileno())
+        shutil.copystat(source, temp_path)
+        os.replace(temp_path, target)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    os.remove(source)
+
+
+def move_tree(staging_dir, output_path):
+    """把暂存子目录中完成的文件按相对路径移动到输出目录，返回移动后的路径列表；
+    只剩临时文件时保留暂存子目录，继续下载时可以续传
+    """
+    moved = []
+    for root, dirs, files in os.walk(staging_dir):
+        for name in files:
+            if is_temporary(name):
+                continue
+            source = os.path.join(root, name)
+            target = os.path.join(output_path, os.path.relpath(source, staging_dir))
+            move_file(source, target)
+            moved.append(target)
+    # 自下而上删除空目录
+    for root, dirs, files in os.walk(staging_dir, topdown=False):
+        if not os.listdir(root):
+            os.rmdir(root)
+    return moved
+
+
+class SpaceGuard:
+    """进程内所有下载共用的暂存目录设置与磁盘空间预留，线程安全
+    """
+
+    def __init__(self, staging_dir=''):
+        self.staging_dir = staging_dir
+        self._reserved = {}
+        # 各任务已写入的字节数与下载所在的磁盘，已写入的部分已从剩余空间中扣除，不再计入预留
+        self._written = {}
+        self._download_volume = {}
+        self._cond = threading.Condition()
+
+    def configure(self, staging_dir=''):
+        with self._cond:
+            self.staging_dir = staging_dir
+
+    def job_dir(self, job_name):
+        """任务的暂存子目录，未设置暂存目录时返回None
+        """
+        return os.path.join(self.staging_dir, job_name) if self.staging_dir else None
+
+    def _outstanding(self, owner, volume):
+        """任务在该磁盘上预留、但还没有写入的字节数
+        """
+        size = self._reserved[owner].get(volume, 0)
+        if self._download_volume.get(owner) == volume:
+            size -= self._written.get(owner, 0)
+        return max(0, size)
+
+    def _shortage(self, needs):
+        """needs 为 {目录: 字节数}，返回第一个放不下的说明，都放得下时返回None
+        """
+        by_volume = {}
+        for path, size in needs.items():
+            volume = volume_of(path)
+            total, _ = by_volume.get(volume, (0, path))
+            by_volume[volume] = (total + size, path)
+        for volume, (size, path) in by_volume.items():
+            reserved = sum(self._outstanding(other, volume) for other in self._reserved)
+            available = free_space(path) - reserved - MIN_FREE
+            if size > available:
+                return (f"磁盘空间不足: {_existing(path)} 需要 {format_bytes(size)}，"
+                        f"可用 {format_bytes(max(available, 0))}")
+        return None
+
+    def admit(self, owner, needs, should_stop, on_wait=None):
+        """预留空间，返回 (是否准入, 说明)；放不下且有其他任务预留了空间时等待它们结束。
+        needs 的第一个目录为下载写入的目录，之后用 report 报告已写入的字节数
+        """
+        waiting = False
+        with self._cond:
+            while True:
+                shortage = self._shortage(needs)
+                if shortage is None:
+                    reservation = {}
+                    for path, size in needs.items():
+                        volume = volume_of(path)
+                        reservation[volume] = reservation.get(volume, 0) + size
+                    self._reserved[owner] = reservation
+                    self._written[owner] = 0
+                    self._download_volume[owner] = volume_of(next(iter(needs))) if needs else None
+                    return True, ''
+                if not any(key is not owner for key in self._reserved) or should_stop():
+                    return False, shortage
+                if not waiting and on_wait:
+                    on_wait(f"{shortage}，等待其他任务结束")
+                waiting = True
+                self._cond.wait(1.0)
+
+    def report(self, owner, written):
+        """报告任务已写入的字节数
+        """
+        with self._cond:
+            if owner in self._written:
+                self._written[owner] = max(self._written[owner], written)
+
+    def release(self, owner):
+        with self._cond:
+            self._written.pop(owner, None)
+            self._download_volume.pop(owner, None)
+            if self._reserved.pop(owner, None) is not None:
+                self._cond.notify_all()
+
+
+# 进程内所有下载共用
+guard = SpaceGuard()
@@ -0,0 +1,58 @@
+"""启动耗时统计
+
+设置环境变量 YTDLP_TOOL_STARTUP_TIMING=1 或使用 --startup-timing 参数启动时，
+在主窗口第一次绘制后向标准错误输出各阶段耗时。本模块应尽早导入，计时从导入时开始。
+"""
+import os
+import sys
+import time
+
+_START = time.perf_counter()
+
+ENV_VAR = 'YTDLP_TOOL_STARTUP_TIMING'
+FLAG = '--startup-timing'
+
+
+def _pad(text, width):
+    """按显示宽度补齐空格，中文字符占两列
+    """
+    display = sum(2 if ord(char) > 0x2e80 else 1 for char in text)
+    return text + ' ' * max(0, width - display)
+
+
+class StartupTimer:
+    """按顺序记录各启动阶段的耗时
+    """
+
+    def __init__(self, enabled=None):
+        if enabled is None:
+            enabled = bool(os.environ.get(ENV_VAR)) or FLAG in sys.argv
+        self.enabled = enabled
+        self.phases = []
+        self._last = _START
+        self._reported = False
+
+    def mark(self, phase):
+        """记录从上一阶段结束到现在的耗时
+        """
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last))
+        self._last = now
+
+    def total(self):
+        return self._last - _START
+
+    def report(self, stream=None):
+        """输出一次统计结果，未开启时不输出
+        """
+        if not self.enabled or self._reported:
+            return
+        self._reported = True
+        stream = stream or sys.stderr
+        print("启动耗时:", file=stream)
+        for phase, seconds in self.phases:
+            print(f"  {_pad(phase, 20)} {seconds * 1000:8.1f} ms", file=stream)
+        print(f"  {_pad('合计', 20)} {self.total() * 1000:8.1f} ms", file=stream, flush=True)
+
+
+timer = StartupTimer()
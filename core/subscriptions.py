@@ -0,0 +1,169 @@
+"""频道订阅：保存订阅的频道与水位（最后见到的视频ID与上传日期），不依赖 Qt
+
+同步时用 --flat-playlist --lazy-playlist 从最新的视频开始逐条枚举，遇到水位视频（或比水位更早上传的视频）
+立即结束 yt-dlp，只返回之后新上传的视频，不必每次重新枚举整个频道。
+"""
+import json
+import time
+import sqlite3
+import threading
+from collections import namedtuple
+from contextlib import closing
+
+from core.command import DOWNLOAD_ALL
+from core.paths import data_path
+
+DEFAULT_INTERVAL_HOURS = 24
+# 找不到水位视频（已被删除等）时最多枚举的条目数
+MAX_SCAN = 200
+
+Subscription = namedtuple('Subscription', 'sub_id url title download_type interval_hours initial_count enabled '
+                                          'last_id last_upload_date last_sync last_result')
+# 一次同步的结果：entries 为新视频（从旧到新），watermark_* 为新的水位，reached 表示找到了旧水位
+SyncResult = namedtuple('SyncResult', 'entries watermark_id watermark_date title reached scanned')
+
+_COLUMNS = ('id', 'url', 'title', 'download_type', 'interval_hours', 'initial_count', 'enabled',
+            'last_id', 'last_upload_date', 'last_sync', 'last_result')
+
+
+class SubscriptionError(Exception):
+    """同步失败，消息可直接显示给用户
+    """
+
+
+class SubscriptionStore:
+    """基于SQLite的订阅列表，线程安全
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or data_path('subscriptions.db')
+        self._lock = threading.Lock()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS subscriptions ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT UNIQUE, title TEXT, download_type TEXT, "
+                "interval_hours INTEGER, initial_count INTEGER, enabled INTEGER, last_id TEXT, "
+                "last_upload_date TEXT, last_sync REAL, last_result TEXT)")
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    def add(self, url, download_type=DOWNLOAD_ALL, interval_hours=DEFAULT_INTERVAL_HOURS, initial_count=0):
+        """添加订阅，链接已订阅时返回None；initial_count 为首次同步时下载的最新视频数，0 表示只记录水位
+        """
+        with self._lock, closing(self._connect()) as conn, conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO subscriptions (url, download_type, interval_hours, initial_count, enabled) "
+                "VALUES (?, ?, ?, ?, 1)", (url, download_type, interval_hours, initial_count))
+            return cursor.lastrowid if cursor.rowcount else None
+
+    def remove(self, sub_id):
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM subscriptions WHERE id = ?", (sub_id,))
+
+    def set_enabled(self, sub_id, enabled):
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.execute("UPDATE subscriptions SET enabled = ? WHERE id = ?", (int(enabled), sub_id))
+
+    def all(self):
+        with closing(self._connect()) as conn:
+            rows = conn.execute(f"SELECT {', '.join(_COLUMNS)} FROM subscriptions ORDER BY id").fetchall()
+        return [Subscription(*row[:6], bool(row[6]), *row[7:]) for row in rows]
+
+    def get(self, sub_id):
+        return next((sub for sub in self.all() if sub.sub_id == sub_id), None)
+
+    def due(self, now=None):
+        """已启用且到了同步时间的订阅
+        """
+        now = now or time.time()
+        return [sub for sub in self.all()
+                if sub.enabled and (not sub.last_sync or now - sub.last_sync >= sub.interval_hours * 3600)]
+
+    def record_sync(self, sub_id, result=None, message=''):
+        """记录一次同步；result 为 SyncResult 时更新水位与标题
+        """
+        now = time.time()
+        with self._lock, closing(self._connect()) as conn, conn:
+            if result is not None and result.watermark_id:
+                conn.execute(
+                    "UPDATE subscriptions SET last_id = ?, last_upload_date = ?, title = COALESCE(?, title), "
+                    "last_sync = ?, last_result = ? WHERE id = ?",
+                    (result.watermark_id, result.watermark_date, result.title, now, message, sub_id))
+            else:
+                conn.execute("UPDATE subscriptions SET last_sync = ?, last_result = ? WHERE id = ?",
+                             (now, message, sub_id))
+
+
+def _compact_entry(entry):
+    compact = {key: entry.get(key) for key in ('id', 'url', 'title', 'upload_date', 'ie_key')
+               if entry.get(key) is not None}
+    if 'url' not in compact and entry.get('webpage_url'):
+        compact['url'] = entry['webpage_url']
+    return compact
+
+
+def sync_subscription(engine, subscription, cookie_path=None, known_ids=None, on_run=None, stop_event=None,
+                      max_scan=MAX_SCAN):
+    """增量同步一个订阅，返回 SyncResult，失败时抛出 SubscriptionError
+
+    known_ids 为下载存档中的 (提取器, 视频ID) 集合，其中的视频不再返回。
+    """
+    first_sync = not subscription.last_id
+    # 首次同步只需要最新的几个视频
+    limit = max(1, subscription.initial_count) if first_sync else max_scan
+    args = [subscription.url, '--flat-playlist', '--lazy-playlist', '--dump-json', '--playlist-end', str(limit)]
+    if cookie_path:
+        args.extend(['--cookies', cookie_path])
+
+    entries = []
+    state = {'title': None, 'reached': False, 'scanned': 0, 'message': ''}
+    run = None
+
+    def on_line(line):
+        if state['reached']:
+            return
+        if not line.startswith('{'):
+            state['message'] = line.strip()
+            return
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            return
+        state['scanned'] += 1
+        if state['title'] is None:
+            state['title'] = entry.get('playlist_title') or entry.get('playlist') or entry.get('channel')
+        upload_date = entry.get('upload_date')
+        # 频道按上传时间从新到旧列出，遇到水位视频或更早的视频即可结束
+        if not first_sync and (entry.get('id') == subscription.last_id or (
+                upload_date and subscription.last_upload_date and upload_date < subscription.last_upload_date)):
+            state['reached'] = True
+            if run is not None:
+                run.stop()
+            return
+        entries.append(_compact_entry(entry))
+
+    run = engine.start(args, on_line)
+    if on_run:
+        on_run(run)
+    returncode = run.wait()
+    if stop_event is not None and stop_event.is_set():
+        raise SubscriptionError("同步已取消")
+    # 中途出错时后面可能还有没枚举到的新视频，不更新水位
+    if returncode != 0 and not state['reached']:
+        raise SubscriptionError(state['message'] or f"同步失败，返回码: {returncode}")
+
+    if entries:
+        newest = entries[0]
+        # 新水位视频没有上传日期时保留旧日期，它仍是已知视频的上界
+        watermark_id = newest.get('id')
+        watermark_date = newest.get('upload_date') or subscription.last_upload_date
+    else:
+        watermark_id, watermark_date = subscription.last_id, subscription.last_upload_date
+    new_entries = entries[:subscription.initial_count] if first_sync else entries
+    if known_ids:
+        new_entries = [entry for entry in new_entries
+                       if ((entry.get('ie_key') or '').lower(), entry.get('id')) not in known_ids]
+    new_entries = [entry for entry in new_entries if entry.get('url')]
+    return SyncResult(new_entries[::-1], watermark_id, watermark_date, state['title'], state['reached'],
+                      state['scanned'])
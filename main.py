@@ -1,15 +1,44 @@
 import sys
 sys.dont_write_bytecode = True
+from core.startup import timer as startup_timer
 import os
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                              QLabel, QLineEdit, QPushButton, QComboBox, QCheckBox, 
                              QTextEdit, QFileDialog, QMessageBox, QGroupBox, QProgressBar, QSlider, QStackedWidget)
-from views.single_downloader import SingleDownloader
-from views.playlist_downloader import PlaylistDownloader
-from views.settings import SettingsView
-from PyQt5.QtCore import Qt, pyqtSignal
+from PyQt5.QtCore import Qt, QObject, QEvent, QTimer, pyqtSignal
 from PyQt5.QtGui import QFont, QColor, QPalette
-from utils import AnalyzeWorker, DownloadWorker
+from views.single_downloader import SingleDownloader
+from utils import DownloadQueue, SubscriptionScheduler
+from core.config import load_settings
+from core.engines import ENGINE_SUBPROCESS, create_engine
+from core.process_control import terminate_all
+from core.journal import JobJournal, resume_options
+from core.bandwidth import MODE_FAIR, scheduler as bandwidth_scheduler
+from core.metrics import MetricsExporter, registry as metrics_registry
+from core.postprocess import pool as postprocess_pool
+from core.staging import guard as space_guard
+from core.proxies import STRATEGY_LEAST_LOADED, pool as proxy_pool
+from core.external import DEFAULT_CONNECTIONS, DEFAULT_SPLIT_MB, aria2c
+from core.cookies import registry as cookie_registry
+from core.analysis import DEFAULT_WORKERS as DEFAULT_ANALYSIS_WORKERS, pool as analysis_pool
+from core.paths import DATA_DIR
+startup_timer.mark("导入模块")
+
+# 页面按顺序排列，除首页外都在第一次切换到时才创建
+PAGE_SINGLE, PAGE_PLAYLIST, PAGE_QUEUE, PAGE_SUBSCRIPTIONS, PAGE_STATS, PAGE_SETTINGS = range(6)
+
+
+class FirstPaintWatcher(QObject):
+    """窗口第一次绘制时输出启动耗时
+    """
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint:
+            obj.removeEventFilter(self)
+            startup_timer.mark("首次绘制")
+            startup_timer.report()
+        return False
+
 
 class YTDLPGUI(QMainWindow):
     cookie_updated = pyqtSignal(list)
@@ -20,15 +49,40 @@ class YTDLPGUI(QMainWindow):
         self.worker = None
         self.config = {}
         self.cookie_files = []
+        self.download_queue = DownloadQueue(self)
+        # 任务日志，程序意外退出后可以继续未完成的下载
+        self.journal = JobJournal()
+        self.download_queue.journal = self.journal
+        # 定时同步订阅，新视频加入下载队列
+        self.subscription_scheduler = SubscriptionScheduler(self)
+        # 定期导出下载与分析的指标，导出目录由配置决定
+        self.metrics_exporter = MetricsExporter(metrics_registry, DATA_DIR)
+        self._analysis_cache = None
+        self._engine = None
+        self._pages = {}
+        # 配置只读取一次，各页面从 self.config 取值
+        self.update_config(load_settings())
+        self.metrics_exporter.start()
+        startup_timer.mark("读取配置")
         self.init_ui()
+        startup_timer.mark("创建首页")
         self.apply_styles()
+        startup_timer.mark("应用样式")
 
     def closeEvent(self, event):
-        # 终止所有运行中的工作线程
-        if self.analyze_worker and self.analyze_worker.isRunning():
-            self.analyze_worker.terminate()
-        if self.worker and self.worker.isRunning():
-            self.worker.terminate()
+        # 先停止写入任务日志，被中断的下载保持未完成状态，下次启动时可以继续
+        self.journal.close()
+        # 结束各页面运行中的分析与下载
+        for page in self._pages.values():
+            if hasattr(page, 'shutdown'):
+                page.shutdown()
+        self.subscription_scheduler.stop()
+        # 取消队列中的全部任务
+        self.download_queue.cancel_all()
+        self.download_queue.wait_all()
+        # 确保没有残留的 yt-dlp / ffmpeg 子进程
+        terminate_all()
+        self.metrics_exporter.stop()
         event.accept()
         
         # 移除对已移动控件的引用
@@ -45,17 +99,10 @@ class YTDLPGUI(QMainWindow):
         main_layout.setSpacing(15)
         main_layout.setContentsMargins(20, 20, 20, 20)
         
-        # 创建页面容器
+        # 创建页面容器，首页立即创建，其余页面在第一次切换时创建
         self.stacked_widget = QStackedWidget()
-        self.single_downloader = SingleDownloader(self)
+        self.single_downloader = self.page(PAGE_SINGLE)
         self.current_view = self.single_downloader  # 设置当前视图为单文件下载器
-        self.playlist_downloader = PlaylistDownloader(self)
-        self.settings_view = SettingsView(self)
-
-        # 添加页面到容器
-        self.stacked_widget.addWidget(self.single_downloader)
-        self.stacked_widget.addWidget(self.playlist_downloader)
-        self.stacked_widget.addWidget(self.settings_view)
 
         # 页面切换控制
         page_control_layout = QHBoxLayout()
@@ -63,15 +110,27 @@ class YTDLPGUI(QMainWindow):
         page_control_layout.addStretch()
 
         self.single_btn = QPushButton("单个视频下载")
-        self.single_btn.clicked.connect(lambda: self.stacked_widget.setCurrentIndex(0))
+        self.single_btn.clicked.connect(lambda: self.show_page(PAGE_SINGLE))
         page_control_layout.addWidget(self.single_btn)
 
         self.playlist_btn = QPushButton("播放列表下载")
-        self.playlist_btn.clicked.connect(lambda: self.stacked_widget.setCurrentIndex(1))
+        self.playlist_btn.clicked.connect(lambda: self.show_page(PAGE_PLAYLIST))
         page_control_layout.addWidget(self.playlist_btn)
 
+        self.queue_btn = QPushButton("下载队列")
+        self.queue_btn.clicked.connect(lambda: self.show_page(PAGE_QUEUE))
+        page_control_layout.addWidget(self.queue_btn)
+
+        self.subscriptions_btn = QPushButton("订阅")
+        self.subscriptions_btn.clicked.connect(lambda: self.show_page(PAGE_SUBSCRIPTIONS))
+        page_control_layout.addWidget(self.subscriptions_btn)
+
+        self.stats_btn = QPushButton("统计")
+        self.stats_btn.clicked.connect(lambda: self.show_page(PAGE_STATS))
+        page_control_layout.addWidget(self.stats_btn)
+
         self.settings_btn = QPushButton("设置")
-        self.settings_btn.clicked.connect(lambda: self.stacked_widget.setCurrentIndex(2))
+        self.settings_btn.clicked.connect(lambda: self.show_page(PAGE_SETTINGS))
         page_control_layout.addWidget(self.settings_btn)
 
         main_layout.addLayout(page_control_layout)
@@ -81,17 +140,97 @@ class YTDLPGUI(QMainWindow):
         
         # 状态栏
         self.statusBar().showMessage("就绪")
+
+    def page(self, index):
+        """返回指定页面，第一次访问时创建；页面模块也在此时才导入
+        """
+        widget = self._pages.get(index)
+        if widget is None:
+            if index == PAGE_SINGLE:
+                widget = SingleDownloader(self)
+                self.single_downloader = widget
+            elif index == PAGE_PLAYLIST:
+                from views.playlist_downloader import PlaylistDownloader
+                widget = PlaylistDownloader(self)
+                self.playlist_downloader = widget
+            elif index == PAGE_QUEUE:
+                from views.queue_view import QueueView
+                widget = QueueView(self)
+                self.queue_view = widget
+            elif index == PAGE_SUBSCRIPTIONS:
+                from views.subscriptions_view import SubscriptionsView
+                widget = SubscriptionsView(self)
+                self.subscriptions_view = widget
+            elif index == PAGE_STATS:
+                from views.stats_view import StatsView
+                widget = StatsView(self)
+                self.stats_view = widget
+            else:
+                from views.settings import SettingsView
+                widget = SettingsView(self)
+                self.settings_view = widget
+            # 延迟创建的页面需要补上已读取的配置
+            if hasattr(widget, 'update_config'):
+                widget.update_config(self.config)
+            self._pages[index] = widget
+            self.stacked_widget.addWidget(widget)
+        return widget
+
+    def show_page(self, index):
+        self.stacked_widget.setCurrentWidget(self.page(index))
+
+    @property
+    def analysis_cache(self):
+        """分析缓存，第一次分析时才打开数据库
+        """
+        if self._analysis_cache is None:
+            from core.analysis_cache import AnalysisCache
+            self._analysis_cache = AnalysisCache()
+            self._apply_cache_limits()
+        return self._analysis_cache
+
+    def _apply_cache_limits(self):
+        if self._analysis_cache is not None:
+            self._analysis_cache.ttl = self.config.get('cache_ttl_hours', 24) * 3600
+            self._analysis_cache.max_bytes = self.config.get('cache_max_mb', 64) * 1024 * 1024
     
     def update_config(self, config):
         self.config = config
         self.cookie_files = config.get('cookie_files', [])
+        cookie_registry.set_files(self.cookie_files)
         self.cookie_updated.emit(self.cookie_files)
+        # 更新分析缓存的有效期与容量
+        self._apply_cache_limits()
+        analysis_pool.configure(config.get('analysis_workers', DEFAULT_ANALYSIS_WORKERS))
+        # 更新全局带宽上限（设置中为 KB/s）
+        bandwidth_scheduler.configure(config.get('bandwidth_limit', 0) * 1024, config.get('bandwidth_profiles', ''),
+                                      config.get('bandwidth_mode', MODE_FAIR))
+        self.metrics_exporter.directory = config.get('metrics_dir') or DATA_DIR
+        postprocess_pool.configure(config.get('postprocess_workers', 0), config.get('ffmpeg_location', ''),
+                                   config.get('postprocess_pool', True))
+        space_guard.configure(config.get('staging_dir', ''))
+        proxy_pool.configure(config.get('proxies', []), config.get('proxy_strategy', STRATEGY_LEAST_LOADED),
+                             config.get('proxy_check_url', ''))
+        aria2c.configure(config.get('aria2c_location', ''), config.get('aria2c_connections', DEFAULT_CONNECTIONS),
+                         config.get('aria2c_split_mb', DEFAULT_SPLIT_MB))
+        # 重新选择下载引擎
+        self._engine = None
+        self.download_queue.engine = self.get_engine()
         # 更新所有视图的配置
         if hasattr(self, 'single_downloader'):
             self.single_downloader.update_config(config)
         if hasattr(self, 'playlist_downloader'):
             self.playlist_downloader.update_config(config)
 
+    def get_engine(self):
+        """按设置创建（并缓存）下载引擎
+        """
+        if self._engine is None:
+            self._engine = create_engine(self.config.get('engine', ENGINE_SUBPROCESS),
+                                         self.config.get('ytdlp_path', ''),
+                                         self.config.get('check_certificate', True))
+        return self._engine
+
     def apply_styles(self):
         # 应用现代化样式表
         self.setStyleSheet("""
@@ -188,7 +327,7 @@ class YTDLPGUI(QMainWindow):
                 background-color: #005a9e;
             }
             
-            QTextEdit {
+            QTextEdit, QPlainTextEdit {
                 border: 1px solid #ccc;
                 border-radius: 6px;
                 font-family: Consolas, monospace;
@@ -212,11 +351,33 @@ class YTDLPGUI(QMainWindow):
     
     
     def open_playlist_downloader(self):
-        self.stacked_widget.setCurrentIndex(1)
+        self.show_page(PAGE_PLAYLIST)
+
+    def open_download_queue(self):
+        self.show_page(PAGE_QUEUE)
+
+    def offer_resume(self):
+        """启动时询问是否继续上次未完成的下载，继续的任务加入下载队列
+        """
+        jobs = self.journal.unfinished()
+        if not jobs:
+            return
+        reply = QMessageBox.question(
+            self, "继续下载",
+            f"检测到 {len(jobs)} 个上次未完成的下载任务，是否继续下载？\n已下载的部分（.part 文件）会被继续使用。",
+            QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes)
+        if reply != QMessageBox.Yes:
+            self.journal.discard(job['key'] for job in jobs)
+            return
+        for job in jobs:
+            self.download_queue.enqueue(job['ytdlp_path'] or self.config.get('ytdlp_path', ''), job['url'],
+                                        job_key=job['key'], **resume_options(job))
+        self.show_page(PAGE_QUEUE)
 
 def main():
     try:
         app = QApplication(sys.argv)
+        startup_timer.mark("创建QApplication")
         
         # 设置应用程序字体
         try:
@@ -226,7 +387,11 @@ def main():
             print(f"设置字体时出现错误: {e}")
         
         window = YTDLPGUI()
+        if startup_timer.enabled:
+            window.installEventFilter(FirstPaintWatcher(window))
         window.show()
+        startup_timer.mark("显示窗口")
+        QTimer.singleShot(0, window.offer_resume)
         sys.exit(app.exec_())
     except Exception as e:
         import traceback
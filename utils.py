@@ -2,13 +2,29 @@
 """
 import os
 import configparser
-import subprocess
 import re
 import json
-from PyQt5.QtWidgets import (QFileDialog, QMessageBox, QProgressBar, QTextEdit, 
+import time
+from collections import deque
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from PyQt5.QtWidgets import (QFileDialog, QMessageBox, QProgressBar, QTextEdit, QPlainTextEdit,
                              QLineEdit, QComboBox, QCheckBox, QSlider)
-from PyQt5.QtCore import Qt, QThread, pyqtSignal
+from PyQt5.QtCore import Qt, QThread, QObject, QTimer, pyqtSignal
 from PyQt5.QtGui import QFont, QColor, QPalette
+from core.progress import describe_progress
+from core.engines import SubprocessEngine
+from core.command import DEFAULT_OUTPUT_TEMPLATE
+from core.download import DownloadTask
+from core.errors import throttle as host_throttle
+from core.fragment_tuner import host_key
+from core.external import DOWNLOADER_NAMES, DOWNLOADER_NATIVE
+from core.journal import STATE_CANCELLED
+from core.cookies import AUTO_COOKIE, registry as cookie_registry
+from core.analysis import AnalysisError, pool as analysis_pool
+from core.archive import DownloadArchive
+from core.subscriptions import MAX_SCAN, SubscriptionError, SubscriptionStore, sync_subscription
+from core.metrics import KIND_PLAYLIST, RESULT_CANCELLED, RESULT_FAILED, RESULT_SUCCESS, registry
 
 class WorkerBase(QThread):
     """\u5de5\u4f5c\u7ebf\u7a0b\u57fa\u7c7b\uff0c\u63d0\u4f9b\u516c\u5171\u7684\u9519\u8bef\u5904\u7406\u65b9\u6cd5
@@ -22,162 +38,741 @@ class WorkerBase(QThread):
 
 
 class AnalyzeWorker(WorkerBase):
-    """\u89c6\u9891\u5206\u6790\u5de5\u4f5c\u7ebf\u7a0b
+    """\u89c6\u9891\u5206\u6790\u5de5\u4f5c\u7ebf\u7a0b\uff0c\u901a\u8fc7\u5206\u6790\u6c60\u6267\u884c\uff0c\u540c\u4e00\u94fe\u63a5\u6b63\u5728\u5206\u6790\u65f6\u5171\u7528\u90a3\u4e00\u6b21
     """
     analysis_finished = pyqtSignal(dict)
     
-    def __init__(self, ytdlp_path, url):
+    def __init__(self, ytdlp_path, url, cookie_path=None, cache=None, force_refresh=False, engine=None):
         super().__init__()
         self.ytdlp_path = ytdlp_path
         self.url = url
+        self.cookie_path = cookie_path
+        self.cache = cache
+        self.force_refresh = force_refresh
+        self.engine = engine or SubprocessEngine(ytdlp_path)
+        self.from_cache = False
+        self._ticket = None
+    
+    def stop(self):
+        """\u7ed3\u675f\u6b63\u5728\u8fd0\u884c\u7684\u5206\u6790\uff08\u5176\u4ed6\u5171\u7528\u8005\u4ecd\u5728\u7b49\u5f85\u65f6\u4e0d\u7ed3\u675f\uff09
+        """
+        if self._ticket:
+            self._ticket.cancel()
     
     def run(self):
+        self._ticket = analysis_pool.submit(self.engine, self.url, self.cookie_path, self.cache, self.force_refresh)
         try:
-            # \u6784\u5efayt-dlp\u547d\u4ee4\u83b7\u53d6\u89c6\u9891\u4fe1\u606f
-            cmd = [self.ytdlp_path, self.url, '--dump-json']
-            
-            # \u6267\u884c\u547d\u4ee4
-            process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                universal_newlines=True,
-                encoding='utf-8',
-                errors='ignore'
-            )
-            
-            output, _ = process.communicate()
-            
-            if process.returncode == 0:
-                # \u89e3\u6790JSON\u8f93\u51fa
-                video_info = json.loads(output)
-                self.analysis_finished.emit(video_info)
+            video_info, self.from_cache = self._ticket.wait()
+            self.analysis_finished.emit(video_info)
+        except AnalysisError as e:
+            self.handle_error(str(e))
+        finally:
+            self._ticket.release()
+
+
+class BatchAnalyzeWorker(WorkerBase):
+    """\u6279\u91cf\u5206\u6790\u7ebf\u7a0b\uff1a\u628a\u5168\u90e8\u94fe\u63a5\u4ea4\u7ed9\u5206\u6790\u6c60\u5e76\u53d1\u5206\u6790\uff0c\u6309\u5b8c\u6210\u987a\u5e8f\u9010\u4e2a\u53d1\u51fa\u7ed3\u679c
+    """
+    # \u94fe\u63a5\u5e8f\u53f7\u4e0e\u89c6\u9891\u4fe1\u606f\uff0c\u5931\u8d25\u65f6\u4e3a {'error': \u8bf4\u660e}\uff0c\u505c\u6b62\u540e\u672a\u5b8c\u6210\u7684\u94fe\u63a5\u53e6\u6709 'cancelled': True
+    result_ready = pyqtSignal(int, dict)
+    # \u6210\u529f\u6570\u4e0e\u5931\u8d25\u6570
+    batch_finished = pyqtSignal(int, int)
+
+    def __init__(self, ytdlp_path, urls, cookie_path=None, cache=None, force_refresh=False, engine=None):
+        super().__init__()
+        self.urls = urls
+        self.cookie_path = cookie_path
+        self.cache = cache
+        self.force_refresh = force_refresh
+        self.engine = engine or SubprocessEngine(ytdlp_path)
+        self._tickets = []
+        self._stopped = False
+
+    def stop(self):
+        self._stopped = True
+        for ticket in self._tickets:
+            ticket.cancel()
+
+    def run(self):
+        # \u5217\u8868\u4e2d\u91cd\u590d\u7684\u94fe\u63a5\u5171\u7528\u540c\u4e00\u6b21\u5206\u6790
+        self._tickets = [analysis_pool.submit(self.engine, url, self.cookie_path, self.cache, self.force_refresh)
+                         for url in self.urls]
+        if self._stopped:
+            self.stop()
+        indexes = {}
+        for index, ticket in enumerate(self._tickets):
+            indexes.setdefault(ticket.future, []).append(index)
+        succeeded = failed = 0
+        try:
+            for future in as_completed(indexes):
+                for index in indexes[future]:
+                    try:
+                        video_info, _ = self._tickets[index].wait()
+                        succeeded += 1
+                    except AnalysisError as e:
+                        video_info = {'error': str(e)}
+                        if self._stopped:
+                            video_info['cancelled'] = True
+                        else:
+                            failed += 1
+                    self.result_ready.emit(index, video_info)
+        finally:
+            for ticket in self._tickets:
+                ticket.release()
+        self.batch_finished.emit(succeeded, failed)
+
+
+class PlaylistAnalyzeWorker(WorkerBase):
+    """\u64ad\u653e\u5217\u8868\u6d41\u5f0f\u5206\u6790\u7ebf\u7a0b
+
+    \u4f7f\u7528 --flat-playlist \u9010\u884c\u89e3\u6790 yt-dlp \u8f93\u51fa\u7684\u6761\u76ee\uff0c\u5206\u6279\u53d1\u9001\u7ed9\u754c\u9762\uff0c
+    \u5185\u5b58\u5360\u7528\u4e0e\u5217\u8868\u957f\u5ea6\u65e0\u5173\uff08\u4ec5\u4fdd\u7559\u7528\u4e8e\u7f13\u5b58\u7684\u7cbe\u7b80\u6761\u76ee\uff09\u3002
+    """
+    entries_found = pyqtSignal(list)
+    analysis_finished = pyqtSignal(dict)
+
+    # \u7cbe\u7b80\u6761\u76ee\u4fdd\u7559\u7684\u5b57\u6bb5
+    ENTRY_FIELDS = ('id', 'url', 'title', 'upload_date', 'duration', 'ie_key', 'playlist_index')
+
+    def __init__(self, ytdlp_path, url, cookie_path=None, cache=None, force_refresh=False,
+                 batch_size=200, batch_interval=0.1, engine=None):
+        super().__init__()
+        self.ytdlp_path = ytdlp_path
+        self.url = url
+        self.cookie_path = cookie_path
+        self.cache = cache
+        self.force_refresh = force_refresh
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.engine = engine or SubprocessEngine(ytdlp_path)
+        self.from_cache = False
+        self._run = None
+        self._stopped = False
+
+    def stop(self):
+        self._stopped = True
+        if self._run:
+            self._run.stop()
+
+    @classmethod
+    def compact_entry(cls, entry, index):
+        compact = {key: entry.get(key) for key in cls.ENTRY_FIELDS if entry.get(key) is not None}
+        compact.setdefault('playlist_index', index)
+        if 'url' not in compact and entry.get('webpage_url'):
+            compact['url'] = entry['webpage_url']
+        return compact
+
+    def _emit_in_batches(self, entries):
+        for start in range(0, len(entries), self.batch_size):
+            self.entries_found.emit(entries[start:start + self.batch_size])
+
+    def _on_line(self, line):
+        self._metrics.on_line(line)
+        if not line.startswith('{'):
+            self._last_message = line.strip()
+            return
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            return
+        summary = self._summary
+        summary['_total'] += 1
+        if summary['title'] is None:
+            summary['title'] = entry.get('playlist_title') or entry.get('playlist') or entry.get('title')
+            summary['id'] = entry.get('playlist_id')
+        compact = self.compact_entry(entry, summary['_total'])
+        self._batch.append(compact)
+        if self._cached_entries is not None:
+            self._cached_entries.append(compact)
+        now = time.monotonic()
+        if len(self._batch) >= self.batch_size or now - self._last_emit >= self.batch_interval:
+            self.entries_found.emit(self._batch)
+            self._batch = []
+            self._last_emit = now
+
+    def run(self):
+        self._metrics = registry.start(KIND_PLAYLIST, self.url)
+        result = RESULT_FAILED
+        try:
+            # \u4f18\u5148\u4f7f\u7528\u7f13\u5b58\u7684\u6761\u76ee\u5217\u8868
+            if self.cache and not self.force_refresh:
+                cached = self.cache.get(self.url, self.cookie_path, kind='playlist')
+                if cached is not None:
+                    self.from_cache = self._metrics.cached = True
+                    result = RESULT_SUCCESS
+                    self._emit_in_batches(cached['entries'])
+                    summary = dict(cached)
+                    summary.pop('entries')
+                    self.analysis_finished.emit(summary)
+                    return
+
+            args = [self.url, '--flat-playlist', '--lazy-playlist', '--dump-json']
+            if self.cookie_path and os.path.exists(self.cookie_path):
+                args.extend(['--cookies', self.cookie_path])
+
+            self._summary = summary = {'_type': 'playlist', 'title': None, '_total': 0}
+            self._cached_entries = [] if self.cache else None
+            self._batch = []
+            self._last_emit = time.monotonic()
+            self._last_message = ""
+            self._metrics.process_started()
+            self._run = self.engine.start(args, self._on_line)
+            returncode = self._run.wait()
+            if self._batch:
+                self.entries_found.emit(self._batch)
+
+            if self._stopped:
+                result = RESULT_CANCELLED
+                self.handle_error("\u5206\u6790\u5df2\u53d6\u6d88")
+            elif returncode == 0 or summary['_total']:
+                if self.cache and returncode == 0:
+                    self.cache.put(self.url, dict(summary, entries=self._cached_entries), self.cookie_path, kind='playlist')
+                result = RESULT_SUCCESS
+                self.analysis_finished.emit(summary)
             else:
-                self.handle_error(f"\u5206\u6790\u5931\u8d25\uff0c\u8fd4\u56de\u7801: {process.returncode}")
-                
+                self.handle_error(f"\u5206\u6790\u5931\u8d25\uff0c\u8fd4\u56de\u7801: {returncode} {self._last_message}".strip())
+
         except Exception as e:
             self.handle_error(f"\u5206\u6790\u51fa\u9519: {str(e)}")
+        finally:
+            self._metrics.finish(result)
 
 
 class DownloadWorker(WorkerBase):
-    """\u4e0b\u8f7d\u5de5\u4f5c\u7ebf\u7a0b
+    """\u4e0b\u8f7d\u5de5\u4f5c\u7ebf\u7a0b\uff0c\u5728\u7ebf\u7a0b\u4e2d\u6267\u884c DownloadTask \u5e76\u628a\u65e5\u5fd7\u4e0e\u8fdb\u5ea6\u8f6c\u4e3a\u4fe1\u53f7
     """
     progress_updated = pyqtSignal(str)
     progress_changed = pyqtSignal(int)
+    progress_detail = pyqtSignal(object)
     download_finished = pyqtSignal(bool, str)
+    # \u4e0b\u8f7d\u7ed3\u675f\u3001\u5f00\u59cb\u7b49\u5f85\u540e\u5904\u7406\u6c60\u65f6\u53d1\u51fa
+    postprocess_started = pyqtSignal()
+    
+    # \u8be6\u7ec6\u8fdb\u5ea6\u4fe1\u53f7\u7684\u6700\u5c0f\u53d1\u9001\u95f4\u9694\uff08\u79d2\uff09
+    DETAIL_INTERVAL = 0.2
     
     def __init__(self, ytdlp_path, url, download_type, output_path, cookie_path=None, 
-                 audio_quality=None, video_quality=None, merge_output=None, thread_count=4):
+                 audio_quality=None, video_quality=None, merge_output=None, thread_count=4,
+                 extra_params=None, engine=None, use_archive=False, output_template=DEFAULT_OUTPUT_TEMPLATE,
+                 journal=None, job_key=None, downloader=DOWNLOADER_NATIVE):
         super().__init__()
         self.ytdlp_path = ytdlp_path
         self.url = url
-        self.download_type = download_type
-        self.output_path = output_path
-        self.cookie_path = cookie_path
-        self.audio_quality = audio_quality
-        self.video_quality = video_quality
-        self.merge_output = merge_output
-        self.thread_count = thread_count
+        self.task = DownloadTask(ytdlp_path, url, download_type, output_path, cookie_path,
+                                 audio_quality, video_quality, merge_output, thread_count,
+                                 extra_params, engine, use_archive, output_template, journal, job_key,
+                                 downloader)
+        # \u7531\u4e0b\u8f7d\u961f\u5217\u8bbe\u7f6e\u7684\u5e76\u884c\u540d\u989d\uff08QueueSlot\uff09
+        self.slot = None
+    
+    def stop(self):
+        """\u505c\u6b62\u4e0b\u8f7d\uff0c\u7ed3\u675f\u6b63\u5728\u8fd0\u884c\u7684yt-dlp\u8fdb\u7a0b
+        """
+        self.task.stop()
+    
+    def pause(self):
+        return self.task.pause()
+    
+    def resume(self):
+        return self.task.resume()
+    
+    def build_args(self, archive_file=None, manifest_path=None):
+        """\u6784\u5efayt-dlp\u53c2\u6570\uff08\u4e0d\u542b\u53ef\u6267\u884c\u6587\u4ef6\u8def\u5f84\uff09
+        """
+        return self.task.build_args(archive_file, manifest_path)
     
     def run(self):
+        self._last_percent = -1
+        self._last_detail = 0.0
         try:
-            # \u6784\u5efayt-dlp\u547d\u4ee4
-            cmd = [self.ytdlp_path, self.url]
-            
-            # \u6dfb\u52a0\u7ebf\u7a0b\u6570\u53c2\u6570
-            cmd.extend(['--concurrent-fragments', str(self.thread_count)])
-            
-            # \u8bbe\u7f6e\u8f93\u51fa\u8def\u5f84
-            if self.output_path:
-                cmd.extend(['-o', os.path.join(self.output_path, '%(title)s.%(ext)s')])
-            
-            # \u6839\u636e\u4e0b\u8f7d\u7c7b\u578b\u8bbe\u7f6e\u53c2\u6570
-            self._add_format_options(cmd)
-            
-            # \u6dfb\u52a0cookie\u6587\u4ef6\u53c2\u6570
-            if self.cookie_path and os.path.exists(self.cookie_path):
-                cmd.extend(['--cookies', self.cookie_path])
-            
-            # \u6dfb\u52a0\u8fdb\u5ea6\u94a9\u5b50
-            cmd.extend(['--newline', '--no-check-certificate'])
-            
-            self.progress_updated.emit(f"\u6267\u884c\u547d\u4ee4: {' '.join(cmd)}")
-            
-            # \u6267\u884c\u547d\u4ee4
-            process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                universal_newlines=True,
-                encoding='utf-8',
-                errors='ignore'
-            )
-            
-            # \u5b9e\u65f6\u8bfb\u53d6\u8f93\u51fa\u5e76\u89e3\u6790\u8fdb\u5ea6
-            for line in process.stdout:
-                line = line.strip()
-                if line:
-                    # \u5c1d\u8bd5\u89e3\u6790\u8fdb\u5ea6\u767e\u5206\u6bd4
-                    if '[download]' in line and '%' in line:
-                        # \u63d0\u53d6\u767e\u5206\u6bd4\u6570\u5b57
-                        percent_match = re.search(r'\b(\d+(?:\.\d+)?)\s*%', line)
-                        if percent_match:
-                            try:
-                                percent = float(percent_match.group(1))
-                                self.progress_changed.emit(int(percent))
-                            except ValueError:
-                                pass
-                    
-                    self.progress_updated.emit(line)
-            
-            process.wait()
-            
-            if process.returncode == 0:
-                self.download_finished.emit(True, "\u4e0b\u8f7d\u5b8c\u6210!")
-            else:
-                self.handle_error(f"\u4e0b\u8f7d\u5931\u8d25\uff0c\u8fd4\u56de\u7801: {process.returncode}")
+            success, message = self.task.run(self.progress_updated.emit, self._report_progress,
+                                             self.postprocess_started.emit, self.slot)
         except Exception as e:
             self.handle_error(f"\u4e0b\u8f7d\u51fa\u9519: {str(e)}")
-    
-    def _add_format_options(self, cmd):
-        """\u6839\u636e\u4e0b\u8f7d\u7c7b\u578b\u6dfb\u52a0\u683c\u5f0f\u53c2\u6570
-        """
-        if self.download_type == "\u4ec5\u97f3\u9891":
-            cmd.extend(['-x', '--audio-format', 'mp3'])
-        elif self.download_type == "\u4ec5\u89c6\u9891":
-            # \u4f7f\u7528\u7528\u6237\u9009\u62e9\u7684\u5177\u4f53\u89c6\u9891\u683c\u5f0f
-            format_id = self._get_format_id(self.video_quality)
-            cmd.extend(['-f', format_id])
-        else:  # \u5168\u90e8\u4e0b\u8f7d
-            format_parts = []
-            # \u6dfb\u52a0\u89c6\u9891\u683c\u5f0f
-            video_format = self._get_format_id(self.video_quality, 'video')
-            format_parts.append(video_format)
-            
-            # \u6dfb\u52a0\u97f3\u9891\u683c\u5f0f
-            audio_format = self._get_format_id(self.audio_quality, 'audio')
-            format_parts.append(audio_format)
-            
-            cmd.extend(['-f', ','.join(format_parts)])
-    
-    def _get_format_id(self, quality, format_type='video'):
-        """\u83b7\u53d6\u683c\u5f0fID\uff0c\u652f\u6301\u5411\u540e\u517c\u5bb9
-        """
-        if isinstance(quality, dict) and 'format_id' in quality:
-            return quality['format_id']
-        elif isinstance(quality, str):
-            # \u5411\u540e\u517c\u5bb9\uff0c\u5904\u7406\u65e7\u7684\u5b57\u7b26\u4e32\u683c\u5f0f
-            if quality == "\u6700\u9ad8\u8d28\u91cf":
-                return 'bv*+ba/b' if format_type == 'video' and self.download_type == "\u4ec5\u89c6\u9891" else 'bv*' if format_type == 'video' else 'ba'
-            elif quality == "\u4e2d\u7b49\u8d28\u91cf":
-                return 'bv*[height<=720]+ba/b' if format_type == 'video' and self.download_type == "\u4ec5\u89c6\u9891" else 'bv*[height<=720]' if format_type == 'video' else 'ba[abr<=128]'
-            elif quality == "\u4f4e\u8d28\u91cf":
-                return 'bv*[height<=480]+ba/b' if format_type == 'video' and self.download_type == "\u4ec5\u89c6\u9891" else 'bv*[height<=480]' if format_type == 'video' else 'ba[abr<=64]'
-            else:
-                return quality
+            return
+        if success or self.task.stopped:
+            self.download_finished.emit(success, message)
         else:
-            # \u9ed8\u8ba4\u503c
-            return 'bv*+ba/b' if format_type == 'video' and self.download_type == "\u4ec5\u89c6\u9891" else 'bv*' if format_type == 'video' else 'ba'
+            self.handle_error(message)
+    
+    def _report_progress(self, progress):
+        percent = int(progress.percent)
+        if percent != self._last_percent:
+            self._last_percent = percent
+            self.progress_changed.emit(percent)
+        now = time.monotonic()
+        if now - self._last_detail >= self.DETAIL_INTERVAL or percent >= 100:
+            self._last_detail = now
+            self.progress_detail.emit(progress)
+
+
+class QueueSlot(QObject):
+    """\u961f\u5217\u4e2d\u4e00\u4e2a\u4efb\u52a1\u7684\u5e76\u884c\u540d\u989d\uff1a\u4efb\u52a1\u7b49\u5f85\u7ad9\u70b9\u9000\u907f\u6216\u91cd\u8bd5\u95f4\u9694\u65f6\u5728\u4e0b\u8f7d\u7ebf\u7a0b\u4e2d\u5f52\u8fd8\uff0c\u7b49\u5f85\u7ed3\u675f\u540e\u91cd\u65b0\u7533\u8bf7\uff0c
+    \u7531\u4e0b\u8f7d\u961f\u5217\u5728GUI\u7ebf\u7a0b\u4e2d\u5206\u914d
+    """
+    released = pyqtSignal()
+    requested = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._granted = threading.Event()
+
+    def release(self):
+        self._granted.clear()
+        self.released.emit()
+
+    def acquire(self, should_stop):
+        """\u7533\u8bf7\u540d\u989d\u5e76\u7b49\u5f85\u5206\u914d\uff0c\u53d6\u6d88\u65f6\u8fd4\u56deFalse
+        """
+        self.requested.emit()
+        while not self._granted.wait(0.5):
+            if should_stop():
+                return False
+        return True
+
+    def grant(self):
+        self._granted.set()
+
+
+class DownloadJob:
+    """\u4e0b\u8f7d\u961f\u5217\u4e2d\u7684\u5355\u4e2a\u4efb\u52a1
+    """
+    WAITING = "\u7b49\u5f85\u4e2d"
+    RUNNING = "\u4e0b\u8f7d\u4e2d"
+    PAUSED = "\u5df2\u6682\u505c"
+    POSTPROCESSING = "\u540e\u5904\u7406\u4e2d"
+    FINISHED = "\u5df2\u5b8c\u6210"
+    FAILED = "\u5931\u8d25"
+    CANCELLED = "\u5df2\u53d6\u6d88"
+
+    def __init__(self, job_id, ytdlp_path, url, options, job_key=None):
+        self.job_id = job_id
+        self.ytdlp_path = ytdlp_path
+        self.url = url
+        # DownloadWorker \u7684\u5173\u952e\u5b57\u53c2\u6570\uff08download_type\u3001output_path \u7b49\uff09
+        self.options = options
+        self.state = DownloadJob.WAITING
+        self.progress = 0
+        # \u5b9e\u9645\u4e0b\u8f7d\u901f\u5ea6\uff08\u5b57\u8282/\u79d2\uff09
+        self.speed = None
+        self.message = ""
+        self.worker = None
+        # \u4efb\u52a1\u65e5\u5fd7\u4e2d\u7684\u6807\u8bc6
+        self.job_key = job_key
+
+    def is_active(self):
+        return self.state in (DownloadJob.WAITING, DownloadJob.RUNNING, DownloadJob.PAUSED, DownloadJob.POSTPROCESSING)
+
+
+class DownloadQueue(QObject):
+    """\u591a\u4efb\u52a1\u4e0b\u8f7d\u961f\u5217\uff0c\u6309\u6700\u5927\u5e76\u884c\u6570\u8c03\u5ea6 DownloadWorker
+
+    \u8fdb\u5ea6\u4e0e\u72b6\u6001\u53d8\u5316\u53ea\u8bb0\u5f55\u5728\u4efb\u52a1\u5bf9\u8c61\u4e0a\uff0c\u7531\u5b9a\u65f6\u5668\u5408\u5e76\u540e\u6279\u91cf\u901a\u77e5\u754c\u9762\uff0c
+    \u907f\u514d\u6570\u767e\u4e2a\u4efb\u52a1\u540c\u65f6\u5237\u65b0\u65f6\u963b\u585eGUI\u7ebf\u7a0b\u3002
+    \u4e0b\u8f7d\u7ed3\u675f\u3001\u7b49\u5f85\u540e\u5904\u7406\u6c60\u7684\u4efb\u52a1\u4e0d\u5360\u7528\u5e76\u884c\u540d\u989d\uff1b\u7b49\u5f85\u7ad9\u70b9\u9000\u907f\u6216\u91cd\u8bd5\u95f4\u9694\u7684\u4efb\u52a1\u6682\u65f6\u5f52\u8fd8\u540d\u989d\uff0c
+    \u6b63\u5728\u9000\u907f\u7684\u7ad9\u70b9\u7684\u4efb\u52a1\u6682\u4e0d\u542f\u52a8\uff0c\u540d\u989d\u7559\u7ed9\u5176\u4ed6\u7ad9\u70b9\u7684\u4efb\u52a1\u3002
+    """
+    job_added = pyqtSignal(int)
+    jobs_updated = pyqtSignal(list)
+    jobs_reordered = pyqtSignal()
+    job_finished = pyqtSignal(int, bool, str)
+    queue_idle = pyqtSignal()
+
+    def __init__(self, parent=None, max_parallel=3, flush_interval=200):
+        super().__init__(parent)
+        self.max_parallel = max_parallel
+        self.jobs = {}
+        self.order = []
+        self._next_id = 1
+        self.engine = None
+        # \u8bbe\u7f6e\u540e\u4efb\u52a1\u5728\u52a0\u5165\u961f\u5217\u65f6\u5199\u5165\u4efb\u52a1\u65e5\u5fd7\uff08JobJournal\uff09
+        self.journal = None
+        self._running = set()
+        # \u4e0b\u8f7d\u5df2\u7ed3\u675f\u3001\u6b63\u5728\u7b49\u5f85\u540e\u5904\u7406\u7684\u4efb\u52a1
+        self._postprocessing = set()
+        # \u7b49\u5f85\u4e2d\u6682\u65f6\u5f52\u8fd8\u4e86\u540d\u989d\u7684\u4efb\u52a1\uff0c\u4ee5\u53ca\u5176\u4e2d\u5df2\u91cd\u65b0\u7533\u8bf7\u540d\u989d\u7684\u4efb\u52a1
+        self._suspended = set()
+        self._requesting = []
+        # \u6709\u4efb\u52a1\u56e0\u7ad9\u70b9\u6b63\u5728\u9000\u907f\u800c\u6682\u4e0d\u542f\u52a8\u65f6\uff0c\u5b9a\u65f6\u91cd\u65b0\u8c03\u5ea6
+        self._deferred = False
+        self._dirty = set()
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setInterval(flush_interval)
+        self._flush_timer.timeout.connect(self._flush)
+        self._flush_timer.start()
+
+    def enqueue(self, ytdlp_path, url, job_key=None, **options):
+        """\u6dfb\u52a0\u4e0b\u8f7d\u4efb\u52a1\uff0c\u8fd4\u56de\u4efb\u52a1ID\uff1bjob_key \u4e3a\u7ee7\u7eed\u4efb\u52a1\u65e5\u5fd7\u4e2d\u5df2\u6709\u4efb\u52a1\u65f6\u7684\u6807\u8bc6
+        """
+        if self.journal and job_key is None:
+            job_key = self.journal.add(url, ytdlp_path, options)
+        job = DownloadJob(self._next_id, ytdlp_path, url, options, job_key)
+        self._next_id += 1
+        self.jobs[job.job_id] = job
+        self.order.append(job.job_id)
+        self.job_added.emit(job.job_id)
+        self._schedule()
+        return job.job_id
+
+    def set_max_parallel(self, value):
+        self.max_parallel = max(1, int(value))
+        self._schedule()
+
+    def running_count(self):
+        return len(self._running)
+
+    def postprocessing_count(self):
+        return len(self._postprocessing)
+
+    def pending_count(self):
+        return sum(1 for job in self.jobs.values() if job.state == DownloadJob.WAITING)
+
+    def cancel(self, job_id):
+        """\u53d6\u6d88\u4efb\u52a1\uff1a\u7b49\u5f85\u4e2d\u7684\u76f4\u63a5\u79fb\u51fa\u8c03\u5ea6\uff0c\u8fd0\u884c\u4e2d\u7684\u7ed3\u675f\u5176\u8fdb\u7a0b
+        """
+        job = self.jobs.get(job_id)
+        if not job or not job.is_active():
+            return
+        if job.state in (DownloadJob.RUNNING, DownloadJob.PAUSED, DownloadJob.POSTPROCESSING) and job.worker:
+            job.worker.stop()
+        elif self.journal and job.job_key:
+            self.journal.finish(job.job_key, STATE_CANCELLED)
+        waiting = job.state == DownloadJob.WAITING
+        job.state = DownloadJob.CANCELLED
+        job.message = "\u5df2\u53d6\u6d88"
+        self._mark_dirty(job_id)
+        if waiting:
+            # \u53d6\u6d88\u7684\u53ef\u80fd\u662f\u56e0\u7ad9\u70b9\u9000\u907f\u800c\u6682\u4e0d\u542f\u52a8\u7684\u6700\u540e\u4e00\u6279\u4efb\u52a1
+            self._check_idle()
+
+    def cancel_all(self):
+        for job_id in list(self.order):
+            self.cancel(job_id)
+
+    def pause(self, job_id):
+        """\u6682\u505c\u8fd0\u884c\u4e2d\u7684\u4efb\u52a1\uff0c\u4efb\u52a1\u7ee7\u7eed\u5360\u7528\u4e00\u4e2a\u5e76\u884c\u540d\u989d\uff1b\u8fd4\u56de\u662f\u5426\u5df2\u6682\u505c
+        """
+        job = self.jobs.get(job_id)
+        if job and job.state == DownloadJob.RUNNING and job.worker and job.worker.pause():
+            job.state = DownloadJob.PAUSED
+            self._mark_dirty(job_id)
+            return True
+        return False
+
+    def resume(self, job_id):
+        """\u7ee7\u7eed\u5df2\u6682\u505c\u7684\u4efb\u52a1\uff0c\u8fd4\u56de\u662f\u5426\u5df2\u7ee7\u7eed
+        """
+        job = self.jobs.get(job_id)
+        if job and job.state == DownloadJob.PAUSED and job.worker and job.worker.resume():
+            job.state = DownloadJob.RUNNING
+            self._mark_dirty(job_id)
+            return True
+        return False
+
+    def wait_all(self, timeout=3000):
+        """\u7b49\u5f85\u6240\u6709\u5de5\u4f5c\u7ebf\u7a0b\u7ed3\u675f\uff08\u6beb\u79d2\uff09\uff0c\u7528\u4e8e\u7a0b\u5e8f\u9000\u51fa\u524d
+        """
+        for job in self.jobs.values():
+            if job.worker:
+                job.worker.wait(timeout)
+
+    def move(self, job_id, offset):
+        """\u8c03\u6574\u4efb\u52a1\u5728\u961f\u5217\u4e2d\u7684\u4f4d\u7f6e\uff0coffset \u4e3a\u8d1f\u6570\u8868\u793a\u4e0a\u79fb
+        """
+        if job_id not in self.jobs:
+            return
+        index = self.order.index(job_id)
+        new_index = max(0, min(len(self.order) - 1, index + offset))
+        if new_index == index:
+            return
+        self.order.insert(new_index, self.order.pop(index))
+        self.jobs_reordered.emit()
+
+    def move_to_top(self, job_id):
+        if job_id in self.jobs:
+            self.move(job_id, -self.order.index(job_id))
+
+    def clear_finished(self):
+        """\u79fb\u9664\u5df2\u7ed3\u675f\uff08\u5b8c\u6210\u3001\u5931\u8d25\u3001\u53d6\u6d88\uff09\u7684\u4efb\u52a1
+        """
+        self.order = [job_id for job_id in self.order if self.jobs[job_id].is_active()]
+        self.jobs = {job_id: self.jobs[job_id] for job_id in self.order}
+        self._dirty.intersection_update(self.jobs)
+        self.jobs_reordered.emit()
+
+    def _schedule(self):
+        self._deferred = False
+        # \u5148\u628a\u540d\u989d\u8fd8\u7ed9\u7b49\u5f85\u7ed3\u675f\u7684\u4efb\u52a1
+        while self._requesting and len(self._running) < self.max_parallel:
+            job_id = self._requesting.pop(0)
+            self._suspended.discard(job_id)
+            self._running.add(job_id)
+            job = self.jobs.get(job_id)
+            if job and job.worker and job.worker.slot:
+                job.worker.slot.grant()
+        if len(self._running) >= self.max_parallel:
+            return
+        for job_id in self.order:
+            if len(self._running) >= self.max_parallel:
+                break
+            job = self.jobs[job_id]
+            if job.state != DownloadJob.WAITING:
+                continue
+            if not host_throttle.ready(host_key(job.url)):
+                self._deferred = True
+                continue
+            self._start_job(job)
+
+    def _start_job(self, job):
+        worker = DownloadWorker(job.ytdlp_path, job.url, engine=self.engine, journal=self.journal,
+                                job_key=job.job_key, **job.options)
+        worker.progress_updated.connect(lambda msg, job_id=job.job_id: self._on_output(job_id, msg))
+        worker.progress_changed.connect(lambda value, job_id=job.job_id: self._on_progress(job_id, value))
+        worker.progress_detail.connect(lambda progress, job_id=job.job_id: self._on_speed(job_id, progress.speed))
+        worker.postprocess_started.connect(lambda job_id=job.job_id: self._on_postprocess(job_id))
+        worker.download_finished.connect(
+            lambda success, msg, job_id=job.job_id: self._on_finished(job_id, success, msg))
+        worker.error_occurred.connect(lambda msg, job_id=job.job_id: self._on_finished(job_id, False, msg))
+        worker.finished.connect(worker.deleteLater)
+        worker.slot = QueueSlot(self)
+        worker.slot.released.connect(lambda job_id=job.job_id: self._on_slot_released(job_id))
+        worker.slot.requested.connect(lambda job_id=job.job_id: self._on_slot_requested(job_id))
+        job.worker = worker
+        job.state = DownloadJob.RUNNING
+        job.progress = 0
+        self._running.add(job.job_id)
+        self._mark_dirty(job.job_id)
+        worker.start()
+
+    def _on_output(self, job_id, message):
+        job = self.jobs.get(job_id)
+        if job and job.state in (DownloadJob.RUNNING, DownloadJob.POSTPROCESSING):
+            job.message = message
+            self._mark_dirty(job_id)
+
+    def _on_progress(self, job_id, value):
+        job = self.jobs.get(job_id)
+        if job and job.progress != value:
+            job.progress = value
+            self._mark_dirty(job_id)
+
+    def _on_speed(self, job_id, speed):
+        job = self.jobs.get(job_id)
+        if job and job.speed != speed:
+            job.speed = speed
+            self._mark_dirty(job_id)
+
+    def _on_slot_released(self, job_id):
+        """\u4efb\u52a1\u5f00\u59cb\u7b49\u5f85\uff0c\u6682\u65f6\u8ba9\u51fa\u5e76\u884c\u540d\u989d
+        """
+        if job_id not in self._running:
+            return
+        self._running.discard(job_id)
+        self._suspended.add(job_id)
+        self._schedule()
+
+    def _on_slot_requested(self, job_id):
+        job = self.jobs.get(job_id)
+        if job_id in self._running and job and job.worker and job.worker.slot:
+            # \u6ca1\u6709\u5f52\u8fd8\u8fc7\u540d\u989d
+            job.worker.slot.grant()
+        elif job_id in self._suspended and job_id not in self._requesting:
+            self._requesting.append(job_id)
+            self._schedule()
+
+    def _on_postprocess(self, job_id):
+        """\u4e0b\u8f7d\u5df2\u7ed3\u675f\uff0c\u8ba9\u51fa\u5e76\u884c\u540d\u989d\u7ed9\u4e0b\u4e00\u4e2a\u4efb\u52a1
+        """
+        if job_id not in self._running:
+            return
+        self._running.discard(job_id)
+        self._postprocessing.add(job_id)
+        job = self.jobs.get(job_id)
+        if job and job.state != DownloadJob.CANCELLED:
+            job.state = DownloadJob.POSTPROCESSING
+            job.speed = None
+            job.message = "\u7b49\u5f85\u540e\u5904\u7406"
+            self._mark_dirty(job_id)
+        self._schedule()
+
+    def _on_finished(self, job_id, success, message):
+        if job_id not in self._running and job_id not in self._postprocessing and job_id not in self._suspended:
+            return
+        self._running.discard(job_id)
+        self._postprocessing.discard(job_id)
+        self._suspended.discard(job_id)
+        if job_id in self._requesting:
+            self._requesting.remove(job_id)
+        job = self.jobs.get(job_id)
+        if job:
+            job.worker = None
+            job.speed = None
+            if job.state != DownloadJob.CANCELLED:
+                job.state = DownloadJob.FINISHED if success else DownloadJob.FAILED
+                job.message = message
+                if success:
+                    job.progress = 100
+            self._mark_dirty(job_id)
+            self.job_finished.emit(job_id, success, message)
+        self._schedule()
+        self._check_idle()
+
+    def _check_idle(self):
+        """\u6ca1\u6709\u8fd0\u884c\u4e2d\u3001\u7b49\u5f85\u540e\u5904\u7406\u6216\u7b49\u5f85\u4e2d\u7684\u4efb\u52a1\u65f6\u901a\u77e5\u961f\u5217\u7a7a\u95f2\uff1b
+        \u56e0\u7ad9\u70b9\u9000\u907f\u6682\u4e0d\u542f\u52a8\u7684\u4efb\u52a1\u4ecd\u5728\u7b49\u5f85\uff0c\u961f\u5217\u4e0d\u7b97\u7a7a\u95f2
+        """
+        if self._running or self._postprocessing or self._suspended:
+            return
+        if self.pending_count():
+            return
+        self.queue_idle.emit()
+
+    def _mark_dirty(self, job_id):
+        self._dirty.add(job_id)
+
+    def _flush(self):
+        if self._deferred:
+            self._schedule()
+        if self._dirty:
+            dirty = list(self._dirty)
+            self._dirty.clear()
+            self.jobs_updated.emit(dirty)
+
+
+class SubscriptionSyncWorker(WorkerBase):
+    """\u8ba2\u9605\u540c\u6b65\u7ebf\u7a0b\uff1a\u5728\u6709\u754c\u7ebf\u7a0b\u6c60\u4e2d\u540c\u65f6\u540c\u6b65\u591a\u4e2a\u8ba2\u9605\uff0c\u6309\u5b8c\u6210\u987a\u5e8f\u9010\u4e2a\u53d1\u51fa\u7ed3\u679c
+    """
+    # \u8ba2\u9605ID\u3001SyncResult\uff08\u5931\u8d25\u65f6\u4e3aNone\uff09\u4e0e\u8bf4\u660e
+    subscription_synced = pyqtSignal(int, object, str)
+    # \u65b0\u89c6\u9891\u603b\u6570
+    sync_finished = pyqtSignal(int)
+
+    def __init__(self, engine, subscriptions, max_workers=4, use_archive=True):
+        super().__init__()
+        self.engine = engine
+        self.subscriptions = subscriptions
+        self.max_workers = max_workers
+        self.use_archive = use_archive
+        self._stop_event = threading.Event()
+        self._runs = set()
+        self._lock = threading.Lock()
+
+    def stop(self):
+        self._stop_event.set()
+        with self._lock:
+            runs = list(self._runs)
+        for run in runs:
+            run.stop()
+
+    def _add_run(self, run):
+        with self._lock:
+            self._runs.add(run)
+        if self._stop_event.is_set():
+            run.stop()
+
+    def _sync(self, subscription, known_ids):
+        if self._stop_event.is_set():
+            raise SubscriptionError("\u540c\u6b65\u5df2\u53d6\u6d88")
+        return sync_subscription(self.engine, subscription, cookie_registry.select(subscription.url), known_ids,
+                                 self._add_run, self._stop_event)
+
+    def run(self):
+        known_ids = DownloadArchive().known_ids() if self.use_archive else None
+        total = 0
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='subscription') as executor:
+            futures = {executor.submit(self._sync, sub, known_ids): sub for sub in self.subscriptions}
+            for future in as_completed(futures):
+                subscription = futures[future]
+                try:
+                    result = future.result()
+                except SubscriptionError as e:
+                    # \u53d6\u6d88\u7684\u8ba2\u9605\u4e0d\u8bb0\u5f55\u7ed3\u679c\uff0c\u4e0b\u6b21\u68c0\u67e5\u65f6\u91cd\u65b0\u540c\u6b65
+                    if not self._stop_event.is_set():
+                        self.subscription_synced.emit(subscription.sub_id, None, str(e))
+                    continue
+                except Exception as e:
+                    self.subscription_synced.emit(subscription.sub_id, None, f"\u540c\u6b65\u51fa\u9519: {str(e)}")
+                    continue
+                message = f"\u65b0\u89c6\u9891 {len(result.entries)} \u4e2a"
+                if subscription.last_id and not result.reached and result.scanned >= MAX_SCAN:
+                    message += f"\uff08\u672a\u627e\u5230\u4e0a\u6b21\u7684\u4f4d\u7f6e\uff0c\u53ea\u68c0\u67e5\u4e86\u6700\u65b0\u7684 {MAX_SCAN} \u4e2a\u89c6\u9891\uff09"
+                total += len(result.entries)
+                self.subscription_synced.emit(subscription.sub_id, result, message)
+        self.sync_finished.emit(total)
+
+
+class SubscriptionScheduler(QObject):
+    """\u5b9a\u65f6\u540c\u6b65\u5230\u671f\u7684\u8ba2\u9605\uff0c\u628a\u65b0\u89c6\u9891\u52a0\u5165\u4e3b\u7a97\u53e3\u7684\u4e0b\u8f7d\u961f\u5217\u5e76\u66f4\u65b0\u6c34\u4f4d
+    """
+    sync_started = pyqtSignal()
+    subscription_synced = pyqtSignal(int, str)
+    sync_finished = pyqtSignal(int)
+
+    def __init__(self, window, check_interval=60000):
+        super().__init__(window)
+        self.window = window
+        self.worker = None
+        self._store = None
+        self._subscriptions = {}
+        self._timer = QTimer(self)
+        self._timer.setInterval(check_interval)
+        self._timer.timeout.connect(self.sync_due)
+        self._timer.start()
+
+    @property
+    def store(self):
+        """\u8ba2\u9605\u5217\u8868\uff0c\u7b2c\u4e00\u6b21\u4f7f\u7528\u65f6\u624d\u6253\u5f00\u6570\u636e\u5e93
+        """
+        if self._store is None:
+            self._store = SubscriptionStore()
+        return self._store
+
+    def is_running(self):
+        return self.worker is not None and self.worker.isRunning()
+
+    def sync_due(self):
+        if not self.is_running():
+            due = self.store.due()
+            if due:
+                self.sync(due)
+
+    def sync(self, subscriptions):
+        """\u540c\u6b65\u6307\u5b9a\u7684\u8ba2\u9605\uff0c\u8fd4\u56de\u672a\u80fd\u5f00\u59cb\u65f6\u7684\u539f\u56e0\uff0c\u5f00\u59cb\u540c\u6b65\u65f6\u8fd4\u56deNone
+        """
+        if self.is_running():
+            return "\u6b63\u5728\u540c\u6b65\u8ba2\u9605"
+        engine = self.window.get_engine()
+        if not engine.available():
+            return "\u8bf7\u5148\u5728\u8bbe\u7f6e\u9875\u9762\u8bbe\u7f6e\u6709\u6548\u7684YT-DLP\u8def\u5f84!"
+        if not self.window.config.get('output_path'):
+            return "\u8bf7\u5728\u8bbe\u7f6e\u9875\u9762\u914d\u7f6e\u8f93\u51fa\u8def\u5f84!"
+        self._subscriptions = {sub.sub_id: sub for sub in subscriptions}
+        self.worker = SubscriptionSyncWorker(engine, subscriptions, analysis_pool.max_workers)
+        self.worker.subscription_synced.connect(self._on_synced)
+        self.worker.sync_finished.connect(self.sync_finished)
+        self.worker.start()
+        self.sync_started.emit()
+        return None
+
+    def _on_synced(self, sub_id, result, message):
+        subscription = self._subscriptions.get(sub_id)
+        if result is not None and subscription is not None:
+            # \u5148\u52a0\u5165\u961f\u5217\u518d\u66f4\u65b0\u6c34\u4f4d\uff1b\u961f\u5217\u5199\u5165\u4efb\u52a1\u65e5\u5fd7\uff0c\u7a0b\u5e8f\u9000\u51fa\u540e\u4ecd\u53ef\u7ee7\u7eed
+            config = self.window.config
+            cookie_path = cookie_registry.select(subscription.url)
+            for entry in result.entries:
+                self.window.download_queue.enqueue(
+                    config.get('ytdlp_path', ''), entry['url'], download_type=subscription.download_type,
+                    output_path=config.get('output_path', ''), cookie_path=cookie_path, use_archive=True,
+                    downloader=config.get('downloader', DOWNLOADER_NATIVE))
+        self.store.record_sync(sub_id, result, message)
+        self.subscription_synced.emit(sub_id, message)
+
+    def stop(self):
+        self._timer.stop()
+        if self.is_running():
+            self.worker.stop()
+            self.worker.wait(3000)
 
 
 class ConfigManager:
@@ -254,6 +849,56 @@ class ConfigManager:
             return str(widget.value())
         return None
 
+class LogView(QPlainTextEdit):
+    """\u65e5\u5fd7\u8f93\u51fa\u63a7\u4ef6
+
+    \u65b0\u6d88\u606f\u5148\u653e\u5165\u56fa\u5b9a\u5bb9\u91cf\u7684\u73af\u5f62\u7f13\u51b2\uff0c\u7531\u5b9a\u65f6\u5668\u6279\u91cf\u5199\u5165\u7eaf\u6587\u672c\u6587\u6863\uff1b
+    \u6587\u6863\u672c\u8eab\u4e5f\u9650\u5236\u6700\u5927\u884c\u6570\uff0c\u56e0\u6b64\u5355\u884c\u5f00\u9500\u4e3aO(1)\u4e14\u5185\u5b58\u6709\u4e0a\u9650\u3002
+    """
+    PROGRESS_LINE = re.compile(r'^\[download\]\s+\d+(?:\.\d+)?%')
+
+    def __init__(self, parent=None, capacity=5000, flush_interval=100):
+        super().__init__(parent)
+        self.setReadOnly(True)
+        self.setUndoRedoEnabled(False)
+        self.setMaximumBlockCount(capacity)
+        self.filter_progress = False
+        self._pending = deque(maxlen=capacity)
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setInterval(flush_interval)
+        self._flush_timer.timeout.connect(self.flush)
+        self._flush_timer.start()
+
+    def set_filter_progress(self, enabled):
+        """\u662f\u5426\u8fc7\u6ee4\u4e0b\u8f7d\u8fdb\u5ea6\u884c
+        """
+        self.filter_progress = bool(enabled)
+
+    def append_line(self, message):
+        if self.filter_progress and self.PROGRESS_LINE.match(message):
+            return
+        self._pending.append(message)
+
+    def flush(self):
+        if not self._pending:
+            return
+        text = '\n'.join(self._pending)
+        self._pending.clear()
+        scrollbar = self.verticalScrollBar()
+        at_bottom = scrollbar.value() >= scrollbar.maximum() - 4
+        self.appendPlainText(text)
+        if at_bottom:
+            scrollbar.setValue(scrollbar.maximum())
+
+    def clear(self):
+        self._pending.clear()
+        super().clear()
+
+    def toPlainText(self):
+        self.flush()
+        return super().toPlainText()
+
+
 class UIManager:
     """\u754c\u9762\u7ba1\u7406\u5668
     """
@@ -369,7 +1014,7 @@ QCheckBox::indicator:checked {
     background-color: #0078d4;
 }
 
-QTextEdit {
+QTextEdit, QPlainTextEdit {
     border: 1px solid #ccc;
     border-radius: 6px;
     font-family: Consolas, monospace;
@@ -395,6 +1040,10 @@ QProgressBar::chunk {
     def log_message(text_edit, message):
         """\u5728\u6587\u672c\u6846\u4e2d\u6dfb\u52a0\u6d88\u606f\u5e76\u6eda\u52a8\u5230\u6700\u540e
         """
+        if isinstance(text_edit, LogView):
+            # \u7531\u65e5\u5fd7\u63a7\u4ef6\u6279\u91cf\u5237\u65b0\u5e76\u5904\u7406\u6eda\u52a8
+            text_edit.append_line(message)
+            return
         text_edit.append(message)
         text_edit.verticalScrollBar().setValue(
             text_edit.verticalScrollBar().maximum()
@@ -414,6 +1063,60 @@ QProgressBar::chunk {
             progress_bar.setValue(100)
             progress_bar.setFormat("\u4e0b\u8f7d\u5b8c\u6210: 100%")
     
+    @staticmethod
+    def update_progress_detail(progress_bar, progress):
+        """\u6839\u636e\u7ed3\u6784\u5316\u8fdb\u5ea6\u8bb0\u5f55\u66f4\u65b0\u8fdb\u5ea6\u6761\uff0c\u663e\u793a\u5df2\u4e0b\u8f7d\u5927\u5c0f\u3001\u901f\u5ea6\u4e0e\u5269\u4f59\u65f6\u95f4
+        """
+        value = int(progress.percent)
+        progress_bar.setValue(value)
+        if value >= 100:
+            progress_bar.setFormat("\u4e0b\u8f7d\u5b8c\u6210: 100%")
+        else:
+            progress_bar.setFormat(describe_progress(progress))
+    
+    @staticmethod
+    def fill_cookie_combo(combo, cookie_files):
+        """\u586b\u5145Cookie\u4e0b\u62c9\u6846\uff1a\u7b2c\u4e00\u9879\u6309\u94fe\u63a5\u81ea\u52a8\u9009\u62e9\uff0c\u5176\u4f59\u663e\u793a\u6587\u4ef6\u540d\uff0c\u6570\u636e\u4e3a\u5b8c\u6574\u8def\u5f84
+        """
+        combo.clear()
+        combo.addItem("\u81ea\u52a8\u9009\u62e9", AUTO_COOKIE)
+        for path in cookie_files:
+            combo.addItem(os.path.basename(path), path)
+            combo.setItemData(combo.count() - 1, path, Qt.ToolTipRole)
+
+    @staticmethod
+    def fill_downloader_combo(combo, current=DOWNLOADER_NATIVE):
+        """\u586b\u5145\u4e0b\u8f7d\u5668\u4e0b\u62c9\u6846\uff0c\u6570\u636e\u4e3a\u4e0b\u8f7d\u5668\u6807\u8bc6
+        """
+        combo.clear()
+        for key, name in DOWNLOADER_NAMES.items():
+            combo.addItem(name, key)
+        index = combo.findData(current)
+        combo.setCurrentIndex(index if index >= 0 else 0)
+
+    @staticmethod
+    def resolve_cookie(combo, enabled, url, log_output, confirm=True):
+        """\u8fd4\u56de (\u662f\u5426\u7ee7\u7eed, cookie\u6587\u4ef6\u8def\u5f84)\uff1a\u81ea\u52a8\u9009\u62e9\u65f6\u6309\u94fe\u63a5\u7684\u57df\u540d\u67e5\u627e\uff0c\u5e76\u68c0\u67e5cookie\u662f\u5426\u8fc7\u671f\u6216\u4e0e\u94fe\u63a5\u4e0d\u5339\u914d\uff0c
+        confirm \u4e3aTrue\u4e14\u95ee\u9898\u4e25\u91cd\u65f6\u8be2\u95ee\u662f\u5426\u7ee7\u7eed
+        """
+        if not enabled or combo.currentIndex() == -1:
+            return True, None
+        cookie_path = cookie_registry.resolve(combo.currentData(), url)
+        if combo.currentData() == AUTO_COOKIE:
+            if cookie_path is None:
+                UIManager.log_message(log_output, "\u6ca1\u6709\u4e0e\u94fe\u63a5\u5339\u914d\u7684Cookie\u6587\u4ef6\uff0c\u4e0d\u4f7f\u7528Cookie")
+                return True, None
+            UIManager.log_message(log_output, f"\u81ea\u52a8\u9009\u62e9Cookie\u6587\u4ef6: {os.path.basename(cookie_path)}")
+        warnings = cookie_registry.check(cookie_path, url)
+        for warning in warnings:
+            UIManager.log_message(log_output, warning.message)
+        fatal = [warning.message for warning in warnings if warning.fatal]
+        if confirm and fatal:
+            answer = QMessageBox.question(None, "Cookie", "\n".join(fatal) + "\n\n\u4ecd\u8981\u7ee7\u7eed\u5417?",
+                                          QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+            return answer == QMessageBox.Yes, cookie_path
+        return True, cookie_path
+
     @staticmethod
     def browse_file(title, file_filter):
         """\u6587\u4ef6\u9009\u62e9\u5bf9\u8bdd\u6846
@@ -1,9 +1,14 @@
 import os
 import sys
-from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QComboBox, QCheckBox, QGroupBox, QProgressBar, QTextEdit, QDateEdit, QSpinBox, QFormLayout)
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QComboBox, QCheckBox, QGroupBox, QProgressBar, QTextEdit, QDateEdit, QSpinBox, QFormLayout, QMessageBox, QListWidget)
 from PyQt5.QtCore import Qt, QDate
 from PyQt5.QtGui import QFont
-from utils import AnalyzeWorker, DownloadWorker, UIManager, ConfigManager
+from utils import PlaylistAnalyzeWorker, DownloadWorker, DownloadQueue, DownloadJob, UIManager, ConfigManager, LogView
+from core.archive import DownloadArchive
+from core.fragment_tuner import AUTO_FRAGMENTS, MAX_FRAGMENTS
+from core.download import CANCELLED_MESSAGE
+from core.bandwidth import PRIORITY_HIGH
+from core.external import DOWNLOADER_NATIVE
 
 
 class PlaylistDownloader(QWidget):
@@ -13,18 +18,38 @@ class PlaylistDownloader(QWidget):
         self.config_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.ini')
         self.analyze_worker = None
         self.worker = None
+        self.entries = []
+        self.archived_ids = set()
+        self.archived_count = 0
+        # 按条目并行下载时使用的独立队列
+        self.entry_queue = DownloadQueue(self)
+        self.entry_queue.jobs_updated.connect(self.on_entry_jobs_updated)
+        self.entry_queue.queue_idle.connect(self.on_fanout_finished)
+        self.entry_rows = {}
+        self.fanout_active = False
+        self.fanout_pending = False
+        self.paused = False
+        self.cancel_requested = False
         self.init_ui()
         self.load_config()
         UIManager.apply_styles(self)
 
     def closeEvent(self, event):
-        # 终止所有运行中的工作线程
-        if self.analyze_worker and self.analyze_worker.isRunning():
-            self.analyze_worker.terminate()
-        if self.worker and self.worker.isRunning():
-            self.worker.terminate()
+        self.shutdown()
         event.accept()
 
+    def shutdown(self):
+        """结束所有运行中的分析与下载（连同 yt-dlp 的子进程），并等待工作线程退出
+        """
+        self.cancel_requested = True
+        workers = [worker for worker in (self.analyze_worker, self.worker) if worker and worker.isRunning()]
+        for worker in workers:
+            worker.stop()
+        self.entry_queue.cancel_all()
+        for worker in workers:
+            worker.wait(3000)
+        self.entry_queue.wait_all()
+
     def init_ui(self):
         # 主布局
         main_layout = QVBoxLayout()
@@ -45,11 +70,26 @@ class PlaylistDownloader(QWidget):
         self.url_edit.setPlaceholderText("输入播放列表、频道或用户页面URL")
         self.analyze_btn = QPushButton("分析资源")
         self.analyze_btn.clicked.connect(self.analyze_resource)
+        self.force_refresh_checkbox = QCheckBox("强制刷新")
+        self.force_refresh_checkbox.setToolTip("忽略分析缓存，重新获取资源信息")
         url_layout.addWidget(self.url_edit)
         url_layout.addWidget(self.analyze_btn)
+        url_layout.addWidget(self.force_refresh_checkbox)
         url_group.setLayout(url_layout)
         main_layout.addWidget(url_group)
 
+        # 分析得到的条目列表（分析过程中逐批填充）
+        entries_group = QGroupBox("视频列表")
+        entries_layout = QVBoxLayout()
+        self.entries_list = QListWidget()
+        self.entries_list.setUniformItemSizes(True)
+        self.entries_list.setMaximumHeight(160)
+        entries_layout.addWidget(self.entries_list)
+        self.entries_count_label = QLabel("共 0 个视频")
+        entries_layout.addWidget(self.entries_count_label)
+        entries_group.setLayout(entries_layout)
+        main_layout.addWidget(entries_group)
+
         # 筛选条件区域
         filter_group = QGroupBox("筛选条件")
         filter_layout = QFormLayout()
@@ -80,9 +120,35 @@ class PlaylistDownloader(QWidget):
 
         # 线程数设置
         self.thread_count_slider = QSpinBox()
-        self.thread_count_slider.setRange(1, 16)
+        self.thread_count_slider.setRange(1, MAX_FRAGMENTS)
         self.thread_count_slider.setValue(4)
-        filter_layout.addRow("下载线程数:", self.thread_count_slider)
+        self.auto_thread_checkbox = QCheckBox("自动")
+        self.auto_thread_checkbox.setToolTip("根据实际下载速度为每个网站自动调节分片并发数")
+        self.auto_thread_checkbox.toggled.connect(lambda checked: self.thread_count_slider.setEnabled(not checked))
+        thread_layout = QHBoxLayout()
+        thread_layout.addWidget(self.thread_count_slider)
+        thread_layout.addWidget(self.auto_thread_checkbox)
+        thread_layout.addStretch()
+        filter_layout.addRow("下载线程数:", thread_layout)
+
+        # 下载器选择
+        self.downloader_combo = QComboBox()
+        self.downloader_combo.setToolTip("aria2c 用多个连接同时下载普通文件，找不到 aria2c 时自动改用内置下载器")
+        UIManager.fill_downloader_combo(self.downloader_combo)
+        filter_layout.addRow("下载器:", self.downloader_combo)
+
+        # 按条目并行下载
+        fanout_layout = QHBoxLayout()
+        self.fanout_checkbox = QCheckBox("按条目并行下载")
+        self.fanout_checkbox.setToolTip("先枚举列表中的视频，每个视频作为独立任务并行下载")
+        self.parallel_entries_spin = QSpinBox()
+        self.parallel_entries_spin.setRange(1, 16)
+        self.parallel_entries_spin.setValue(3)
+        fanout_layout.addWidget(self.fanout_checkbox)
+        fanout_layout.addWidget(QLabel("同时下载:"))
+        fanout_layout.addWidget(self.parallel_entries_spin)
+        fanout_layout.addStretch()
+        filter_layout.addRow("执行方式:", fanout_layout)
 
         filter_group.setLayout(filter_layout)
         main_layout.addWidget(filter_group)
@@ -93,9 +159,7 @@ class PlaylistDownloader(QWidget):
         self.cookie_combo = QComboBox()
         self.cookie_combo.setEnabled(False)
         # 从主窗口加载Cookie文件列表
-        if hasattr(self.parent, 'cookie_files'):
-            # cookie_files现在是列表类型
-            self.cookie_combo.addItems(self.parent.cookie_files)
+        UIManager.fill_cookie_combo(self.cookie_combo, getattr(self.parent, 'cookie_files', []))
         # 连接主窗口Cookie更新信号
         self.parent.cookie_updated.connect(self.update_cookie_combo)
         self.use_cookie_checkbox.stateChanged.connect(self.on_use_cookie_changed)
@@ -103,18 +167,43 @@ class PlaylistDownloader(QWidget):
         cookie_layout.addWidget(self.cookie_combo)
         main_layout.addLayout(cookie_layout)
 
+        # 下载存档设置
+        archive_layout = QHBoxLayout()
+        self.use_archive_checkbox = QCheckBox("跳过已下载（下载存档）")
+        self.use_archive_checkbox.setChecked(True)
+        self.break_on_existing_checkbox = QCheckBox("遇到已下载的视频即停止")
+        self.break_on_existing_checkbox.setToolTip("适合按发布时间倒序的频道增量同步")
+        archive_layout.addWidget(self.use_archive_checkbox)
+        archive_layout.addWidget(self.break_on_existing_checkbox)
+        archive_layout.addStretch()
+        main_layout.addLayout(archive_layout)
+
         # 下载按钮
         self.download_btn = QPushButton("开始下载")
         self.download_btn.setObjectName("downloadBtn")
         self.download_btn.clicked.connect(self.start_download)
-        main_layout.addWidget(self.download_btn, alignment=Qt.AlignCenter)
+        self.pause_btn = QPushButton("暂停")
+        self.pause_btn.setEnabled(False)
+        self.pause_btn.clicked.connect(self.toggle_pause)
+        self.cancel_btn = QPushButton("取消下载")
+        self.cancel_btn.setEnabled(False)
+        self.cancel_btn.clicked.connect(self.cancel_download)
+        control_layout = QHBoxLayout()
+        control_layout.addStretch()
+        control_layout.addWidget(self.download_btn)
+        control_layout.addWidget(self.pause_btn)
+        control_layout.addWidget(self.cancel_btn)
+        control_layout.addStretch()
+        main_layout.addLayout(control_layout)
 
         # 日志输出
         log_group = QGroupBox("下载日志")
         log_layout = QVBoxLayout()
-        self.log_output = QTextEdit()
-        self.log_output.setReadOnly(True)
+        self.log_output = LogView()
         log_layout.addWidget(self.log_output)
+        self.filter_progress_checkbox = QCheckBox("隐藏进度行")
+        self.filter_progress_checkbox.stateChanged.connect(self.log_output.set_filter_progress)
+        log_layout.addWidget(self.filter_progress_checkbox)
         log_group.setLayout(log_layout)
         main_layout.addWidget(log_group)
 
@@ -129,17 +218,15 @@ class PlaylistDownloader(QWidget):
 
     def update_config(self, config):
         self.config = config
+        UIManager.fill_downloader_combo(self.downloader_combo, config.get('downloader', DOWNLOADER_NATIVE))
 
     def analyze_resource(self):
         ytdlp_path = self.config.get('ytdlp_path', '').strip() if hasattr(self, 'config') else ""
         url = self.url_edit.text().strip()
+        engine = self.parent.get_engine()
 
         # 验证输入
-        if not ytdlp_path:
-            UIManager.show_message("警告", "请先在主窗口设置YT-DLP路径!", QMessageBox.Warning)
-            return
-
-        if not os.path.exists(ytdlp_path):
+        if not engine.available():
             UIManager.show_message("警告", "YT-DLP程序不存在，请检查路径!", QMessageBox.Warning)
             return
 
@@ -150,35 +237,76 @@ class PlaylistDownloader(QWidget):
         # 禁用分析按钮
         self.analyze_btn.setEnabled(False)
         UIManager.log_message(self.log_output, "正在分析资源信息...")
+        self.entries = []
+        self.entries_list.clear()
+        self.entries_count_label.setText("共 0 个视频")
+        # 一次性读取存档，用于标记已下载的条目
+        self.archived_ids = DownloadArchive().known_ids() if self.use_archive_checkbox.isChecked() else set()
+        self.archived_count = 0
+        _, cookie_path = self.selected_cookie_path(url, confirm=False)
 
         # 创建并启动分析线程
-        self.analyze_worker = AnalyzeWorker(ytdlp_path, url)
+        self.analyze_worker = PlaylistAnalyzeWorker(
+            ytdlp_path, url, cookie_path,
+            cache=self.parent.analysis_cache,
+            force_refresh=self.force_refresh_checkbox.isChecked(),
+            engine=engine
+        )
+        self.analyze_worker.entries_found.connect(self.on_entries_found)
         self.analyze_worker.analysis_finished.connect(self.on_analysis_finished)
+        self.analyze_worker.error_occurred.connect(lambda msg: self.on_analysis_finished({'error': msg}))
         self.analyze_worker.start()
 
+    def is_archived(self, entry):
+        return ((entry.get('ie_key') or '').lower(), entry.get('id')) in self.archived_ids
+
+    def on_entries_found(self, entries):
+        self.entries.extend(entries)
+        labels = []
+        for entry in entries:
+            label = f"{entry.get('playlist_index', '')}. {entry.get('title') or entry.get('id') or entry.get('url')}"
+            if self.is_archived(entry):
+                self.archived_count += 1
+                label += "  [已下载]"
+            labels.append(label)
+        self.entries_list.addItems(labels)
+        self.entries_count_label.setText(f"共 {len(self.entries)} 个视频，已下载 {self.archived_count} 个")
+
     def on_analysis_finished(self, resource_info):
         # 恢复分析按钮状态
         self.analyze_btn.setEnabled(True)
 
         # 检查是否有错误
         if "error" in resource_info:
+            self.fanout_pending = False
             UIManager.log_message(self.log_output, f"分析失败: {resource_info['error']}")
             UIManager.show_message("错误", f"分析失败: {resource_info['error']}", QMessageBox.Critical)
             return
 
         # 更新日志
-        UIManager.log_message(self.log_output, "资源分析完成")
+        if self.analyze_worker and self.analyze_worker.from_cache:
+            UIManager.log_message(self.log_output, "资源分析完成（来自缓存）")
+        else:
+            UIManager.log_message(self.log_output, "资源分析完成")
         UIManager.log_message(self.log_output, f"标题: {resource_info.get('title', '未知')}")
         UIManager.log_message(self.log_output, f"视频总数: {resource_info.get('_total', '未知')}")
 
+        # 分析是由按条目下载触发的，继续开始下载
+        if self.fanout_pending:
+            self.fanout_pending = False
+            self.start_download()
+
     def on_use_cookie_changed(self, state):
         self.cookie_combo.setEnabled(state == Qt.Checked)
 
-    def update_cookie_combo(self):
-        self.cookie_combo.clear()
-        if self.parent and hasattr(self.parent, 'cookie_files'):
-            # cookie_files现在是列表类型
-            self.cookie_combo.addItems(self.parent.cookie_files)
+    def update_cookie_combo(self, cookie_files):
+        UIManager.fill_cookie_combo(self.cookie_combo, cookie_files)
+
+    def selected_cookie_path(self, url, confirm=True):
+        """获取选中的cookie文件路径，返回 (是否继续, 路径)
+        """
+        return UIManager.resolve_cookie(self.cookie_combo, self.use_cookie_checkbox.isChecked(), url,
+                                        self.log_output, confirm)
 
     def start_download(self):
         if not self.parent:
@@ -188,23 +316,14 @@ class PlaylistDownloader(QWidget):
         ytdlp_path = self.config.get('ytdlp_path', '').strip()
         url = self.url_edit.text().strip()
         output_path = self.config.get('output_path', '').strip()
-        cookie_name = self.cookie_combo.currentText() if self.use_cookie_checkbox.isChecked() and self.cookie_combo.currentIndex() != -1 else None
-        # 从主窗口的cookie_files列表中查找对应的完整路径
-        cookie_path = None
-        if cookie_name and hasattr(self.parent, 'cookie_files'):
-            # 在列表中查找匹配的cookie文件
-            for cookie_file in self.parent.cookie_files:
-                if os.path.basename(cookie_file) == cookie_name:
-                    cookie_path = cookie_file
-                    break
         download_type = self.download_type_combo.currentText()
-        thread_count = self.thread_count_slider.value()
+        thread_count = AUTO_FRAGMENTS if self.auto_thread_checkbox.isChecked() else self.thread_count_slider.value()
         max_count = self.limit_count.value()
         start_date = self.start_date.date().toString("yyyyMMdd")
         end_date = self.end_date.date().toString("yyyyMMdd")
 
         # 验证输入
-        if not ytdlp_path or not os.path.exists(ytdlp_path):
+        if not self.parent.get_engine().available():
             UIManager.show_message("警告", "YT-DLP程序不存在，请检查路径!", QMessageBox.Warning)
             return
 
@@ -216,38 +335,190 @@ class PlaylistDownloader(QWidget):
             UIManager.show_message("警告", "请选择保存目录!", QMessageBox.Warning)
             return
 
+        # 按条目并行下载需要先枚举条目
+        if self.fanout_checkbox.isChecked() and not self.entries:
+            self.fanout_pending = True
+            self.analyze_resource()
+            return
+
+        proceed, cookie_path = self.selected_cookie_path(url)
+        if not proceed:
+            return
+
         # 禁用下载按钮
-        self.download_btn.setEnabled(False)
+        self.set_running(True)
         self.progress_bar.setVisible(True)
         self.progress_bar.setValue(0)
         UIManager.log_message(self.log_output, "开始下载资源...")
 
         # 构建yt-dlp命令参数
         extra_params = []
-        
-        # 添加数量限制参数
-        if max_count > 0:
-            extra_params.extend(['--max-downloads', str(max_count)])
 
         # 添加日期范围筛选
         extra_params.extend(['--dateafter', start_date])
         extra_params.extend(['--datebefore', end_date])
 
+        if self.fanout_checkbox.isChecked():
+            self.start_fanout(ytdlp_path, download_type, output_path, cookie_path, thread_count,
+                              max_count, start_date, end_date, extra_params)
+            return
+
+        # 添加数量限制参数
+        if max_count > 0:
+            extra_params.extend(['--max-downloads', str(max_count)])
+
+        # 增量同步时遇到已下载的视频即停止
+        if self.use_archive_checkbox.isChecked() and self.break_on_existing_checkbox.isChecked():
+            extra_params.append('--break-on-existing')
+
         # 创建并启动下载线程
         self.worker = DownloadWorker(
             ytdlp_path, url, download_type, output_path,
             cookie_path if cookie_path else None,
             thread_count=thread_count,
-            extra_params=extra_params
+            extra_params=extra_params,
+            engine=self.parent.get_engine(),
+            use_archive=self.use_archive_checkbox.isChecked(),
+            journal=self.parent.journal,
+            downloader=self.downloader_combo.currentData()
         )
+        self.worker.task.priority = PRIORITY_HIGH
         self.worker.progress_updated.connect(lambda msg: UIManager.log_message(self.log_output, msg))
-        self.worker.progress_changed.connect(lambda val: UIManager.update_progress_bar(self.progress_bar, val))
+        self.worker.progress_detail.connect(lambda progress: UIManager.update_progress_detail(self.progress_bar, progress))
         self.worker.download_finished.connect(self.on_download_finished)
+        self.worker.error_occurred.connect(lambda msg: self.on_download_finished(False, msg))
         self.worker.start()
 
+    def start_fanout(self, ytdlp_path, download_type, output_path, cookie_path, thread_count,
+                     max_count, start_date, end_date, extra_params):
+        """每个条目作为独立任务加入队列，按设置的并行数同时下载
+        """
+        use_archive = self.use_archive_checkbox.isChecked()
+        selected = []
+        for row, entry in enumerate(self.entries):
+            if not entry.get('url'):
+                continue
+            if use_archive and self.is_archived(entry):
+                continue
+            # 条目自带发布日期时直接在本地筛选，否则交给yt-dlp判断
+            upload_date = entry.get('upload_date')
+            if upload_date and not (start_date <= upload_date <= end_date):
+                continue
+            selected.append((row, entry))
+            if max_count and len(selected) >= max_count:
+                break
+
+        if not selected:
+            self.set_running(False)
+            UIManager.log_message(self.log_output, "没有需要下载的条目")
+            return
+
+        # 保留列表中的序号作为文件名前缀
+        width = len(str(max(entry.get('playlist_index') or 0 for _, entry in selected) or 1))
+        self.entry_queue.engine = self.parent.get_engine()
+        self.entry_queue.journal = self.parent.journal
+        self.entry_queue.clear_finished()
+        self.entry_queue.set_max_parallel(self.parallel_entries_spin.value())
+        self.entry_rows = {}
+        for row, entry in selected:
+            index = entry.get('playlist_index') or row + 1
+            job_id = self.entry_queue.enqueue(
+                ytdlp_path, entry['url'],
+                download_type=download_type,
+                output_path=output_path,
+                cookie_path=cookie_path,
+                thread_count=thread_count,
+                extra_params=list(extra_params),
+                use_archive=use_archive,
+                output_template=f"{index:0{width}d} - %(title)s.%(ext)s",
+                downloader=self.downloader_combo.currentData()
+            )
+            self.entry_rows[job_id] = row
+        self.fanout_active = True
+        UIManager.log_message(self.log_output,
+                              f"按条目并行下载 {len(selected)} 个视频，同时下载 {self.entry_queue.max_parallel} 个")
+        self.update_fanout_progress()
+
+    def on_entry_jobs_updated(self, job_ids):
+        for job_id in job_ids:
+            job = self.entry_queue.jobs.get(job_id)
+            row = self.entry_rows.get(job_id)
+            item = self.entries_list.item(row) if row is not None else None
+            if job is None or item is None:
+                continue
+            base = item.text().split("  [", 1)[0]
+            status = f"{job.state} {job.progress}%" if job.state == DownloadJob.RUNNING else job.state
+            item.setText(f"{base}  [{status}]")
+        self.update_fanout_progress()
+
+    def update_fanout_progress(self):
+        """根据各条目任务的进度计算整体进度
+        """
+        jobs = [self.entry_queue.jobs[job_id] for job_id in self.entry_rows if job_id in self.entry_queue.jobs]
+        if not jobs:
+            return
+        done = sum(1 for job in jobs if job.state == DownloadJob.FINISHED)
+        failed = sum(1 for job in jobs if job.state in (DownloadJob.FAILED, DownloadJob.CANCELLED))
+        percent = sum(100 if not job.is_active() else job.progress for job in jobs) // len(jobs)
+        self.progress_bar.setValue(percent)
+        self.progress_bar.setFormat(f"整体进度: {percent}%  (完成 {done}/{len(jobs)}，失败 {failed})")
+
+    def on_fanout_finished(self):
+        if not self.fanout_active:
+            return
+        self.fanout_active = False
+        # 刷新最后一批尚未推送的状态
+        self.on_entry_jobs_updated(list(self.entry_rows))
+        jobs = [self.entry_queue.jobs[job_id] for job_id in self.entry_rows if job_id in self.entry_queue.jobs]
+        failed = [job for job in jobs if job.state == DownloadJob.FAILED]
+        self.on_download_finished(not failed, f"按条目下载结束: 成功 {len(jobs) - len(failed)} 个，失败 {len(failed)} 个")
+
+    def set_running(self, running):
+        self.download_btn.setEnabled(not running)
+        self.pause_btn.setEnabled(running)
+        self.cancel_btn.setEnabled(running)
+        self.paused = False
+        self.pause_btn.setText("暂停")
+        if running:
+            self.cancel_requested = False
+
+    def toggle_pause(self):
+        """暂停或继续当前下载；按条目下载时作用于所有运行中的条目
+        """
+        if self.fanout_active:
+            target = DownloadJob.RUNNING if not self.paused else DownloadJob.PAUSED
+            action = self.entry_queue.pause if not self.paused else self.entry_queue.resume
+            changed = False
+            for job_id in self.entry_rows:
+                job = self.entry_queue.jobs.get(job_id)
+                if job and job.state == target and action(job_id):
+                    changed = True
+        elif self.worker and self.worker.isRunning():
+            changed = self.worker.resume() if self.paused else self.worker.pause()
+        else:
+            changed = False
+        if not changed:
+            UIManager.log_message(self.log_output, "当前下载无法暂停")
+            return
+        self.paused = not self.paused
+        self.pause_btn.setText("继续" if self.paused else "暂停")
+        UIManager.log_message(self.log_output, "下载已暂停" if self.paused else "下载已继续")
+
+    def cancel_download(self):
+        self.cancel_requested = True
+        self.cancel_btn.setEnabled(False)
+        self.pause_btn.setEnabled(False)
+        if self.worker and self.worker.isRunning():
+            self.worker.stop()
+        if self.fanout_active:
+            self.entry_queue.cancel_all()
+        UIManager.log_message(self.log_output, "正在取消下载...")
+
     def on_download_finished(self, success, message):
-        self.download_btn.setEnabled(True)
+        self.set_running(False)
         UIManager.log_message(self.log_output, message)
+        if self.cancel_requested or message == CANCELLED_MESSAGE:
+            return
         if success:
             UIManager.show_message("成功", "下载完成!", QMessageBox.Information)
         else:
@@ -257,6 +528,7 @@ class PlaylistDownloader(QWidget):
         widgets = {
             'playlist_download_type': self.download_type_combo,
             'playlist_thread_count': self.thread_count_slider,
+            'playlist_auto_thread_count': self.auto_thread_checkbox,
             'playlist_limit_count': self.limit_count
         }
         success, msg = ConfigManager.load_config(self.config_file, widgets)
@@ -267,6 +539,7 @@ class PlaylistDownloader(QWidget):
         widgets = {
             'playlist_download_type': self.download_type_combo,
             'playlist_thread_count': self.thread_count_slider,
+            'playlist_auto_thread_count': self.auto_thread_checkbox,
             'playlist_limit_count': self.limit_count
         }
         success, msg = ConfigManager.save_config(self.config_file, widgets)
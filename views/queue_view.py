@@ -0,0 +1,357 @@
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QGroupBox, QLabel, QPushButton, QComboBox, QSpinBox, QPlainTextEdit, QTableView, QHeaderView, QAbstractItemView, QMessageBox)
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PyQt5.QtGui import QColor
+from utils import UIManager, BatchAnalyzeWorker
+from core.bandwidth import scheduler as bandwidth_scheduler
+from core.progress import format_bytes, format_eta
+from core.external import DOWNLOADER_NATIVE
+
+
+class DownloadQueueModel(QAbstractTableModel):
+    """下载队列表格模型，只按需刷新发生变化的行
+    """
+    HEADERS = ["URL", "下载类型", "状态", "进度", "速度", "信息"]
+
+    def __init__(self, queue, parent=None):
+        super().__init__(parent)
+        self.queue = queue
+        self._rows = {}
+        self._rebuild_rows()
+        queue.job_added.connect(self.on_job_added)
+        queue.jobs_updated.connect(self.on_jobs_updated)
+        queue.jobs_reordered.connect(self.on_jobs_reordered)
+
+    def _rebuild_rows(self):
+        self._rows = {job_id: row for row, job_id in enumerate(self.queue.order)}
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.queue.order)
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def job_at(self, row):
+        if 0 <= row < len(self.queue.order):
+            return self.queue.jobs[self.queue.order[row]]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        job = self.job_at(index.row())
+        if job is None:
+            return None
+        column = index.column()
+        if column == 0:
+            return job.url
+        elif column == 1:
+            return job.options.get('download_type', '')
+        elif column == 2:
+            return job.state
+        elif column == 3:
+            return f"{job.progress}%"
+        elif column == 4:
+            return f"{format_bytes(job.speed)}/s" if job.speed and job.state == job.RUNNING else ""
+        return job.message
+
+    def on_job_added(self, job_id):
+        row = len(self.queue.order) - 1
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._rows[job_id] = row
+        self.endInsertRows()
+
+    def on_jobs_updated(self, job_ids):
+        last_column = len(self.HEADERS) - 1
+        for job_id in job_ids:
+            row = self._rows.get(job_id)
+            if row is not None:
+                self.dataChanged.emit(self.index(row, 2), self.index(row, last_column))
+
+    def on_jobs_reordered(self):
+        self.beginResetModel()
+        self._rebuild_rows()
+        self.endResetModel()
+
+
+class AnalysisResultsModel(QAbstractTableModel):
+    """批量分析结果表格，分析结果按完成顺序逐行填入
+    """
+    HEADERS = ["URL", "标题", "时长", "状态"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.urls = []
+        self.results = []
+
+    def set_urls(self, urls):
+        self.beginResetModel()
+        self.urls = list(urls)
+        self.results = [None] * len(self.urls)
+        self.endResetModel()
+
+    def set_result(self, row, info):
+        self.results[row] = info
+        self.dataChanged.emit(self.index(row, 1), self.index(row, len(self.HEADERS) - 1))
+
+    def failed_urls(self):
+        return {url for url, info in zip(self.urls, self.results)
+                if info is not None and 'error' in info and not info.get('cancelled')}
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.urls)
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        info = self.results[index.row()]
+        failed = info is not None and 'error' in info
+        if role == Qt.ForegroundRole and failed and not info.get('cancelled'):
+            return QColor('#d32f2f')
+        if role != Qt.DisplayRole:
+            return None
+        column = index.column()
+        if column == 0:
+            return self.urls[index.row()]
+        if info is None:
+            return "分析中" if column == 3 else ""
+        if failed:
+            return info['error'] if column == 3 else ""
+        if column == 1:
+            return info.get('title', '')
+        if column == 2:
+            return format_eta(info['duration']) if info.get('duration') else ""
+        return "可下载"
+
+
+class QueueView(QWidget):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.parent = parent
+        self.queue = parent.download_queue
+        self.analyze_worker = None
+        self.init_ui()
+
+    def init_ui(self):
+        # 主布局
+        main_layout = QVBoxLayout(self)
+        main_layout.setSpacing(15)
+        main_layout.setContentsMargins(20, 20, 20, 20)
+
+        # 批量添加区域
+        add_group = QGroupBox("批量添加任务")
+        add_layout = QVBoxLayout()
+        self.url_list_edit = QPlainTextEdit()
+        self.url_list_edit.setPlaceholderText("每行输入一个视频链接")
+        self.url_list_edit.setMaximumHeight(120)
+        add_layout.addWidget(self.url_list_edit)
+
+        options_layout = QHBoxLayout()
+        options_layout.addWidget(QLabel("下载类型:"))
+        self.download_type_combo = QComboBox()
+        self.download_type_combo.addItems(["全部下载", "仅音频", "仅视频"])
+        options_layout.addWidget(self.download_type_combo)
+        options_layout.addWidget(QLabel("最大并行任务数:"))
+        self.max_parallel_spin = QSpinBox()
+        self.max_parallel_spin.setRange(1, 16)
+        self.max_parallel_spin.setValue(self.queue.max_parallel)
+        self.max_parallel_spin.valueChanged.connect(self.queue.set_max_parallel)
+        options_layout.addWidget(self.max_parallel_spin)
+        options_layout.addStretch()
+        self.analyze_btn = QPushButton("分析链接")
+        self.analyze_btn.setToolTip("并发分析全部链接，提前发现失效或需要登录的链接")
+        self.analyze_btn.clicked.connect(self.analyze_urls)
+        options_layout.addWidget(self.analyze_btn)
+        self.enqueue_btn = QPushButton("加入队列")
+        self.enqueue_btn.setObjectName("downloadBtn")
+        self.enqueue_btn.clicked.connect(self.enqueue_urls)
+        options_layout.addWidget(self.enqueue_btn)
+        add_layout.addLayout(options_layout)
+        add_group.setLayout(add_layout)
+        main_layout.addWidget(add_group)
+
+        # 批量分析结果，第一次分析时显示
+        self.analysis_group = QGroupBox("分析结果")
+        analysis_layout = QVBoxLayout()
+        self.analysis_model = AnalysisResultsModel(self)
+        self.analysis_table = QTableView()
+        self.analysis_table.setModel(self.analysis_model)
+        self.analysis_table.verticalHeader().setVisible(False)
+        self.analysis_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.analysis_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
+        self.analysis_table.setMaximumHeight(160)
+        analysis_layout.addWidget(self.analysis_table)
+        analysis_control_layout = QHBoxLayout()
+        self.analysis_status_label = QLabel()
+        analysis_control_layout.addWidget(self.analysis_status_label, 1)
+        self.stop_analysis_btn = QPushButton("停止分析")
+        self.stop_analysis_btn.clicked.connect(self.stop_analysis)
+        analysis_control_layout.addWidget(self.stop_analysis_btn)
+        self.remove_failed_btn = QPushButton("移除无效链接")
+        self.remove_failed_btn.clicked.connect(self.remove_failed_urls)
+        analysis_control_layout.addWidget(self.remove_failed_btn)
+        analysis_layout.addLayout(analysis_control_layout)
+        self.analysis_group.setLayout(analysis_layout)
+        self.analysis_group.setVisible(False)
+        main_layout.addWidget(self.analysis_group)
+
+        # 任务列表
+        self.model = DownloadQueueModel(self.queue, self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.horizontalHeader().setSectionResizeMode(5, QHeaderView.Stretch)
+        main_layout.addWidget(self.table)
+
+        # 队列控制按钮
+        control_layout = QHBoxLayout()
+        control_layout.setSpacing(10)
+        for text, slot in (("上移", lambda: self.move_selected(-1)),
+                           ("下移", lambda: self.move_selected(1)),
+                           ("置顶", self.move_selected_to_top),
+                           ("暂停选中任务", self.pause_selected),
+                           ("继续选中任务", self.resume_selected),
+                           ("取消选中任务", self.cancel_selected),
+                           ("清除已结束任务", self.queue.clear_finished)):
+            btn = QPushButton(text)
+            btn.clicked.connect(slot)
+            control_layout.addWidget(btn)
+        control_layout.addStretch()
+        self.status_label = QLabel()
+        control_layout.addWidget(self.status_label)
+        main_layout.addLayout(control_layout)
+
+        self.queue.jobs_updated.connect(self.update_status)
+        self.queue.jobs_reordered.connect(self.update_status)
+        self.update_status()
+
+    def enqueue_urls(self):
+        ytdlp_path = self.parent.config.get('ytdlp_path', '')
+        output_path = self.parent.config.get('output_path', '')
+
+        if not self.parent.get_engine().available():
+            UIManager.show_message("警告", "请先在设置页面设置有效的YT-DLP路径!", QMessageBox.Warning)
+            return
+
+        if not output_path:
+            UIManager.show_message("警告", "请在设置页面配置输出路径!", QMessageBox.Warning)
+            return
+
+        urls = [line.strip() for line in self.url_list_edit.toPlainText().splitlines() if line.strip()]
+        if not urls:
+            UIManager.show_message("警告", "请输入视频URL!", QMessageBox.Warning)
+            return
+
+        download_type = self.download_type_combo.currentText()
+        for url in urls:
+            self.queue.enqueue(ytdlp_path, url, download_type=download_type, output_path=output_path,
+                               downloader=self.parent.config.get('downloader', DOWNLOADER_NATIVE))
+        self.url_list_edit.clear()
+        self.update_status()
+
+    def analyze_urls(self):
+        engine = self.parent.get_engine()
+        if not engine.available():
+            UIManager.show_message("警告", "请先在设置页面设置有效的YT-DLP路径!", QMessageBox.Warning)
+            return
+
+        urls = [line.strip() for line in self.url_list_edit.toPlainText().splitlines() if line.strip()]
+        if not urls:
+            UIManager.show_message("警告", "请输入视频URL!", QMessageBox.Warning)
+            return
+
+        self.analysis_model.set_urls(urls)
+        self.analysis_group.setVisible(True)
+        self.analyze_btn.setEnabled(False)
+        self.stop_analysis_btn.setEnabled(True)
+        self.analyzed_count = 0
+        self.analysis_status_label.setText(f"正在分析 {len(urls)} 个链接...")
+
+        self.analyze_worker = BatchAnalyzeWorker(self.parent.config.get('ytdlp_path', ''), urls,
+                                                 cache=self.parent.analysis_cache, engine=engine)
+        self.analyze_worker.result_ready.connect(self.on_analysis_result)
+        self.analyze_worker.batch_finished.connect(self.on_analysis_finished)
+        self.analyze_worker.start()
+
+    def on_analysis_result(self, row, info):
+        self.analysis_model.set_result(row, info)
+        self.analyzed_count += 1
+        self.analysis_status_label.setText(f"已分析 {self.analyzed_count} / {len(self.analysis_model.urls)}")
+
+    def on_analysis_finished(self, succeeded, failed):
+        self.analyze_btn.setEnabled(True)
+        self.stop_analysis_btn.setEnabled(False)
+        # 停止后未完成的链接不计入
+        finished = "分析完成" if succeeded + failed == len(self.analysis_model.urls) else "分析已停止"
+        self.analysis_status_label.setText(f"{finished}: 可下载 {succeeded} 个，失败 {failed} 个")
+
+    def stop_analysis(self):
+        if self.analyze_worker and self.analyze_worker.isRunning():
+            self.analyze_worker.stop()
+
+    def remove_failed_urls(self):
+        """从链接列表中删除分析失败的链接
+        """
+        failed = self.analysis_model.failed_urls()
+        if not failed:
+            return
+        lines = [line for line in self.url_list_edit.toPlainText().splitlines() if line.strip() not in failed]
+        self.url_list_edit.setPlainText('\n'.join(lines))
+
+    def shutdown(self):
+        """结束运行中的批量分析，并等待工作线程退出
+        """
+        if self.analyze_worker and self.analyze_worker.isRunning():
+            self.analyze_worker.stop()
+            self.analyze_worker.wait(3000)
+
+    def selected_job_ids(self):
+        rows = sorted({index.row() for index in self.table.selectionModel().selectedRows()})
+        return [self.model.job_at(row).job_id for row in rows if self.model.job_at(row)]
+
+    def move_selected(self, offset):
+        job_ids = self.selected_job_ids()
+        if len(job_ids) == 1:
+            self.queue.move(job_ids[0], offset)
+            self.table.selectRow(self.queue.order.index(job_ids[0]))
+
+    def move_selected_to_top(self):
+        for job_id in reversed(self.selected_job_ids()):
+            self.queue.move_to_top(job_id)
+
+    def pause_selected(self):
+        for job_id in self.selected_job_ids():
+            self.queue.pause(job_id)
+
+    def resume_selected(self):
+        for job_id in self.selected_job_ids():
+            self.queue.resume(job_id)
+
+    def cancel_selected(self):
+        for job_id in self.selected_job_ids():
+            self.queue.cancel(job_id)
+
+    def update_status(self, *args):
+        # 总速度包括下载页面与队列中的全部下载
+        total_rate, budget = bandwidth_scheduler.rates()
+        rate_text = f"  总速度: {format_bytes(total_rate)}/s"
+        if budget:
+            rate_text += f" (上限 {format_bytes(budget)}/s)"
+        self.status_label.setText(
+            f"运行中: {self.queue.running_count()}  后处理中: {self.queue.postprocessing_count()}  "
+            f"等待中: {self.queue.pending_count()}  总计: {len(self.queue.jobs)}"
+            + rate_text)
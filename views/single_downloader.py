@@ -1,7 +1,16 @@
-import os
-from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QGroupBox, QLabel, QLineEdit, QPushButton, QComboBox, QCheckBox, QSlider, QProgressBar, QTextEdit, QMessageBox)
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QGroupBox, QLabel, QLineEdit, QPushButton, QComboBox, QCheckBox, QSlider, QProgressBar, QTextEdit, QMessageBox, QSpinBox)
 from PyQt5.QtCore import Qt
-from utils import AnalyzeWorker, DownloadWorker, UIManager, ConfigManager
+from utils import AnalyzeWorker, DownloadWorker, UIManager, ConfigManager, LogView
+from core.fragment_tuner import AUTO_FRAGMENTS, MAX_FRAGMENTS, FragmentTuner
+from core.download import CANCELLED_MESSAGE
+from core.command import DOWNLOAD_AUDIO, DOWNLOAD_VIDEO
+from core.bandwidth import PRIORITY_HIGH
+from core.external import DOWNLOADER_NATIVE
+from core.format_selector import (POLICIES, POLICY_MANUAL, POLICY_MAX_SIZE, POLICY_MIN_HEIGHT, describe_format,
+                                  describe_total, rank_audio_formats, rank_video_formats, select_formats)
+
+# "满足分辨率的最小体积"策略可选的最低分辨率
+MIN_HEIGHTS = (2160, 1440, 1080, 720, 480, 360)
 
 class SingleDownloader(QWidget):
     def __init__(self, parent=None):
@@ -9,6 +18,10 @@ class SingleDownloader(QWidget):
         self.parent = parent
         self.analyze_worker = None
         self.worker = None
+        # 最近一次分析得到的格式列表、时长（秒）与预计下载速度（字节/秒）
+        self.formats = []
+        self.duration = None
+        self.rate = None
         self.init_ui()
 
     def init_ui(self):
@@ -35,6 +48,11 @@ class SingleDownloader(QWidget):
         self.analyze_btn.clicked.connect(self.analyze_video)
         url_layout.addWidget(self.analyze_btn)
 
+        # 忽略缓存重新分析
+        self.force_refresh_checkbox = QCheckBox("强制刷新")
+        self.force_refresh_checkbox.setToolTip("忽略分析缓存，重新获取视频信息")
+        url_layout.addWidget(self.force_refresh_checkbox)
+
         download_layout.addLayout(url_layout)
 
 
@@ -56,9 +74,7 @@ class SingleDownloader(QWidget):
 
         self.cookie_combo = QComboBox()
         # 从主窗口加载Cookie文件列表
-        if hasattr(self.parent, 'cookie_files'):
-            # cookie_files现在是列表类型
-            self.cookie_combo.addItems(self.parent.cookie_files)
+        UIManager.fill_cookie_combo(self.cookie_combo, getattr(self.parent, 'cookie_files', []))
         # 连接主窗口Cookie更新信号
         self.parent.cookie_updated.connect(self.update_cookie_combo)
         self.cookie_combo.setEnabled(False)
@@ -73,7 +89,7 @@ class SingleDownloader(QWidget):
         thread_layout.addWidget(QLabel("线程数:"))
         self.thread_count_slider = QSlider(Qt.Horizontal)
         self.thread_count_slider.setMinimum(1)
-        self.thread_count_slider.setMaximum(64)
+        self.thread_count_slider.setMaximum(MAX_FRAGMENTS)
         self.thread_count_slider.setValue(4)
         self.thread_count_slider.setTickPosition(QSlider.TicksBelow)
         self.thread_count_slider.setTickInterval(5)
@@ -84,6 +100,15 @@ class SingleDownloader(QWidget):
 
         thread_layout.addWidget(self.thread_count_slider)
         thread_layout.addWidget(self.thread_count_label)
+        self.auto_thread_checkbox = QCheckBox("自动")
+        self.auto_thread_checkbox.setToolTip("根据实际下载速度为每个网站自动调节分片并发数")
+        self.auto_thread_checkbox.toggled.connect(self.on_auto_thread_changed)
+        thread_layout.addWidget(self.auto_thread_checkbox)
+        thread_layout.addWidget(QLabel("下载器:"))
+        self.downloader_combo = QComboBox()
+        self.downloader_combo.setToolTip("aria2c 用多个连接同时下载普通文件，找不到 aria2c 时自动改用内置下载器")
+        UIManager.fill_downloader_combo(self.downloader_combo)
+        thread_layout.addWidget(self.downloader_combo)
         thread_layout.addStretch()
         download_layout.addLayout(thread_layout)
 
@@ -115,9 +140,36 @@ class SingleDownloader(QWidget):
         video_quality_layout.addStretch()
         download_layout.addLayout(video_quality_layout)
 
+        # 格式选择策略
+        policy_layout = QHBoxLayout()
+        policy_layout.addWidget(QLabel("选择策略:"))
+        self.policy_combo = QComboBox()
+        self.policy_combo.addItems(POLICIES)
+        self.policy_combo.setToolTip("分析后按策略自动选择格式，相同分辨率优先体积更小的编码")
+        policy_layout.addWidget(self.policy_combo)
+        self.max_size_spin = QSpinBox()
+        self.max_size_spin.setRange(1, 100000)
+        self.max_size_spin.setValue(500)
+        self.max_size_spin.setSuffix(" MB")
+        self.max_size_spin.setVisible(False)
+        policy_layout.addWidget(self.max_size_spin)
+        self.min_height_combo = QComboBox()
+        for height in MIN_HEIGHTS:
+            self.min_height_combo.addItem(f"{height}p", height)
+        self.min_height_combo.setCurrentIndex(MIN_HEIGHTS.index(720))
+        self.min_height_combo.setVisible(False)
+        policy_layout.addWidget(self.min_height_combo)
+        self.estimate_label = QLabel("")
+        policy_layout.addWidget(self.estimate_label)
+        policy_layout.addStretch()
+        download_layout.addLayout(policy_layout)
+
         # 合成选项布局
         merge_option_layout = QHBoxLayout()
         merge_option_layout.addWidget(self.merge_checkbox)
+        self.use_archive_checkbox = QCheckBox("跳过已下载（下载存档）")
+        self.use_archive_checkbox.setChecked(True)
+        merge_option_layout.addWidget(self.use_archive_checkbox)
         merge_option_layout.addStretch()
         download_layout.addLayout(merge_option_layout)
 
@@ -133,7 +185,24 @@ class SingleDownloader(QWidget):
         self.download_btn.setStyleSheet("background-color: #f0f0f0; border: 1px solid #d0d0d0; padding: 5px 10px;")
         self.download_btn.clicked.connect(self.start_download)
 
+        self.enqueue_btn = QPushButton("加入队列")
+        self.enqueue_btn.setStyleSheet("background-color: #f0f0f0; border: 1px solid #d0d0d0; padding: 5px 10px;")
+        self.enqueue_btn.clicked.connect(self.add_to_queue)
+
+        self.pause_btn = QPushButton("暂停")
+        self.pause_btn.setStyleSheet("background-color: #f0f0f0; border: 1px solid #d0d0d0; padding: 5px 10px;")
+        self.pause_btn.setEnabled(False)
+        self.pause_btn.clicked.connect(self.toggle_pause)
+
+        self.cancel_btn = QPushButton("取消下载")
+        self.cancel_btn.setStyleSheet("background-color: #f0f0f0; border: 1px solid #d0d0d0; padding: 5px 10px;")
+        self.cancel_btn.setEnabled(False)
+        self.cancel_btn.clicked.connect(self.cancel_download)
+
         control_layout.addWidget(self.download_btn)
+        control_layout.addWidget(self.enqueue_btn)
+        control_layout.addWidget(self.pause_btn)
+        control_layout.addWidget(self.cancel_btn)
         control_layout.addStretch()
 
         main_layout.addLayout(control_layout)
@@ -145,11 +214,14 @@ class SingleDownloader(QWidget):
         main_layout.addWidget(self.progress_bar)
 
         # 日志输出
-        self.log_output = QTextEdit()
-        self.log_output.setReadOnly(True)
+        self.log_output = LogView()
         self.log_output.setMaximumHeight(200)
         main_layout.addWidget(self.log_output)
 
+        self.filter_progress_checkbox = QCheckBox("隐藏进度行")
+        self.filter_progress_checkbox.stateChanged.connect(self.log_output.set_filter_progress)
+        main_layout.addWidget(self.filter_progress_checkbox)
+
         # 初始隐藏音频质量选项
         self.audio_quality_label.setVisible(False)
         self.audio_quality_combo.setVisible(False)
@@ -158,10 +230,19 @@ class SingleDownloader(QWidget):
 
         # 连接下载类型选择变化信号
         self.download_type_combo.currentTextChanged.connect(self.on_download_type_changed)
+        self.policy_combo.currentTextChanged.connect(self.apply_policy)
+        self.max_size_spin.valueChanged.connect(self.apply_policy)
+        self.min_height_combo.currentIndexChanged.connect(self.apply_policy)
+        self.audio_quality_combo.currentIndexChanged.connect(self.update_estimate)
+        self.video_quality_combo.currentIndexChanged.connect(self.update_estimate)
 
     def on_thread_count_changed(self, value):
         self.thread_count_label.setText(str(value))
 
+    def on_auto_thread_changed(self, checked):
+        self.thread_count_slider.setEnabled(not checked)
+        self.thread_count_label.setText("自动" if checked else str(self.thread_count_slider.value()))
+
 
     def on_use_cookie_changed(self, state):
         enabled = state == Qt.Checked
@@ -169,13 +250,11 @@ class SingleDownloader(QWidget):
 
     def update_config(self, config):
         # 更新下载器配置
-        self.download_dir = config.get('download_dir', self.download_dir)
-        self.quality = config.get('quality', self.quality)
+        self.config = config
+        UIManager.fill_downloader_combo(self.downloader_combo, config.get('downloader', DOWNLOADER_NATIVE))
         
     def update_cookie_combo(self, cookie_files):
-        self.cookie_combo.clear()
-        # 添加Cookie名称到下拉框
-        self.cookie_combo.addItems(cookie_files)
+        UIManager.fill_cookie_combo(self.cookie_combo, cookie_files)
 
 
 
@@ -183,8 +262,9 @@ class SingleDownloader(QWidget):
         # 从设置页面获取ytdlp路径
         ytdlp_path = self.parent.config.get('ytdlp_path', '')
         url = self.url_edit.text().strip()
+        engine = self.parent.get_engine()
 
-        if not ytdlp_path or not os.path.exists(ytdlp_path):
+        if not engine.available():
             UIManager.show_message("警告", "请先在设置页面设置有效的YT-DLP路径!", QMessageBox.Warning)
             return
 
@@ -194,9 +274,16 @@ class SingleDownloader(QWidget):
 
         self.analyze_btn.setEnabled(False)
         UIManager.log_message(self.log_output, "正在分析视频信息...")
+        _, cookie_path = self.selected_cookie_path(url, confirm=False)
 
-        self.analyze_worker = AnalyzeWorker(ytdlp_path, url)
+        self.analyze_worker = AnalyzeWorker(
+            ytdlp_path, url, cookie_path,
+            cache=self.parent.analysis_cache,
+            force_refresh=self.force_refresh_checkbox.isChecked(),
+            engine=engine
+        )
         self.analyze_worker.analysis_finished.connect(self.on_analysis_finished)
+        self.analyze_worker.error_occurred.connect(lambda msg: self.on_analysis_finished({'error': msg}))
         self.analyze_worker.start()
 
     def on_analysis_finished(self, video_info):
@@ -207,7 +294,10 @@ class SingleDownloader(QWidget):
             UIManager.show_message("错误", f"分析失败: {video_info['error']}", QMessageBox.Critical)
             return
 
-        UIManager.log_message(self.log_output, "视频分析完成")
+        if self.analyze_worker and self.analyze_worker.from_cache:
+            UIManager.log_message(self.log_output, "视频分析完成（来自缓存）")
+        else:
+            UIManager.log_message(self.log_output, "视频分析完成")
         self.update_quality_options(video_info)
 
     def update_quality_options(self, video_info):
@@ -215,42 +305,56 @@ class SingleDownloader(QWidget):
         self.audio_quality_combo.clear()
         self.video_quality_combo.clear()
 
-        formats = video_info.get("formats", [])
-        audio_formats = []
-        video_formats = []
-
-        for fmt in formats:
-            if fmt.get("vcodec") == "none":
-                audio_formats.append(fmt)
-            elif fmt.get("acodec") == "none":
-                video_formats.append(fmt)
+        self.formats = video_info.get("formats", [])
+        self.duration = video_info.get("duration")
+        # 用该网站测得的吞吐量估算下载时间
+        self.rate = FragmentTuner().throughput(self.url_edit.text().strip())
 
-        audio_formats.sort(key=lambda x: x.get("abr", 0) or 0, reverse=True)
-        video_formats.sort(key=lambda x: x.get("height", 0) or 0, reverse=True)
+        # 相同分辨率与编码只保留体积最小的格式，按分辨率、体积排序
+        audio_formats = rank_audio_formats(self.formats, self.duration)
+        video_formats = rank_video_formats(self.formats, self.duration)
 
         for fmt in audio_formats:
-            abr = fmt.get("abr", "Unknown")
-            ext = fmt.get("ext", "Unknown")
-            self.audio_quality_combo.addItem(f"音频: {abr}kbps ({ext})", fmt)
-
-        seen_formats = {}
-        unique_video_formats = []
+            self.audio_quality_combo.addItem(describe_format(fmt, self.duration, self.rate), fmt)
         for fmt in video_formats:
-            height = fmt.get("height", "Unknown")
-            if height not in seen_formats:
-                seen_formats[height] = True
-                unique_video_formats.append(fmt)
-
-        for fmt in unique_video_formats:
-            height = fmt.get("height", "Unknown")
-            ext = fmt.get("ext", "Unknown")
-            self.video_quality_combo.addItem(f"视频: {height}p ({ext})", fmt)
+            self.video_quality_combo.addItem(describe_format(fmt, self.duration, self.rate), fmt)
 
         # 添加默认选项
         if not audio_formats:
             self.audio_quality_combo.addItems(["最高质量", "中等质量", "低质量"])
         if not video_formats:
             self.video_quality_combo.addItems(["最高质量", "中等质量", "低质量"])
+        self.apply_policy()
+
+    def apply_policy(self):
+        """按选择策略在质量下拉框中选中对应的格式
+        """
+        policy = self.policy_combo.currentText()
+        self.max_size_spin.setVisible(policy == POLICY_MAX_SIZE)
+        self.min_height_combo.setVisible(policy == POLICY_MIN_HEIGHT)
+        download_type = self.download_type_combo.currentText()
+        video, audio = select_formats(self.formats, self.duration, download_type != DOWNLOAD_AUDIO,
+                                      download_type != DOWNLOAD_VIDEO, policy,
+                                      self.max_size_spin.value() * 1024 * 1024, self.min_height_combo.currentData())
+        for combo, fmt in ((self.video_quality_combo, video), (self.audio_quality_combo, audio)):
+            if fmt is None:
+                continue
+            for index in range(combo.count()):
+                data = combo.itemData(index)
+                if isinstance(data, dict) and data.get('format_id') == fmt['format_id']:
+                    combo.setCurrentIndex(index)
+                    break
+        self.update_estimate()
+
+    def update_estimate(self):
+        """显示所选格式合计的预计大小与下载时间
+        """
+        chosen = []
+        for combo in (self.video_quality_combo, self.audio_quality_combo):
+            data = combo.currentData()
+            if not combo.isHidden() and isinstance(data, dict):
+                chosen.append(data)
+        self.estimate_label.setText(describe_total(chosen, self.duration, self.rate) or "")
 
     def on_download_type_changed(self, download_type):
         if download_type == "仅音频":
@@ -271,64 +375,131 @@ class SingleDownloader(QWidget):
             self.video_quality_label.setVisible(True)
             self.video_quality_combo.setVisible(True)
             self.merge_checkbox.setVisible(True)
+        if self.policy_combo.currentText() != POLICY_MANUAL:
+            self.apply_policy()
+        else:
+            self.update_estimate()
 
-    def start_download(self):
+    def selected_cookie_path(self, url, confirm=True):
+        """获取选中的cookie文件路径，返回 (是否继续, 路径)
+        """
+        return UIManager.resolve_cookie(self.cookie_combo, self.use_cookie_checkbox.isChecked(), url,
+                                        self.log_output, confirm)
+
+    def collect_download_options(self):
+        """校验输入并收集下载参数，失败时返回None
+        """
         # 从设置页面获取ytdlp路径
         ytdlp_path = self.parent.config.get('ytdlp_path', '')
         url = self.url_edit.text().strip()
         # 从设置页面获取输出路径
         output_path = self.parent.config.get('output_path', '')
         download_type = self.download_type_combo.currentText()
-        thread_count = self.thread_count_slider.value()
+        thread_count = AUTO_FRAGMENTS if self.auto_thread_checkbox.isChecked() else self.thread_count_slider.value()
 
-        if not ytdlp_path or not os.path.exists(ytdlp_path):
+        if not self.parent.get_engine().available():
             UIManager.show_message("警告", "请先在设置页面设置有效的YT-DLP路径!", QMessageBox.Warning)
-            return
+            return None
 
         if not url:
             UIManager.show_message("警告", "请输入视频URL!", QMessageBox.Warning)
-            return
+            return None
 
         if not output_path:
             UIManager.show_message("警告", "请在设置页面配置输出路径!", QMessageBox.Warning)
-            return
+            return None
 
-        self.download_btn.setEnabled(False)
-        self.progress_bar.setVisible(True)
-        self.progress_bar.setRange(0, 100)
-        self.progress_bar.setValue(0)
-        self.log_output.clear()
+        proceed, cookie_path = self.selected_cookie_path(url)
+        if not proceed:
+            return None
 
         audio_format_data = self.audio_quality_combo.currentData()
         video_format_data = self.video_quality_combo.currentData()
         merge_output = self.merge_checkbox.isChecked()
 
-        # 获取选中的cookie文件路径
-        cookie_name = self.cookie_combo.currentText() if self.use_cookie_checkbox.isChecked() and self.cookie_combo.currentIndex() != -1 else None
-        cookie_path = None
-        if cookie_name and hasattr(self.parent, 'cookie_files'):
-            # 在列表中查找匹配的cookie文件
-            for cookie_file in self.parent.cookie_files:
-                if os.path.basename(cookie_file) == cookie_name:
-                    cookie_path = cookie_file
-                    break
+        options = {
+            'download_type': download_type,
+            'output_path': output_path,
+            'cookie_path': cookie_path,
+            'audio_quality': audio_format_data if self.audio_quality_combo.isVisible() else None,
+            'video_quality': video_format_data if self.video_quality_combo.isVisible() else None,
+            'merge_output': merge_output if self.merge_checkbox.isVisible() else None,
+            'thread_count': thread_count,
+            'use_archive': self.use_archive_checkbox.isChecked(),
+            'downloader': self.downloader_combo.currentData()
+        }
+        return ytdlp_path, url, options
 
-        self.worker = DownloadWorker(
-            ytdlp_path, url, download_type, output_path,
-            cookie_path,
-            audio_format_data if self.audio_quality_combo.isVisible() else None,
-            video_format_data if self.video_quality_combo.isVisible() else None,
-            merge_output if self.merge_checkbox.isVisible() else None,
-            thread_count
-        )
+    def start_download(self):
+        collected = self.collect_download_options()
+        if not collected:
+            return
+        ytdlp_path, url, options = collected
+
+        self.set_running(True)
+        self.progress_bar.setVisible(True)
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setValue(0)
+        self.log_output.clear()
+
+        self.worker = DownloadWorker(ytdlp_path, url, engine=self.parent.get_engine(), journal=self.parent.journal,
+                                     **options)
+        # 当前页面的下载在按优先级分配带宽时优先
+        self.worker.task.priority = PRIORITY_HIGH
         self.worker.progress_updated.connect(lambda msg: UIManager.log_message(self.log_output, msg))
-        self.worker.progress_changed.connect(lambda val: UIManager.update_progress_bar(self.progress_bar, val))
+        self.worker.progress_detail.connect(lambda progress: UIManager.update_progress_detail(self.progress_bar, progress))
         self.worker.download_finished.connect(self.on_download_finished)
+        self.worker.error_occurred.connect(lambda msg: self.on_download_finished(False, msg))
         self.worker.start()
 
+    def add_to_queue(self):
+        collected = self.collect_download_options()
+        if not collected:
+            return
+        ytdlp_path, url, options = collected
+        job_id = self.parent.download_queue.enqueue(ytdlp_path, url, **options)
+        UIManager.log_message(self.log_output, f"已加入下载队列 (任务 #{job_id}): {url}")
+
+    def set_running(self, running):
+        self.download_btn.setEnabled(not running)
+        self.pause_btn.setEnabled(running)
+        self.cancel_btn.setEnabled(running)
+        self.pause_btn.setText("暂停")
+
+    def toggle_pause(self):
+        if not self.worker or not self.worker.isRunning():
+            return
+        if self.worker.task.paused:
+            if self.worker.resume():
+                self.pause_btn.setText("暂停")
+                UIManager.log_message(self.log_output, "下载已继续")
+        elif self.worker.pause():
+            self.pause_btn.setText("继续")
+            UIManager.log_message(self.log_output, "下载已暂停")
+        else:
+            UIManager.log_message(self.log_output, "当前下载无法暂停")
+
+    def cancel_download(self):
+        if self.worker and self.worker.isRunning():
+            self.cancel_btn.setEnabled(False)
+            self.pause_btn.setEnabled(False)
+            self.worker.stop()
+            UIManager.log_message(self.log_output, "正在取消下载...")
+
+    def shutdown(self):
+        """结束运行中的分析与下载（连同 yt-dlp 的子进程），并等待工作线程退出
+        """
+        workers = [worker for worker in (self.analyze_worker, self.worker) if worker and worker.isRunning()]
+        for worker in workers:
+            worker.stop()
+        for worker in workers:
+            worker.wait(3000)
+
     def on_download_finished(self, success, message):
-        self.download_btn.setEnabled(True)
+        self.set_running(False)
         UIManager.log_message(self.log_output, message)
+        if message == CANCELLED_MESSAGE:
+            return
         if success:
             UIManager.show_message("成功", "下载完成!", QMessageBox.Information)
         else:
@@ -0,0 +1,178 @@
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QGroupBox, QLabel, QPushButton, QTableView,
+                             QHeaderView, QAbstractItemView, QGridLayout)
+from PyQt5.QtCore import Qt, QTimer, QAbstractTableModel, QModelIndex
+import os
+import time
+from core.metrics import KIND_DOWNLOAD, KIND_NAMES, RESULT_NAMES, RESULT_SUCCESS, registry
+from core.progress import format_bytes
+
+# 页面可见时的刷新间隔（毫秒）
+REFRESH_INTERVAL = 2000
+
+
+def format_seconds(value):
+    return f"{value:.2f} 秒" if value is not None else "-"
+
+
+def format_speed(value):
+    return f"{format_bytes(value)}/s" if value else "-"
+
+
+class RecentJobsModel(QAbstractTableModel):
+    """最近任务的指标表格，每次刷新整体替换
+    """
+    HEADERS = ["开始时间", "类型", "站点", "结果", "耗时", "启动", "首字节", "合并", "下载量", "平均速度", "峰值速度", "重试"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.jobs = []
+
+    def set_jobs(self, jobs):
+        self.beginResetModel()
+        self.jobs = jobs
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.jobs)
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        job = self.jobs[index.row()]
+        result = RESULT_NAMES.get(job['result'], "进行中")
+        if job['cached']:
+            result += "（缓存）"
+        values = (
+            time.strftime('%H:%M:%S', time.localtime(job['started'])),
+            KIND_NAMES.get(job['kind'], job['kind']),
+            job['host'],
+            result,
+            format_seconds(job['duration_seconds']),
+            format_seconds(job['spawn_seconds']),
+            format_seconds(job['ttfb_seconds']),
+            format_seconds(job['merge_seconds']),
+            format_bytes(job['downloaded_bytes']) if job['downloaded_bytes'] else "-",
+            format_speed(job['average_speed']),
+            format_speed(job['peak_speed']),
+            str(job['retries'] + job['restarts']),
+        )
+        return values[index.column()]
+
+
+class StatsView(QWidget):
+    """统计页面：显示汇总指标与最近任务的明细
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.parent = parent
+        self.init_ui()
+        self.timer = QTimer(self)
+        self.timer.setInterval(REFRESH_INTERVAL)
+        self.timer.timeout.connect(self.refresh)
+
+    def init_ui(self):
+        main_layout = QVBoxLayout(self)
+        main_layout.setSpacing(15)
+        main_layout.setContentsMargins(20, 20, 20, 20)
+
+        # 汇总指标
+        summary_group = QGroupBox("汇总")
+        summary_layout = QGridLayout()
+        self.summary_labels = {}
+        items = (('jobs', "下载任务"), ('analyses', "分析任务"), ('bytes', "下载总量"),
+                 ('current_speed', "当前速度"), ('average_speed', "平均速度"), ('peak_speed', "峰值速度"),
+                 ('spawn', "平均启动耗时"), ('ttfb', "平均首字节时间"), ('analysis', "平均分析耗时"),
+                 ('merge', "平均合并耗时"), ('retries', "重试 / 重启"), ('cache_hits', "分析缓存命中"))
+        for position, (key, title) in enumerate(items):
+            row, column = divmod(position, 3)
+            summary_layout.addWidget(QLabel(f"{title}:"), row, column * 2)
+            label = QLabel("-")
+            label.setTextInteractionFlags(Qt.TextSelectableByMouse)
+            summary_layout.addWidget(label, row, column * 2 + 1)
+            self.summary_labels[key] = label
+        summary_group.setLayout(summary_layout)
+        main_layout.addWidget(summary_group)
+
+        # 最近任务
+        self.model = RecentJobsModel(self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        main_layout.addWidget(self.table)
+
+        control_layout = QHBoxLayout()
+        self.export_label = QLabel()
+        control_layout.addWidget(self.export_label, 1)
+        export_btn = QPushButton("立即导出")
+        export_btn.clicked.connect(self.export_now)
+        control_layout.addWidget(export_btn)
+        main_layout.addLayout(control_layout)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+        self.timer.start()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.timer.stop()
+
+    def refresh(self):
+        snapshot = registry.snapshot()
+        totals = snapshot['totals']
+        counts = {}
+        for row in totals['jobs']:
+            kind = KIND_DOWNLOAD if row['kind'] == KIND_DOWNLOAD else 'analysis'
+            succeeded, total = counts.get(kind, (0, 0))
+            counts[kind] = (succeeded + (row['count'] if row['result'] == RESULT_SUCCESS else 0), total + row['count'])
+        timings = {}
+        for row in totals['timings']:
+            # 启动与首字节时间只统计下载任务，分析耗时合并视频与播放列表分析
+            name = 'analysis' if row['name'] == 'duration' and row['kind'] != KIND_DOWNLOAD else row['name']
+            if name in ('spawn', 'ttfb') and row['kind'] != KIND_DOWNLOAD:
+                continue
+            total, count = timings.get(name, (0.0, 0))
+            timings[name] = (total + row['sum'], count + row['count'])
+
+        def average(name):
+            total, count = timings.get(name, (0.0, 0))
+            return format_seconds(total / count) if count else "-"
+
+        finished = [job for job in snapshot['recent'] if job['kind'] == KIND_DOWNLOAD and job['average_speed']]
+        labels = self.summary_labels
+        for key in ('jobs', 'analyses'):
+            succeeded, total = counts.get(KIND_DOWNLOAD if key == 'jobs' else 'analysis', (0, 0))
+            labels[key].setText(f"{succeeded} 成功 / 共 {total}")
+        labels['bytes'].setText(format_bytes(totals['downloaded_bytes']) if totals['downloaded_bytes'] else "-")
+        labels['current_speed'].setText(format_speed(snapshot['current_speed']))
+        labels['average_speed'].setText(format_speed(
+            sum(job['average_speed'] for job in finished) / len(finished) if finished else None))
+        labels['peak_speed'].setText(format_speed(totals['peak_speed']))
+        for key in ('spawn', 'ttfb', 'analysis', 'merge'):
+            labels[key].setText(average(key))
+        labels['retries'].setText(f"{totals['retries']} / {totals['restarts']}")
+        labels['cache_hits'].setText(str(totals['analysis_cache_hits']))
+
+        # 运行中的任务在前，其余按开始时间从新到旧
+        self.model.set_jobs(sorted(snapshot['active'], key=lambda job: -job['started'])
+                            + snapshot['recent'][::-1])
+        exporter = getattr(self.parent, 'metrics_exporter', None)
+        if exporter is not None:
+            self.export_label.setText(f"导出目录: {os.path.abspath(exporter.directory)}")
+
+    def export_now(self):
+        exporter = getattr(self.parent, 'metrics_exporter', None)
+        if exporter is not None:
+            exporter.export_now(force=True)
+            self.refresh()
@@ -0,0 +1,202 @@
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QGroupBox, QLabel, QLineEdit, QPushButton, QComboBox,
+                             QSpinBox, QTableView, QHeaderView, QAbstractItemView, QMessageBox)
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+import time
+from utils import UIManager
+from core.subscriptions import DEFAULT_INTERVAL_HOURS
+
+
+class SubscriptionsModel(QAbstractTableModel):
+    """订阅列表表格，每次刷新从数据库整体读取
+    """
+    HEADERS = ["名称", "链接", "下载类型", "间隔", "上次同步", "最新视频", "结果"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.subscriptions = []
+
+    def set_subscriptions(self, subscriptions):
+        self.beginResetModel()
+        self.subscriptions = subscriptions
+        self.endResetModel()
+
+    def subscription_at(self, row):
+        return self.subscriptions[row] if 0 <= row < len(self.subscriptions) else None
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.subscriptions)
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        sub = self.subscriptions[index.row()]
+        if role == Qt.ForegroundRole and not sub.enabled:
+            return Qt.gray
+        if role != Qt.DisplayRole:
+            return None
+        values = (
+            sub.title or "-",
+            sub.url,
+            sub.download_type,
+            f"{sub.interval_hours} 小时" + ("" if sub.enabled else "（已停用）"),
+            time.strftime('%Y-%m-%d %H:%M', time.localtime(sub.last_sync)) if sub.last_sync else "从未同步",
+            " ".join(filter(None, (sub.last_id, sub.last_upload_date))) or "-",
+            sub.last_result or "",
+        )
+        return values[index.column()]
+
+
+class SubscriptionsView(QWidget):
+    """订阅页面：管理订阅的频道，按设定的间隔自动把新视频加入下载队列
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.parent = parent
+        self.scheduler = parent.subscription_scheduler
+        self.init_ui()
+        self.scheduler.sync_started.connect(self.on_sync_started)
+        self.scheduler.subscription_synced.connect(lambda *args: self.refresh())
+        self.scheduler.sync_finished.connect(self.on_sync_finished)
+        if self.scheduler.is_running():
+            self.on_sync_started()
+        self.refresh()
+
+    def init_ui(self):
+        main_layout = QVBoxLayout(self)
+        main_layout.setSpacing(15)
+        main_layout.setContentsMargins(20, 20, 20, 20)
+
+        # 添加订阅
+        add_group = QGroupBox("添加订阅")
+        add_layout = QVBoxLayout()
+        url_layout = QHBoxLayout()
+        url_layout.addWidget(QLabel("频道/播放列表链接:"))
+        self.url_edit = QLineEdit()
+        url_layout.addWidget(self.url_edit)
+        add_layout.addLayout(url_layout)
+
+        options_layout = QHBoxLayout()
+        options_layout.addWidget(QLabel("下载类型:"))
+        self.download_type_combo = QComboBox()
+        self.download_type_combo.addItems(["全部下载", "仅音频", "仅视频"])
+        options_layout.addWidget(self.download_type_combo)
+        options_layout.addWidget(QLabel("同步间隔(小时):"))
+        self.interval_spin = QSpinBox()
+        self.interval_spin.setRange(1, 24 * 30)
+        self.interval_spin.setValue(DEFAULT_INTERVAL_HOURS)
+        options_layout.addWidget(self.interval_spin)
+        options_layout.addWidget(QLabel("首次下载最新:"))
+        self.initial_count_spin = QSpinBox()
+        self.initial_count_spin.setRange(0, 200)
+        self.initial_count_spin.setSuffix(" 个")
+        self.initial_count_spin.setToolTip("0 表示首次同步只记录当前位置，之后只下载新上传的视频")
+        options_layout.addWidget(self.initial_count_spin)
+        options_layout.addStretch()
+        add_btn = QPushButton("添加订阅")
+        add_btn.setObjectName("downloadBtn")
+        add_btn.clicked.connect(self.add_subscription)
+        options_layout.addWidget(add_btn)
+        add_layout.addLayout(options_layout)
+        add_group.setLayout(add_layout)
+        main_layout.addWidget(add_group)
+
+        # 订阅列表
+        self.model = SubscriptionsModel(self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
+        self.table.horizontalHeader().setSectionResizeMode(6, QHeaderView.Stretch)
+        main_layout.addWidget(self.table)
+
+        control_layout = QHBoxLayout()
+        control_layout.setSpacing(10)
+        self.sync_all_btn = QPushButton("立即同步全部")
+        self.sync_all_btn.clicked.connect(self.sync_all)
+        control_layout.addWidget(self.sync_all_btn)
+        self.sync_selected_btn = QPushButton("同步选中")
+        self.sync_selected_btn.clicked.connect(self.sync_selected)
+        control_layout.addWidget(self.sync_selected_btn)
+        for text, slot in (("启用/停用", self.toggle_selected),
+                           ("删除选中订阅", self.remove_selected)):
+            btn = QPushButton(text)
+            btn.clicked.connect(slot)
+            control_layout.addWidget(btn)
+        control_layout.addStretch()
+        self.status_label = QLabel()
+        control_layout.addWidget(self.status_label)
+        main_layout.addLayout(control_layout)
+
+    def refresh(self):
+        self.model.set_subscriptions(self.scheduler.store.all())
+
+    def selected_subscriptions(self):
+        rows = sorted({index.row() for index in self.table.selectionModel().selectedRows()})
+        return [self.model.subscription_at(row) for row in rows if self.model.subscription_at(row)]
+
+    def add_subscription(self):
+        url = self.url_edit.text().strip()
+        if not url:
+            UIManager.show_message("警告", "请输入频道或播放列表链接!", QMessageBox.Warning)
+            return
+        sub_id = self.scheduler.store.add(url, self.download_type_combo.currentText(), self.interval_spin.value(),
+                                          self.initial_count_spin.value())
+        if sub_id is None:
+            UIManager.show_message("提示", "该链接已经订阅")
+            return
+        self.url_edit.clear()
+        self.refresh()
+        # 新订阅立即同步一次，记录当前位置；正在同步其他订阅时由下一次定时检查同步
+        if not self.scheduler.is_running():
+            self.start_sync([self.scheduler.store.get(sub_id)])
+
+    def sync_all(self):
+        self.start_sync([sub for sub in self.scheduler.store.all() if sub.enabled])
+
+    def sync_selected(self):
+        self.start_sync(self.selected_subscriptions())
+
+    def start_sync(self, subscriptions):
+        if not subscriptions:
+            return
+        error = self.scheduler.sync(subscriptions)
+        if error:
+            UIManager.show_message("警告", error, QMessageBox.Warning)
+
+    def toggle_selected(self):
+        for sub in self.selected_subscriptions():
+            self.scheduler.store.set_enabled(sub.sub_id, not sub.enabled)
+        self.refresh()
+
+    def remove_selected(self):
+        subscriptions = self.selected_subscriptions()
+        if not subscriptions:
+            return
+        reply = QMessageBox.question(self, "删除订阅", f"确定删除选中的 {len(subscriptions)} 个订阅吗？",
+                                     QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if reply != QMessageBox.Yes:
+            return
+        for sub in subscriptions:
+            self.scheduler.store.remove(sub.sub_id)
+        self.refresh()
+
+    def on_sync_started(self):
+        self.sync_all_btn.setEnabled(False)
+        self.sync_selected_btn.setEnabled(False)
+        self.status_label.setText("正在同步订阅...")
+
+    def on_sync_finished(self, total):
+        self.sync_all_btn.setEnabled(True)
+        self.sync_selected_btn.setEnabled(True)
+        self.status_label.setText(f"同步完成，{total} 个新视频已加入下载队列" if total else "同步完成，没有新视频")
+        self.refresh()